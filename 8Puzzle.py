@@ -1,19 +1,31 @@
-import heapq
-import gradio as gr
-import matplotlib.pyplot as plt
-
-# Goal state for the 8-puzzle
+import io
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from math import isqrt
+from SlidingPuzzle import (ARA_WEIGHT, ara_star_steps, astar as sliding_astar, solve_steps, parse_state,
+                           board_width, is_solvable, get_board)
+import DistanceTable
+from PatternDB import load_default
+from SearchStats import Budget, summary
+
+# Goal state for the 8-puzzle (larger boards follow the same 0, 1, 2, ... layout)
 goal_state = (0, 1, 2, 3, 4, 5, 6, 7, 8)
 
+# Board width of a state (3 for the 8-puzzle, 4 for the 15-puzzle, ...)
+def width_of(state):
+    return isqrt(len(state))
+
 # Manhattan distance heuristic with detailed explanation
 def manhattan_details(state):
     details = []
     dist = 0
+    w = width_of(state)
     for i, val in enumerate(state):
         if val == 0:  # skip blank
             continue
-        row_cur, col_cur = divmod(i, 3)
-        row_goal, col_goal = divmod(goal_state.index(val), 3)
+        row_cur, col_cur = divmod(i, w)
+        row_goal, col_goal = divmod(val, w)  # goal position of tile val is index val
 
         row_diff = abs(row_cur - row_goal)
         col_diff = abs(col_cur - col_goal)
@@ -32,19 +44,19 @@ def manhattan_details(state):
     return dist, details
 
 def manhattan(state):
-    dist, _ = manhattan_details(state)
-    return dist
+    return get_board(width_of(state)).manhattan(state)
 
 # Generate neighbors with move info
 def get_neighbors_with_move(state):
     neighbors = []
     i = state.index(0)
-    x, y = divmod(i, 3)
+    w = width_of(state)
+    x, y = divmod(i, w)
     moves = [(-1,0),(1,0),(0,-1),(0,1)]  # Up, Down, Left, Right
     for dx, dy in moves:
         nx, ny = x+dx, y+dy
-        if 0 <= nx < 3 and 0 <= ny < 3:
-            j = nx*3 + ny
+        if 0 <= nx < w and 0 <= ny < w:
+            j = nx*w + ny
             new_state = list(state)
             new_state[i], new_state[j] = new_state[j], new_state[i]
             moved_tile = state[j]
@@ -52,121 +64,305 @@ def get_neighbors_with_move(state):
             # (new state, which tile moved, from index, to index)
     return neighbors
 
-# A* algorithm
+# A* algorithm (bit-packed engine with incremental Manhattan, see SlidingPuzzle.py)
 def astar(start):
-    pq = []
-    g = {start: 0}
-    f = {start: manhattan(start)}
-    came_from = {}
-    heapq.heappush(pq, (f[start], start))
-
-    while pq:
-        _, current = heapq.heappop(pq)
-        if current == goal_state:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            path.append(start)
-            path.reverse()
-            return path
-        for neighbor, moved_tile, _, _ in get_neighbors_with_move(current):
-            tentative_g = g[current] + 1
-            if neighbor not in g or tentative_g < g[neighbor]:
-                came_from[neighbor] = current
-                g[neighbor] = tentative_g
-                f[neighbor] = tentative_g + manhattan(neighbor)
-                heapq.heappush(pq, (f[neighbor], neighbor))
-    return None
+    return sliding_astar(start)
+
+# Solved paths shared by all users; repeated start states skip the search.
+# Keyed by (start, weight): weight 1 is the optimal path, larger weights the
+# weighted A* one. The search statistics of the first solve are kept alongside
+# the path. Least recently used entries are dropped first; solves stopped
+# early are not kept.
+SOLUTION_CACHE_SIZE = 1024
+_solutions = OrderedDict()
+_solutions_lock = threading.Lock()
+
+def lookup_solution(start, w=1):
+    with _solutions_lock:
+        found = _solutions.get((start, w))
+        if found is not None:
+            _solutions.move_to_end((start, w))
+        return found
+
+def remember_solution(start, path, stats, w=1):
+    found = (tuple(path) if path else None), stats
+    with _solutions_lock:
+        _solutions[start, w] = found
+        _solutions.move_to_end((start, w))
+        if len(_solutions) > SOLUTION_CACHE_SIZE:
+            _solutions.popitem(last=False)
+    return found
+
+# Exact cost-to-go h*(n), only known for the 8-puzzle
+def exact_cost(state):
+    return DistanceTable.distance(state) if width_of(state) == 3 else None
 
 # Plot puzzle
+# One figure per board width is built once and reused: a frame only recolors
+# the tile patches and rewrites the labels, then is saved as PNG. It is a plain
+# matplotlib Figure (not pyplot), so nothing piles up in pyplot's figure
+# registry, and the lock lets concurrent handlers share it. Matplotlib is only
+# imported when the first board is drawn.
+class PuzzleRenderer:
+    def __init__(self, w):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Rectangle
+        self.fig = Figure(figsize=(5,5), dpi=80)
+        FigureCanvasAgg(self.fig)
+        ax = self.fig.subplots()
+        ax.set_xlim(0,w); ax.set_ylim(0,w)
+        ax.set_xticks([]); ax.set_yticks([])
+        self.tiles, self.labels = [], []
+        for i in range(w):
+            for j in range(w):
+                self.tiles.append(ax.add_patch(Rectangle((j,w-1-i),1,1,facecolor='white',edgecolor='black')))
+                self.labels.append(ax.text(j+0.5,w-1-i+0.5,'',ha='center',va='center',fontsize=20,weight='bold'))
+        self.lock = threading.Lock()
+
+    def render(self, state, highlight=None):
+        with self.lock:
+            for tile, label, val in zip(self.tiles, self.labels, state):
+                tile.set_facecolor('lightgreen' if val==highlight else ('white' if val!=0 else 'lightgray'))
+                label.set_text(str(val) if val != 0 else '')
+            buf = io.BytesIO()
+            self.fig.savefig(buf, format='png')
+            return buf.getvalue()
+
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+def get_renderer(w):
+    with _renderers_lock:
+        if w not in _renderers:
+            _renderers[w] = PuzzleRenderer(w)
+        return _renderers[w]
+
+def png_image(png):
+    from PIL import Image
+    return Image.open(io.BytesIO(png))
+
 def plot_puzzle(state, highlight=None):
-    fig, ax = plt.subplots(figsize=(5,5))
-    ax.set_xlim(0,3); ax.set_ylim(0,3)
-    ax.set_xticks([]); ax.set_yticks([])
-    for i in range(3):
-        for j in range(3):
-            val = state[i*3+j]
-            color = 'lightgreen' if val==highlight else ('white' if val!=0 else 'lightgray')
-            ax.add_patch(plt.Rectangle((j,2-i),1,1,facecolor=color,edgecolor='black'))
-            if val != 0:
-                ax.text(j+0.5,2-i+0.5,str(val),ha='center',va='center',fontsize=20,weight='bold')
-    return fig
-
-# Session state
-session = {"solution": [], "moves": [], "step": 0}
+    return png_image(get_renderer(width_of(state)).render(state, highlight))
+
+# Tile moved at each step of a solution path
+def moved_tiles(path):
+    return [prev[curr.index(0)] for prev, curr in zip(path, path[1:])]
+
+# Every frame of a solution path rendered once, as a strip of PNGs shared by
+# all users; stepping through a solution is then a lookup
+FRAME_CACHE_SIZE = 64
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def solution_frames(path):
+    renderer = get_renderer(width_of(path[0]))
+    moves = moved_tiles(path)
+    return tuple(renderer.render(state, moves[k-1] if k else None) for k, state in enumerate(path))
+
+# Session state (one per browser session, kept in a gr.State). "w" and "bound"
+# describe the solution: the weight it was searched with and how far from
+# optimal it can be at most (1 = optimal).
+def new_session():
+    return {"solution": [], "moves": [], "frames": (), "step": 0, "stats": {}, "w": 1, "bound": 1}
 
 def parse_input(text):
-    nums = list(map(int, text.replace(","," ").split()))
-    return tuple(nums)
+    return parse_state(text)
 
 # Explain why chosen neighbor
-def neighbor_choices_explanation(prev_state, chosen_state, prev_g):
+# The neighbors are listed with their Manhattan g/h/f (f = g + w*h for a weighted
+# solution), and with the exact h* on the 8-puzzle. "Why chosen?" follows how the
+# shown path was actually built:
+#   - optimal 8-puzzle: the table walk (DistanceTable.optimal_path) takes the
+#     first neighbor, in generation order, that is one move closer to the goal
+#   - optimal 15-puzzle and up: IDA* probes Up, Down, Left, Right depth-first
+#     and keeps the first path reaching the goal within the final f-bound
+#   - weighted A* / ARA*: the open list is ordered by (f, h, packed board code)
+#     and the path is the chain of parents of the goal
+def neighbor_choices_explanation(prev_state, chosen_state, prev_g, w=1):
     neighbors = get_neighbors_with_move(prev_state)
+    f_label = "f" if w == 1 else "f = g + w·h"
     lines = []
-    best_f = None
     for neigh, moved_tile, from_pos, to_pos in neighbors:
         g_n = prev_g + 1
         h_n, _ = manhattan_details(neigh)
-        f_n = g_n + h_n
-        from_r, from_c = divmod(from_pos, 3)
-        to_r, to_c = divmod(to_pos, 3)
+        f_n = g_n + w * h_n
+        from_r, from_c = divmod(from_pos, width_of(prev_state))
+        to_r, to_c = divmod(to_pos, width_of(prev_state))
         label = (
             f"Move tile {moved_tile}:\n"
             f"   From position (row={from_r}, col={from_c})\n"
             f"   To   position (row={to_r}, col={to_c})"
         )
         chosen_marker = "   <-- chosen" if neigh == chosen_state else ""
-        lines.append((label, neigh, g_n, h_n, f_n, chosen_marker))
-        if best_f is None or f_n < best_f:
-            best_f = f_n
+        lines.append((label, neigh, g_n, h_n, f_n, exact_cost(neigh), chosen_marker))
 
     # Build explanation
     expl = ["Neighbors considered:\n"]
-    for label, neigh, g_n, h_n, f_n, chosen_marker in lines:
+    for label, neigh, g_n, h_n, f_n, h_star, chosen_marker in lines:
+        exact = "" if h_star is None else f"   h* = {h_star}\n"
         expl.append(
             f"{label}\n"
             f"   g = {g_n}\n"
             f"   h = {h_n}\n"
-            f"   f = {f_n}{chosen_marker}\n"
+            f"{exact}"
+            f"   {f_label} = {f_n:g}{chosen_marker}\n"
         )
 
     # Explain choice
-    chosen_line = next(l for l in lines if l[1] == chosen_state)
-    chosen_f = chosen_line[4]
-    num_best = sum(1 for _,_,_,_,f,_ in lines if f == best_f)
     expl.append("Why chosen?")
-    if num_best == 1:
-        expl.append(f"   This move was chosen because its f = {chosen_f} is the lowest among all neighbors.")
+    if w != 1:
+        expl.append(
+            f"   Weighted search (w = {w:g}) expands states in order of\n"
+            f"   f = g + w·h, ties broken on the smaller h and then the\n"
+            f"   packed board code. The path is the chain of parents that\n"
+            f"   first reached the goal, so this move need not have the\n"
+            f"   lowest f here; the solution is at most {w:g} × optimal."
+        )
+    elif width_of(prev_state) == 3:
+        target = exact_cost(prev_state) - 1
+        closer = [neigh for _, neigh, _, _, _, h_star, _ in lines if h_star == target]
+        if chosen_state == closer[0]:
+            how = ("   The table walk takes the first neighbor (blank moving Up,\n"
+                   "   Down, Left, Right) that is one move closer")
+        else:
+            how = ("   This path came from the anytime search, which can pick\n"
+                   "   another of the moves that are one move closer")
+        expl.append(
+            f"   The exact distance table gives this state h* = {target}:\n"
+            f"   one move closer to the goal.\n"
+            f"{how} ({len(closer)} of {len(lines)} here)."
+        )
     else:
         expl.append(
-            f"   Multiple moves had the same lowest f = {chosen_f}.\n"
-            f"   A* uses a tie-breaking rule: neighbors are explored\n"
-            f"   in the order they are generated (Up, Down, Left, Right).\n"
-            f"   The first one with the best f is chosen.\n"
-            f"   That is why this tile was picked."
+            "   IDA* tries the blank's moves Up, Down, Left, Right depth-first,\n"
+            "   pruning where f exceeds its bound, and keeps the first path that\n"
+            "   reaches the goal in the last iteration. This is the first move,\n"
+            "   in that order, that leads to an optimal solution."
         )
 
     return "\n".join(expl)
 
 # Solve puzzle
-def solve_puzzle(start_text):
-    start = parse_input(start_text)
-    path = astar(start)
+# The handler is a generator: a search that is not cached runs through
+# solve_steps() and the page shows its progress every STREAM_INTERVAL seconds.
+# It stops at the time / node (expansion) budget; the Stop button cancels the
+# event, which closes the handler and the search with it. 0 means no budget.
+#
+# Modes trade solution length for speed. "Weighted A*" searches with
+# f = g + w*h: much faster on hard instances, at most w times longer than the
+# optimal solution. "Anytime (ARA*)" starts with weight w, shows each better
+# solution with its proven bound as soon as it is found, and keeps improving
+# it until the bound is 1 or a budget runs out; the last solution shown is the
+# answer (Stop keeps it too).
+STREAM_INTERVAL = 0.5
+TIME_BUDGET = 60
+NODE_BUDGET = 20000000
+SOLVE_MODES = ("Optimal", "Weighted A*", "Anytime (ARA*)")
+
+def progress_line(progress, budget):
+    return (f"{progress['expanded']:,} nodes expanded, f = {progress['f']}, "
+            f"{progress['frontier']:,} in frontier, {budget.elapsed:.1f} s")
+
+# Intermediate anytime solutions skip the frame strip: only the frame shown is drawn
+def use_solution(session, path, stats, w, bound, frames=True):
+    session.update(solution=path, stats=stats, step=0, moves=moved_tiles(path),
+                   frames=solution_frames(path) if frames else (), w=w, bound=bound)
+
+def solve_puzzle(start_text, mode, weight, seconds, nodes, session):
+    try:
+        start = parse_input(start_text)
+        board_width(start)
+    except ValueError as e:
+        yield f"❌ Invalid start state: {e}", None, session
+        return
+    # Inversion-parity gate: unsolvable inputs are rejected without searching
+    if not is_solvable(start):
+        yield "❌ This start state is unsolvable (wrong permutation parity)", None, session
+        return
+    w = 1 if mode == "Optimal" else max(1.0, float(weight))
+    session.update(new_session())
+    if mode == "Anytime (ARA*)":
+        # a finished anytime solve is optimal and cached as such
+        if lookup_solution(start) is None:
+            yield from anytime_solve(start, w, seconds, nodes, session)
+            return
+        w = 1
+    found = lookup_solution(start, w)
+    if found is None:
+        # 8-puzzles are read off the exact distance table (DistanceTable.py)
+        # without searching. IDA* keeps only the current path in memory; used
+        # for 15-puzzles and up. It uses the pattern database for that width
+        # when one has been built (python PatternDB.py build --width 4),
+        # Manhattan otherwise. A weight other than 1 runs weighted A* instead.
+        stats, budget, shown = {}, Budget(seconds, nodes), 0.0
+        steps = solve_steps(start, stats=stats, w=w)
+        while True:
+            try:
+                progress = next(steps)
+            except StopIteration as done:
+                found = remember_solution(start, done.value, stats, w)
+                break
+            if budget.exceeded(progress["expanded"]):
+                steps.close()
+                yield f"⏹️ Stopped by the {budget.reason}: {progress_line(progress, budget)}", None, session
+                return
+            if budget.elapsed - shown >= STREAM_INTERVAL:
+                shown = budget.elapsed
+                yield f"⏳ Searching: {progress_line(progress, budget)}", None, session
+    path, stats = found
     if not path:
-        return "❌ No solution found", None
-    session["solution"] = path
-    session["step"] = 0
-    session["moves"] = []
-    for k in range(1,len(path)):
-        prev, curr = path[k-1], path[k]
-        zero_prev, zero_curr = prev.index(0), curr.index(0)
-        moved_tile = prev[zero_curr]
-        session["moves"].append(moved_tile)
-    return show_step()
+        yield "❌ No solution found", None, session
+        return
+    use_solution(session, path, stats, w, stats.get("bound", 1))
+    yield show_step(session) + (session,)
+
+def anytime_solve(start, w, seconds, nodes, session):
+    width = board_width(start)
+    stats, budget, shown = {}, Budget(seconds, nodes), 0.0
+    steps = ara_star_steps(start, width, load_default(width), w, stats=stats)
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as done:
+            path, stats = remember_solution(start, done.value, stats)  # optimal
+            use_solution(session, path, stats, 1, 1)
+            yield show_step(session) + (session,)
+            return
+        if "path" in progress:
+            use_solution(session, tuple(progress["path"]), dict(stats), progress["w"], progress["bound"], frames=False)
+            info, image = show_step(session)
+            yield f"🔁 Improving: {progress_line(progress, budget)}\n\n{info}", image, session
+        if budget.exceeded(progress["expanded"]):
+            steps.close()
+            session["stats"] = stats
+            if not session["solution"]:
+                yield f"⏹️ Stopped by the {budget.reason}: {progress_line(progress, budget)}", None, session
+                return
+            info, image = show_step(session)
+            yield f"⏹️ Stopped by the {budget.reason}, keeping the best solution so far\n\n{info}", image, session
+            return
+        if budget.elapsed - shown >= STREAM_INTERVAL:
+            shown = budget.elapsed
+            if not session["solution"]:
+                yield f"⏳ Searching: {progress_line(progress, budget)}", None, session
+
+def stop_solve(session):
+    if session["solution"] and session["bound"] > 1:  # an anytime solution so far
+        info, image = show_step(session)
+        return f"⏹️ Search stopped, keeping the best solution so far\n\n{info}", image
+    return "⏹️ Search stopped", None
+
+# How good the solution shown is
+def quality_line(session):
+    if session["w"] == 1:
+        return "Optimal solution."
+    if session["bound"] <= 1:
+        return f"Weighted search (w = {session['w']:g}), proven optimal."
+    return (f"Weighted search (w = {session['w']:g}): at most **{session['bound']:.3f} ×** the optimal "
+            f"length (≥ {(len(session['solution']) - 1) / session['bound']:.1f} moves).")
 
 # Show step
-def show_step(step_idx=None):
+def show_step(session, step_idx=None):
     if not session["solution"]:
         return "⚠️ Solve first", None
     if step_idx is not None:
@@ -176,6 +372,8 @@ def show_step(step_idx=None):
     g_val = step
     h_val, h_details = manhattan_details(state)
     f_val = g_val + h_val
+    h_star = exact_cost(state)
+    exact_line = "" if h_star is None else f"- h*(n) = exact moves left = {h_star} (Manhattan underestimates by {h_star - h_val})  \n"
     move_desc = "Starting state"
     highlight_tile = None
     explanation = ""
@@ -185,12 +383,15 @@ def show_step(step_idx=None):
         move_desc = f"Tile **{moved_tile}** moved"
         highlight_tile = moved_tile
         prev_state = session["solution"][step-1]
-        explanation = neighbor_choices_explanation(prev_state, state, g_val-1)
+        explanation = neighbor_choices_explanation(prev_state, state, g_val-1, session["w"])
 
     info = f"""
 ### Step {step}/{len(session['solution'])-1}
 {move_desc}
 
+Search: {summary(session.get("stats", {}))}
+{quality_line(session)}
+
 **g = {g_val}, h = {h_val}, f = {f_val}**
 
 A* uses f(n) = g(n) + h(n).  
@@ -198,26 +399,29 @@ Here:
 - g(n) = steps taken so far = {g_val}  
 - h(n) = Manhattan distance = {h_val}  
 - f(n) = {g_val} + {h_val} = {f_val}  
-
+{exact_line}
 **Manhattan calculation:**
 
 """ + "\n".join(h_details) + "\n\n" + explanation
 
+    frames = session.get("frames")
+    if frames:
+        return info, png_image(frames[step])
     return info, plot_puzzle(state, highlight_tile)
 
 # Step controls
-def step_forward():
+def step_forward(session):
     if session["step"] < len(session["solution"])-1:
         session["step"] += 1
-    return show_step()
+    return show_step(session) + (session,)
 
-def step_back():
+def step_back(session):
     if session["step"] > 0:
         session["step"] -= 1
-    return show_step()
+    return show_step(session) + (session,)
 
 # Full solution
-def show_full_solution():
+def show_full_solution(session):
     if not session["solution"]:
         return "⚠️ Solve first", None
     md = ""
@@ -231,29 +435,50 @@ def show_full_solution():
             move_desc = f"Tile {session['moves'][idx-1]} moved"
         md += f"### Step {idx}\n{move_desc}\n**g={g_val}, h={h_val}, f={f_val}**\n"
         md += "\n".join(h_details) + "\n"
-        grid = "\n".join(["| "+" | ".join(str(state[r*3+c]) for c in range(3))+" |" for r in range(3)])
+        w = width_of(state)
+        grid = "\n".join(["| "+" | ".join(str(state[r*w+c]) for c in range(w))+" |" for r in range(w)])
         md += grid + "\n\n"
     md += f"✅ **Total steps: {len(session['solution'])-1}**"
     return md, None
 
-# Gradio UI
-with gr.Blocks() as demo:
-    gr.Markdown("## 8-Puzzle Solver with A* (Manhattan Distance)\nEnter a start state as 9 numbers (0 = blank). Example: `7 2 4 5 0 6 8 3 1`")
-
-    start_input = gr.Textbox(label="Start State")
-    solve_btn = gr.Button("Solve Puzzle")
-
-    with gr.Row():
-        btn_back = gr.Button("⬅️ Back")
-        btn_next = gr.Button("➡️ Next Step")
-        btn_full = gr.Button("Show Full Solution")
-
-    output_text = gr.Markdown()
-    output_plot = gr.Plot()
-
-    solve_btn.click(solve_puzzle, start_input, [output_text, output_plot])
-    btn_next.click(step_forward, None, [output_text, output_plot])
-    btn_back.click(step_back, None, [output_text, output_plot])
-    btn_full.click(show_full_solution, None, [output_text, output_plot])
-
-demo.launch()
+# Gradio UI (only built when run as a script; importing this file has no side effects)
+def build_demo():
+    import gradio as gr
+    with gr.Blocks() as demo:
+        gr.Markdown("## Sliding Puzzle Solver (exact distance table, IDA*, weighted A*)\nEnter a start state as 9 numbers (0 = blank). Example: `7 2 4 5 0 6 8 3 1`\n\n8-puzzles are solved optimally from the exact distance table; 16 numbers (15-puzzle) or 25 numbers (24-puzzle) with IDA*. Weighted A* and ARA* trade optimality for speed. h shown: Manhattan distance.")
+
+        start_input = gr.Textbox(label="Start State")
+        with gr.Row():
+            mode = gr.Radio(list(SOLVE_MODES), value="Optimal", label="Mode")
+            weight = gr.Slider(1, 5, value=ARA_WEIGHT, step=0.25, label="Weight w (f = g + w·h)")
+        with gr.Row():
+            time_budget = gr.Number(TIME_BUDGET, label="Time budget (s, 0 = none)")
+            node_budget = gr.Number(NODE_BUDGET, label="Node budget (expansions, 0 = none)", precision=0)
+        with gr.Row():
+            solve_btn = gr.Button("Solve Puzzle")
+            stop_btn = gr.Button("⏹️ Stop")
+
+        with gr.Row():
+            btn_back = gr.Button("⬅️ Back")
+            btn_next = gr.Button("➡️ Next Step")
+            btn_full = gr.Button("Show Full Solution")
+
+        output_text = gr.Markdown()
+        output_plot = gr.Image(type="pil", show_label=False)
+        session_state = gr.State(new_session())
+
+        solving = solve_btn.click(solve_puzzle, [start_input, mode, weight, time_budget, node_budget, session_state],
+                                  [output_text, output_plot, session_state])
+        stop_btn.click(stop_solve, session_state, [output_text, output_plot], cancels=[solving])
+        btn_next.click(step_forward, session_state, [output_text, output_plot, session_state])
+        btn_back.click(step_back, session_state, [output_text, output_plot, session_state])
+        btn_full.click(show_full_solution, session_state, [output_text, output_plot])
+    return demo
+
+# Handlers keep no global state and rendering is locked, so they can run in parallel
+CONCURRENCY = 8
+
+if __name__ == "__main__":
+    demo = build_demo()
+    demo.queue(default_concurrency_limit=CONCURRENCY)
+    demo.launch()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+from SlidingPuzzle import ALGORITHMS, board_width, is_solvable, parse_state, solve
+
+# -------------------------
+# Headless batch solver
+# -------------------------
+# Reads one start state per line (same format as the 8Puzzle.py textbox; blank
+# lines and lines starting with # are skipped) from a file or stdin, solves them
+# on a process pool and streams one JSON object per instance as results come in:
+#
+#   {"index": 0, "start": [...], "solvable": true, "length": 22,
+#    "path": [[...], ...], "expanded": 1234, "time": 0.0123, "algorithm": "auto",
+#    "stats": {"generated": ..., "expanded": 1234, ..., "time": {"search": ...}}}
+#
+# "stats" holds the SearchStats counters of the solve (see SearchStats.py).
+# With --weight w > 1 the solves run weighted A* (lengths at most w times the
+# optimum); records then also carry "weight" and stats "bound".
+# Invalid lines, and lines the chosen algorithm cannot solve, get an "error"
+# field instead. Records are written in completion
+# order; "index" is the 0-based position of the line among the non-skipped ones.
+# Lines are sent to workers in chunks and only a fixed number of chunks is in
+# flight at a time, so memory stays bounded no matter how large the input is.
+#
+#   python BatchSolve.py starts.txt -o solved.jsonl --workers 8
+
+def solve_one(index, line, algorithm, w=1):
+    record = {"index": index}
+    try:
+        start = parse_state(line)
+        board_width(start)
+    except ValueError as e:
+        record["error"] = str(e)
+        record["input"] = line
+        return record
+    record["start"] = list(start)
+    record["algorithm"] = algorithm
+    if w != 1:
+        record["weight"] = w
+    if not is_solvable(start):
+        record.update(solvable=False, length=None, path=None, expanded=0, time=0.0)
+        return record
+    stats = {}
+    t0 = time.perf_counter()
+    try:
+        path = solve(start, algorithm, stats, w)
+    except ValueError as e:  # e.g. the distance table asked for a 15-puzzle
+        return {"index": index, "error": str(e), "input": line}
+    elapsed = time.perf_counter() - t0
+    record.update(solvable=True, length=len(path) - 1, path=[list(s) for s in path],
+                  expanded=stats.get("expanded"), time=round(elapsed, 6), stats=stats)
+    return record
+
+# Runs in the worker: returns finished JSON lines so the parent only writes them
+def solve_chunk(chunk, algorithm, w=1):
+    return [json.dumps(solve_one(index, line, algorithm, w)) for index, line in chunk]
+
+def read_starts(stream):
+    index = 0
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        yield index, line
+        index += 1
+
+def chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+def run(lines, out, algorithm="auto", workers=None, chunk_size=32, max_pending=None, w=1):
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in chunks(lines, chunk_size):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                written += _write(done, out)
+            pending.add(pool.submit(solve_chunk, chunk, algorithm, w))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            written += _write(done, out)
+    return written
+
+def _write(done, out):
+    count = 0
+    for future in done:
+        for line in future.result():
+            out.write(line + "\n")
+            count += 1
+    out.flush()
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve sliding puzzles in bulk, one JSONL record per start state")
+    parser.add_argument("input", nargs="?", default="-", help="file with one start state per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("-a", "--algorithm", choices=ALGORITHMS, default="auto")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="start states per task")
+    parser.add_argument("-w", "--weight", type=float, default=1, help="weighted A* with f = g + w*h (default: 1, optimal)")
+    args = parser.parse_args(argv)
+    if args.weight < 1:
+        parser.error(f"--weight must be at least 1, got {args.weight:g}")
+    if args.weight != 1 and args.algorithm not in ("auto", "astar"):
+        parser.error(f"--weight only applies to astar, not {args.algorithm}")
+
+    src = sys.stdin if args.input == "-" else open(args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        t0 = time.perf_counter()
+        count = run(read_starts(src), out, args.algorithm, args.workers, args.chunk_size, w=args.weight)
+        print(f"solved {count} instances in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
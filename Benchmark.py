@@ -0,0 +1,326 @@
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from random import Random
+
+# -------------------------
+# Benchmark suite
+# -------------------------
+# Every solver on seeded workloads:
+#   puzzle   A*, IDA* and the distance table on random solvable 8-puzzles,
+#            bucketed by optimal depth
+#   route    GBFS, A*, RBFS, SMA* and CH queries on random start/goal pairs of
+#            the Romania map, and GBFS, A* and CH on synthetic grid and random
+#            geometric graphs of growing size
+#   gbfs     greedy_best_first_search from GreedyBestFirstSearch.py
+#
+# Each (suite, group, algorithm) runs in a fresh process, so its peak RSS is its
+# own. The timed pass runs without tracing; a second, shorter pass under
+# tracemalloc records the peak bytes allocated per run. Results are written as
+# one JSON document; `compare` lines two of them up.
+#
+#   python Benchmark.py run -o bench.json
+#   python Benchmark.py run --suites route --sizes 1000 4000 -o routes.json
+#   python Benchmark.py compare before.json after.json
+
+SUITES = ("puzzle", "route", "gbfs")
+DEPTH_BUCKETS = ((0, 9), (10, 14), (15, 19), (20, 24), (25, 31))
+GRAPH_SIZES = (500, 2000, 8000)
+ALLOC_RUNS = 3  # runs repeated under tracemalloc per group
+
+# -------------------------
+# Workloads (rebuilt from the seed inside each worker)
+# -------------------------
+# Random walks from the goal, kept when the optimal depth (exact, from the
+# distance table) falls in the bucket
+def puzzle_instances(rng, low, high, count):
+    import DistanceTable
+    from SlidingPuzzle import get_board
+    board = get_board(3)
+    instances, seen = [], set()
+    while len(instances) < count:
+        state, blank = list(board.goal), 0
+        for _ in range(rng.randrange(2 * high + 1)):
+            j = rng.choice(board.moves[blank])
+            state[blank], state[j] = state[j], state[blank]
+            blank = j
+        state = tuple(state)
+        if state not in seen and low <= DistanceTable.distance(state) <= high:
+            seen.add(state)
+            instances.append(state)
+    return instances
+
+# width x width grid, 100 units between neighbors, costs 100-150 per step
+def grid_graph(size, rng):
+    from RoadNetwork import from_arcs
+    width = max(2, math.isqrt(size))
+    sources, targets, weights, coords = [], [], [], []
+    for r in range(width):
+        for c in range(width):
+            coords += [c * 100.0, r * 100.0]
+            for rr, cc in ((r, c + 1), (r + 1, c)):
+                if rr < width and cc < width:
+                    w = rng.randint(100, 150)
+                    u, v = r * width + c, rr * width + cc
+                    sources += [u, v]; targets += [v, u]; weights += [w, w]
+    return from_arcs(width * width, sources, targets, weights, array("d", coords))
+
+# Points in a 10000 x 10000 square, each linked to its 3 nearest neighbors,
+# costs 1-1.3x the straight-line distance
+def geometric_graph(size, rng):
+    from RoadNetwork import from_arcs
+    points = [(rng.random() * 10000, rng.random() * 10000) for _ in range(size)]
+    cells, cell = {}, 10000 / max(1, math.isqrt(size // 2))
+    for i, (x, y) in enumerate(points):
+        cells.setdefault((int(x // cell), int(y // cell)), []).append(i)
+    edges = {}
+    for i, (x, y) in enumerate(points):
+        cx, cy = int(x // cell), int(y // cell)
+        near = [j for dx in (-1, 0, 1) for dy in (-1, 0, 1) for j in cells.get((cx + dx, cy + dy), ()) if j != i]
+        for d, j in sorted((math.dist(points[i], points[j]), j) for j in near)[:3]:
+            edges.setdefault((min(i, j), max(i, j)), int(d * rng.uniform(1, 1.3)) + 1)
+    sources, targets, weights = [], [], []
+    for (u, v), w in edges.items():
+        sources += [u, v]; targets += [v, u]; weights += [w, w]
+    coords = array("d", (c for p in points for c in p))
+    return from_arcs(size, sources, targets, weights, coords)
+
+def largest_component(graph):
+    best, seen = [], set()
+    for s in graph:
+        if s in seen:
+            continue
+        seen.add(s)
+        component, stack = [s], [s]
+        while stack:
+            for v in graph[stack.pop()]:
+                if v not in seen:
+                    seen.add(v)
+                    component.append(v)
+                    stack.append(v)
+        if len(component) > len(best):
+            best = component
+    return best
+
+def route_pairs(rng, nodes, count):
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+# -------------------------
+# Solvers: each returns a run(instance) -> nodes expanded
+# -------------------------
+def puzzle_solver(algorithm):
+    from SlidingPuzzle import astar, ida_star
+    import DistanceTable
+
+    def run(state):
+        stats = {}
+        if algorithm == "table":
+            DistanceTable.optimal_path(state)
+            return None
+        (astar if algorithm == "astar" else ida_star)(state, 3, None, stats)
+        return stats["expanded"]
+    if algorithm == "table":
+        DistanceTable.load()
+    return run
+
+def route_solver(algorithm, graph=None):
+    import RouteSearch
+    graph = RouteSearch.ROMANIA if graph is None else graph
+    if algorithm == "CH":
+        import ContractionHierarchy
+        ch = RouteSearch.romania_ch() if graph is RouteSearch.ROMANIA else ContractionHierarchy.build(graph)
+
+        def run(pair):
+            stats = {}
+            ch.query(*pair, stats)
+            return stats["settled"]
+        return run
+    trace = {"GBFS": RouteSearch.gbfs_trace, "A*": RouteSearch.astar_trace,
+             "RBFS": RouteSearch.rbfs_trace, "SMA*": RouteSearch.sma_trace}[algorithm]
+
+    def run(pair):
+        stats = {}
+        trace(*pair, graph=graph, stats=stats)
+        return stats["expanded"]
+    return run
+
+def gbfs_script_solver():
+    from GreedyBestFirstSearch import greedy_best_first_search
+
+    def run(start):
+        stats = {}
+        greedy_best_first_search(start, "Bucharest", stats=stats)
+        return stats["expanded"]
+    return run
+
+# -------------------------
+# One group, in a worker process
+# -------------------------
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+def peak_rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KB on Linux
+
+def prepare(spec):
+    rng = Random(f"{spec['seed']}:{spec['suite']}:{spec['group']}")
+    count = spec["count"]
+    if spec["suite"] == "puzzle":
+        low, high = map(int, spec["group"].split("-"))
+        return puzzle_solver(spec["algorithm"]), puzzle_instances(rng, low, high, count)
+    if spec["suite"] == "gbfs":
+        from GreedyBestFirstSearch import graph
+        return gbfs_script_solver(), [rng.choice(sorted(graph)) for _ in range(count)]
+    if spec["group"] == "romania":
+        import RouteSearch
+        return route_solver(spec["algorithm"]), route_pairs(rng, sorted(RouteSearch.ROMANIA), count)
+    kind, size = spec["group"].rsplit("-", 1)
+    graph = (grid_graph if kind == "grid" else geometric_graph)(int(size), rng)
+    return route_solver(spec["algorithm"], graph), route_pairs(rng, largest_component(graph), count)
+
+def run_group(spec):
+    t0 = time.perf_counter()
+    solver, instances = prepare(spec)
+    preprocess = time.perf_counter() - t0
+    rss_before = peak_rss_kb()
+
+    times, expanded = [], []
+    for instance in instances:
+        t0 = time.perf_counter()
+        n = solver(instance)
+        times.append(time.perf_counter() - t0)
+        expanded.append(n)
+    rss_after = peak_rss_kb()
+
+    peaks = []
+    for instance in instances[:ALLOC_RUNS]:
+        tracemalloc.start()
+        solver(instance)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    times_sorted = sorted(times)
+    total_time = sum(times)
+    known = [n for n in expanded if n is not None]
+    result = dict(spec)
+    result.update(
+        runs=len(times),
+        preprocess_s=round(preprocess, 6),
+        expanded_total=sum(known) if known else None,
+        nodes_per_s=round(sum(known) / total_time, 1) if known and total_time else None,
+        time_s={"mean": total_time / len(times) if times else None,
+                "p50": percentile(times_sorted, 50), "p90": percentile(times_sorted, 90),
+                "p99": percentile(times_sorted, 99), "max": times_sorted[-1] if times else None,
+                "total": total_time},
+        peak_rss_kb=rss_after,
+        rss_growth_kb=rss_after - rss_before,
+        alloc_peak_bytes={"mean": sum(peaks) / len(peaks) if peaks else None,
+                          "max": max(peaks, default=None)},
+    )
+    return result
+
+# -------------------------
+# Suite driver
+# -------------------------
+def group_specs(suites, seed, count, sizes):
+    specs = []
+    add = lambda suite, group, algorithm: specs.append(
+        {"suite": suite, "group": group, "algorithm": algorithm, "seed": seed, "count": count})
+    if "puzzle" in suites:
+        for low, high in DEPTH_BUCKETS:
+            for algorithm in ("astar", "ida", "table"):
+                add("puzzle", f"{low}-{high}", algorithm)
+    if "route" in suites:
+        for algorithm in ("GBFS", "A*", "RBFS", "SMA*", "CH"):
+            add("route", "romania", algorithm)
+        for kind in ("grid", "geometric"):
+            for size in sizes:
+                for algorithm in ("GBFS", "A*", "CH"):
+                    add("route", f"{kind}-{size}", algorithm)
+    if "gbfs" in suites:
+        add("gbfs", "romania", "greedy_best_first_search")
+    return specs
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def run(suites=SUITES, seed=0, count=10, sizes=GRAPH_SIZES, log=None):
+    results = []
+    # one fresh (spawned) process per group: clean heap, own peak RSS
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn"), max_tasks_per_child=1) as pool:
+        for spec in group_specs(suites, seed, count, sizes):
+            result = pool.submit(run_group, spec).result()
+            results.append(result)
+            if log:
+                log(format_result(result))
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": git_commit(),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "seed": seed, "count": count, "sizes": list(sizes), "results": results}
+
+def format_result(r):
+    rate = f"{r['nodes_per_s']:>11,.0f}/s" if r["nodes_per_s"] is not None else " " * 13
+    t = r["time_s"]
+    return (f"{r['suite']:6s} {r['group']:15s} {r['algorithm']:24s} {rate}  "
+            f"p50 {t['p50'] * 1000:9.3f}ms  p90 {t['p90'] * 1000:9.3f}ms  "
+            f"rss {r['peak_rss_kb'] / 1024:6.1f}MB  alloc {r['alloc_peak_bytes']['max'] / 1024:9.1f}KB")
+
+# Ratios new / old per group: time p50 (lower is better), nodes/s (higher is better)
+def compare(old, new, log=print):
+    key = lambda r: (r["suite"], r["group"], r["algorithm"])
+    before = {key(r): r for r in old["results"]}
+    for r in new["results"]:
+        o = before.get(key(r))
+        if o is None:
+            continue
+        p50 = r["time_s"]["p50"] / o["time_s"]["p50"] if o["time_s"]["p50"] else math.nan
+        rate = (r["nodes_per_s"] / o["nodes_per_s"]) if r["nodes_per_s"] and o["nodes_per_s"] else math.nan
+        log(f"{r['suite']:6s} {r['group']:15s} {r['algorithm']:24s} p50 x{p50:6.2f}  nodes/s x{rate:6.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every solver on seeded workloads")
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run", help="run the suites and write a JSON report")
+    r.add_argument("-o", "--output", default="-", help="JSON report (default: stdout)")
+    r.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES)
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--count", type=int, default=10, help="instances per group")
+    r.add_argument("--sizes", nargs="+", type=int, default=GRAPH_SIZES, help="synthetic graph sizes (nodes)")
+    c = sub.add_parser("compare", help="compare two JSON reports")
+    c.add_argument("old")
+    c.add_argument("new")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        with open(args.old) as fo, open(args.new) as fn:
+            compare(json.load(fo), json.load(fn))
+        return
+    log = lambda msg: print(msg, file=sys.stderr)
+    report = run(args.suites, args.seed, args.count, args.sizes, log)
+    text = json.dumps(report, indent=1)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
@@ -1,208 +1,388 @@
-import gradio as gr
-import matplotlib.pyplot as plt
-
-# Romania graph
-graph = {
-    "Arad": {"Zerind": 75, "Sibiu": 140, "Timisoara": 118},
-    "Zerind": {"Arad": 75, "Oradea": 71},
-    "Oradea": {"Zerind": 71, "Sibiu": 151},
-    "Sibiu": {"Arad": 140, "Oradea": 151, "Fagaras": 99, "Rimnicu Vilcea": 80},
-    "Fagaras": {"Sibiu": 99, "Bucharest": 211},
-    "Rimnicu Vilcea": {"Sibiu": 80, "Pitesti": 97, "Craiova": 146},
-    "Pitesti": {"Rimnicu Vilcea": 97, "Craiova": 138, "Bucharest": 101},
-    "Timisoara": {"Arad": 118, "Lugoj": 111},
-    "Lugoj": {"Timisoara": 111, "Mehadia": 70},
-    "Mehadia": {"Lugoj": 70, "Drobeta": 75},
-    "Drobeta": {"Mehadia": 75, "Craiova": 120},
-    "Craiova": {"Drobeta": 120, "Pitesti": 138, "Rimnicu Vilcea": 146},
-    "Bucharest": {"Fagaras": 211, "Pitesti": 101, "Giurgiu": 90, "Urziceni": 85},
-    "Urziceni": {"Bucharest": 85, "Hirsova": 98, "Vaslui": 142},
-    "Hirsova": {"Urziceni": 98, "Eforie": 86},
-    "Eforie": {"Hirsova": 86},
-    "Vaslui": {"Urziceni": 142, "Iasi": 92},
-    "Iasi": {"Vaslui": 92, "Neamt": 87},
-    "Neamt": {"Iasi": 87},
-    "Giurgiu": {"Bucharest": 90},
-}
-
-# Heuristic (SLD to Bucharest)
-hSLD = {
-    "Arad": 366, "Bucharest": 0, "Craiova": 160, "Drobeta": 242, "Eforie": 161,
-    "Fagaras": 176, "Giurgiu": 77, "Hirsova": 151, "Iasi": 226, "Lugoj": 244,
-    "Mehadia": 241, "Neamt": 234, "Oradea": 380, "Pitesti": 100,
-    "Rimnicu Vilcea": 193, "Sibiu": 253, "Timisoara": 329,
-    "Urziceni": 80, "Vaslui": 199, "Zerind": 374
-}
-
-positions = {
-    "Arad": (1, 3), "Zerind": (0, 4), "Oradea": (0.5, 5), "Sibiu": (2, 4),
-    "Fagaras": (3, 5), "Rimnicu Vilcea": (3, 3), "Pitesti": (4, 2.5),
-    "Timisoara": (0, 2), "Lugoj": (1, 1.5), "Mehadia": (2, 1),
-    "Drobeta": (2.5, 0.5), "Craiova": (3.5, 1.5), "Bucharest": (5, 2),
-    "Urziceni": (6, 2.5), "Hirsova": (7, 3), "Eforie": (8, 2.5),
-    "Vaslui": (6, 4), "Iasi": (6.5, 5), "Neamt": (6.5, 6), "Giurgiu": (5, 1)
-}
-
-# Helpers
-def reconstruct(parent, node):
-    path = []
-    while node:
-        path.insert(0, node)
-        node = parent.get(node)
-    return path
-
-def path_cost(path):
-    return sum(graph[path[i]][path[i+1]] for i in range(len(path)-1))
-
-# GBFS
-def gbfs_trace(start, goal):
-    trace = []
-    frontier = [{"name": start, "h": hSLD[start]}]
-    expanded, parent = set(), {}
-    while frontier:
-        frontier.sort(key=lambda x: x["h"])
-        node = frontier.pop(0)
-        if node["name"] in expanded: continue
-        expanded.add(node["name"])
-        path = reconstruct(parent, node["name"])
-        snap_frontier = sorted(frontier, key=lambda x: x["h"])
-        trace.append({"current": node, "frontier": snap_frontier, "expanded": expanded.copy(),
-                      "path": path, "goal": goal, "algo": "GBFS"})
-        if node["name"]==goal: return trace
-        for nbr in graph[node["name"]]:
-            if nbr not in expanded:
-                parent[nbr] = node["name"]
-                frontier.append({"name": nbr, "h": hSLD[nbr]})
-    return trace
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from RouteSearch import (ARA_WEIGHT, INF, SMA_MEMORY, ara_steps, astar_steps, ch_steps, gbfs_steps, graph,
+                         heuristic_for, lpa_planner, positions, rbfs_steps, sma_steps)
+from SearchStats import Budget, drain, summary
+from TraceStore import TraceStore
 
-# A*
-def astar_trace(start, goal):
-    trace = []
-    frontier = [{"name": start, "g": 0, "h": hSLD[start], "f": hSLD[start]}]
-    expanded, parent, g = set(), {}, {start:0}
-    while frontier:
-        frontier.sort(key=lambda x: x["f"])
-        node = frontier.pop(0)
-        if node["name"] in expanded: continue
-        expanded.add(node["name"])
-        path = reconstruct(parent, node["name"])
-        snap_frontier = sorted(frontier, key=lambda x: x["f"])
-        trace.append({"current": node, "frontier": snap_frontier, "expanded": expanded.copy(),
-                      "path": path, "goal": goal, "algo": "A*"})
-        if node["name"]==goal: return trace
-        for nbr, cost in graph[node["name"]].items():
-            new_g = g[node["name"]] + cost
-            if nbr not in g or new_g<g[nbr]:
-                g[nbr]=new_g
-                parent[nbr]=node["name"]
-                frontier.append({"name": nbr, "g": new_g, "h": hSLD[nbr], "f": new_g+hSLD[nbr]})
-    return trace
+# Map plot
+# The background (roads, road costs) is drawn once per graph and kept as a
+# bitmap. A step restores that bitmap and draws only the per-step artists on top
+# (node colors, highlighted path, city labels, g/h/f values), which are created
+# once and updated in place. One plain matplotlib Figure is reused (no pyplot),
+# so nothing accumulates between steps; the lock serializes concurrent handlers.
+# Matplotlib is only imported when the first map is drawn.
+class MapRenderer:
+    def __init__(self, graph, positions, heuristic_for):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+        self.names = list(positions)
+        self.positions, self.heuristic_for = positions, heuristic_for
+        self.fig = Figure(figsize=(12,9), dpi=80)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.subplots()
+        for a in graph:
+            for b, cost in graph[a].items():
+                if a<b:
+                    x1,y1 = positions[a]; x2,y2 = positions[b]
+                    ax.plot([x1,x2],[y1,y2], 'k-', alpha=0.3)
+                    ax.text((x1+x2)/2,(y1+y2)/2,str(cost),fontsize=8,color='gray')
+        self.path_lines = ax.add_collection(LineCollection([], colors='g', linewidths=3, animated=True))
+        xs = [positions[n][0] for n in self.names]; ys = [positions[n][1] for n in self.names]
+        self.nodes = ax.scatter(xs, ys, s=2500, c='white', edgecolors='black', zorder=3, animated=True)
+        # Labels sit partly over the node circles, so they are drawn after them
+        self.labels = [ax.text(x,y+0.3,n,ha='center',fontsize=10,weight='bold',zorder=4,animated=True)
+                       for n,x,y in zip(self.names, xs, ys)]
+        text = lambda x, y: ax.text(x,y,'',ha='center',fontsize=8,zorder=4,animated=True)
+        self.g_texts = [text(x,y+0.1) for x,y in zip(xs,ys)]
+        self.h_texts = [text(x,y-0.1) for x,y in zip(xs,ys)]
+        self.f_texts = [text(x,y-0.3) for x,y in zip(xs,ys)]
+        self.h_only = [text(x,y-0.05) for x,y in zip(xs,ys)]
+        ax.set_axis_off()
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.lock = threading.Lock()
 
-# RBFS simplified like GBFS for visualization
-def rbfs_trace(start, goal):
-    return gbfs_trace(start, goal)
+    def render(self, state):
+        from PIL import Image
+        frontier = {f['name']: f for f in state['frontier']}
+        heuristic = self.heuristic_for(state['goal'])
+        current = state['current']
+        path, expanded = state['path'], state['expanded']
+        show_gf = state.get("algo")!="GBFS"
+        # LPA* repairs after a road change: the re-expanded cities stand out
+        expanded_color = 'plum' if state.get("plan", 1) > 1 else 'lightgray'
+        colors, labels = [], []
+        for n in self.names:
+            color='white'
+            if n in expanded: color=expanded_color
+            if n in frontier: color='orange'
+            if n in path: color='limegreen'
+            if n==current['name']: color='dodgerblue'
+            colors.append(color)
+            # Values
+            g_val = f_val = None
+            h_val = heuristic[n]
+            if n==current['name']:
+                g_val = current.get('g')
+                f_val = current.get('f')
+            elif n in frontier:
+                g_val = frontier[n].get('g')
+                f_val = frontier[n].get('f')
+                h_val = frontier[n].get('h',h_val)
+            full = g_val is not None and show_gf
+            labels.append((f"g={g_val}", f"h={h_val}", f"f={f_val}", full))
+        pos = self.positions
+        segments = [[pos[a], pos[b]] for a, b in zip(path, path[1:])]
+
+        # The artists are shared by all renders: set them only under the lock
+        with self.lock:
+            self.nodes.set_facecolors(colors)
+            self.path_lines.set_segments(segments)
+            for i, (g_text, h_text, f_text, full) in enumerate(labels):
+                self.g_texts[i].set_text(g_text); self.g_texts[i].set_visible(full)
+                self.h_texts[i].set_text(h_text); self.h_texts[i].set_visible(full)
+                self.f_texts[i].set_text(f_text); self.f_texts[i].set_visible(full)
+                self.h_only[i].set_text(h_text); self.h_only[i].set_visible(not full)
+            self.canvas.restore_region(self.background)
+            for artist in [self.path_lines, self.nodes, *self.labels,
+                           *self.g_texts, *self.h_texts, *self.f_texts, *self.h_only]:
+                self.ax.draw_artist(artist)
+            width, height = self.canvas.get_width_height()
+            image = Image.frombuffer("RGBA", (width, height), self.canvas.buffer_rgba(), "raw", "RGBA", 0, 1)
+            buf = io.BytesIO()
+            image.convert("RGB").save(buf, format="PNG")
+            return buf.getvalue()
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_renderer():
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = MapRenderer(graph, positions, heuristic_for)
+        return _renderer
+
+def png_image(png):
+    from PIL import Image
+    return Image.open(io.BytesIO(png))
 
-# Map plot
 def plot_map(state):
-    fig, ax = plt.subplots(figsize=(12,9))
-    for a in graph:
-        for b, cost in graph[a].items():
-            if a<b:
-                x1,y1 = positions[a]; x2,y2 = positions[b]
-                ax.plot([x1,x2],[y1,y2], 'k-', alpha=0.3)
-                ax.text((x1+x2)/2,(y1+y2)/2,str(cost),fontsize=8,color='gray')
-    if len(state['path'])>1:
-        for i in range(len(state['path'])-1):
-            x1,y1=positions[state['path'][i]]; x2,y2=positions[state['path'][i+1]]
-            ax.plot([x1,x2],[y1,y2],'g-',linewidth=3)
-    for n,(x,y) in positions.items():
-        color='white'
-        if n in state['expanded']: color='lightgray'
-        if n in [f['name'] for f in state['frontier']]: color='orange'
-        if n in state['path']: color='limegreen'
-        if n==state['current']['name']: color='dodgerblue'
-        ax.scatter(x,y,s=2500,c=color,edgecolors='black',zorder=3)
-        ax.text(x,y+0.3,n,ha='center',fontsize=10,weight='bold')
-        # Values
-        algo = state.get("algo")
-        g_val = h_val = f_val = None
-        h_val = hSLD[n]
-        if n==state['current']['name']:
-            g_val = state['current'].get('g')
-            f_val = state['current'].get('f')
+    return png_image(get_renderer().render(state))
+
+def trace_steps(algo, start, goal, memory=SMA_MEMORY, w=1):
+    if algo=="GBFS": return gbfs_steps(start, goal)
+    if algo=="A*": return astar_steps(start, goal)
+    if algo=="WA*": return astar_steps(start, goal, w=w)
+    if algo=="ARA*": return ara_steps(start, goal, w=w)
+    if algo=="SMA*": return sma_steps(start, goal, memory)
+    if algo=="CH": return ch_steps(start, goal)
+    if algo=="LPA*": return lpa_planner(start, goal).replan_steps()
+    return rbfs_steps(start, goal)
+
+# Finished traces (delta-encoded TraceStores, steps rebuilt on demand) shared
+# by all users, keyed by (algorithm, start, goal, SMA* memory, weight), least recently
+# used dropped first. A streamed search adds its trace once it completes;
+# stopped searches are not kept.
+TRACE_CACHE_SIZE = 256
+_traces = OrderedDict()
+_traces_lock = threading.Lock()
+
+def lookup_trace(query):
+    with _traces_lock:
+        trace = _traces.get(query)
+        if trace is not None: _traces.move_to_end(query)
+        return trace
+
+def remember_trace(query, trace):
+    with _traces_lock:
+        _traces[query] = trace
+        _traces.move_to_end(query)
+        if len(_traces) > TRACE_CACHE_SIZE: _traces.popitem(last=False)
+    return trace
+
+def cached_trace(algo, start, goal, memory=SMA_MEMORY, w=1):
+    query = (algo, start, goal, memory, w)
+    trace = lookup_trace(query)
+    return trace if trace is not None else remember_trace(query, TraceStore.record(trace_steps(*query)))
+
+# Rendered map frames, memoized by (algorithm, start, goal, SMA* memory, weight, step)
+FRAME_CACHE_SIZE = 512
+
+@lru_cache(maxsize=FRAME_CACHE_SIZE)
+def step_frame(algo, start, goal, memory, w, step):
+    return get_renderer().render(cached_trace(algo, start, goal, memory, w)[step])
+
+# Session (one per browser session, kept in a gr.State). "query" is set once
+# the trace is complete (frames are then cached); "status" is the progress or
+# stop message shown above the step. "planner" is the session's LPA* planner,
+# with its own road costs; "costs" are the changed roads ((a, b) -> cost) the
+# trace was planned with.
+def new_session():
+    return {"trace":[],"step":0,"query":None,"status":"","planner":None,"costs":{}}
+
+# Streaming search: the handler is a generator that runs the search step by
+# step and refreshes the page every STREAM_INTERVAL seconds, so the first steps
+# show up while a long search is still running. It stops at the time / node
+# (expansion) budget; the Stop button cancels the event, which closes the
+# handler and the search generator with it. 0 means no budget.
+STREAM_INTERVAL = 0.25
+TIME_BUDGET = 30
+NODE_BUDGET = 100000
+
+def start_search(start, goal, algo, memory, weight, seconds, nodes, session):
+    memory = int(memory) if algo=="SMA*" else SMA_MEMORY  # only SMA* uses the budget
+    weight = float(weight) if algo in ("WA*", "ARA*") else 1  # and only WA* / ARA* the weight
+    query = (algo, start, goal, memory, weight)
+    session.update(trace=TraceStore(), step=0, query=None, status="", planner=None, costs={})
+    # LPA* keeps its planner for later road changes, so its trace is not shared
+    trace = lookup_trace(query) if algo!="LPA*" else None
+    if trace is None:
+        budget, shown = Budget(seconds, nodes), 0.0
+        if algo=="LPA*":
+            session["planner"] = lpa_planner(start, goal)
+            steps = session["planner"].replan_steps()
         else:
-            for f in state['frontier']:
-                if f['name']==n:
-                    g_val = f.get('g')
-                    f_val = f.get('f')
-                    h_val = f.get('h',h_val)
-        if g_val is not None:
-            if algo=="A*":
-                ax.text(x,y+0.1,f"g={g_val}",ha='center',fontsize=8)
-                ax.text(x,y-0.1,f"h={h_val}",ha='center',fontsize=8)
-                ax.text(x,y-0.3,f"f={f_val}",ha='center',fontsize=8)
-            else:
-                ax.text(x,y-0.05,f"h={h_val}",ha='center',fontsize=8)
+            steps = trace_steps(*query)
+        for s in steps:
+            session["trace"].append(s)
+            if budget.exceeded(s["stats"]["expanded"]):
+                steps.close()
+                session["status"] = f"⏹️ Stopped by the {budget.reason} after {len(session['trace'])} steps (partial trace)"
+                if "bound" in s:  # ARA*: the incumbent is still a valid answer
+                    session["status"] += f"; best cost {s['incumbent']}, at most {s['bound']:.3f} × optimal"
+                break
+            if budget.elapsed - shown >= STREAM_INTERVAL:
+                shown = budget.elapsed
+                node = s["current"]
+                session["status"] = (f"⏳ Searching: {len(session['trace'])} steps, expanding {node['name']} "
+                                     f"(f = {node.get('f', node.get('h'))}), {session['trace'].frontier_size} in frontier"
+                                     + (f", best cost {s['incumbent']} (≤ {s['bound']:.3f} × optimal)" if "bound" in s else ""))
+                yield show_step(session) + (session,)
         else:
-            ax.text(x,y-0.05,f"h={h_val}",ha='center',fontsize=8)
-    ax.set_axis_off()
-    return fig
+            if algo!="LPA*": trace = remember_trace(query, session["trace"])
+    if trace is not None:
+        session.update(trace=trace, query=query, status="")
+    yield show_step(session) + (session,)
+
+# Road changes (LPA* only): the session's planner repairs its last plan and
+# the repair's trace replaces the shown one. Its expanded cities are exactly
+# the ones the change made it re-expand; A* on the changed map is run for
+# comparison. A cost of 0 closes the road.
+ROADS = [f"{a} – {b}" for a in graph for b in graph[a] if a<b]
+
+def change_road(road, cost, session):
+    planner = session["planner"]
+    if planner is None:
+        session["status"] = "❌ Run an LPA* search first, then change roads"
+        return show_step(session) + (session,)
+    a, b = road.split(" – ")
+    cost = float(cost or 0) or INF
+    if cost.is_integer(): cost = int(cost)  # road costs are whole kilometers
+    try:
+        planner.set_cost(a, b, cost)
+    except ValueError as e:
+        session["status"] = f"❌ {e}"
+        return show_step(session) + (session,)
+    what = f"{road} closed" if cost == INF else f"{road} now costs {cost:g}"
+    return replan(session, what)
 
-# Session
-session={"trace":[],"step":0}
+def reset_roads(session):
+    planner = session["planner"]
+    if planner is None or not planner.graph.changed():
+        session["status"] = "No road has been changed"
+        return show_step(session) + (session,)
+    planner.reset()
+    return replan(session, "All roads restored")
 
-def start_search(start, goal, algo):
-    if algo=="GBFS": session["trace"]=gbfs_trace(start, goal)
-    elif algo=="A*": session["trace"]=astar_trace(start, goal)
-    else: session["trace"]=rbfs_trace(start, goal)
-    session["step"]=0
-    return show_step()
+def replan(session, what):
+    planner = session["planner"]
+    trace = TraceStore.record(planner.replan_steps())
+    scratch = {}
+    drain(astar_steps(planner.start, planner.goal, planner.graph, planner.h, scratch))
+    route = planner.path()
+    result = f"new cost {planner.cost:g} via {' → '.join(route)}" if route else "the goal is unreachable"
+    if not trace:
+        session["status"] = (f"🚧 {what}: no city needed re-expanding, {result} "
+                             f"(A* from scratch: {scratch['expanded']} expansions)")
+        return show_step(session) + (session,)
+    repaired = ", ".join(sorted(trace[len(trace)-1]["expanded"]))
+    session.update(trace=trace, step=len(trace)-1, query=None,
+                   costs={(u, v): c for u, v, c in planner.graph.changed()},
+                   status=f"🚧 {what}: the LPA* repair expanded {repaired} ({len(trace)} expansions, "
+                          f"A* from scratch {scratch['expanded']}); {result}")
+    return show_step(session) + (session,)
 
-def step_forward():
+def stop_search(session):
+    session["status"] = f"⏹️ Stopped after {len(session['trace'])} steps (partial trace)"
+    return show_step(session) + (session,)
+
+# Saved traces (TraceStore files) are replayed without searching again
+def save_trace(session):
+    if not session["trace"]: return None
+    fd, path = tempfile.mkstemp(prefix=f"{session['trace'].algo.replace('*', 'star')}-", suffix=".trace")
+    os.close(fd)
+    return session["trace"].save(path)
+
+def replay_trace(path, session):
+    if path is None: return show_step(session) + (session,)
+    try:
+        trace = TraceStore.open(path)
+    except (ValueError, KeyError, OSError) as e:
+        return f"❌ Not a saved trace: {e}", "", None, session
+    if not set(trace.names) <= set(graph):
+        return "❌ This trace was recorded on another map", "", None, session
+    session.update(trace=trace, step=0, query=None, planner=None, costs={}, status=f"📂 Replaying a saved {trace.algo} trace ({len(trace)} steps)")
+    return show_step(session) + (session,)
+
+def step_forward(session):
     if session["step"]<len(session["trace"])-1: session["step"]+=1
-    return show_step()
+    return show_step(session) + (session,)
 
-def step_back():
+def step_back(session):
     if session["step"]>0: session["step"]-=1
-    return show_step()
+    return show_step(session) + (session,)
 
-def show_step():
+def show_step(session):
     if not session["trace"]: return "No trace yet.", "", None
     s = session["trace"][session["step"]]
     node = s['current']
-    frontier_table="| Node | g(n) | h(n) | f(n)=g+h |\n|------|------|------|-----------|\n"
+    f_label = "f(n)=g+w·h" if "w" in s else "f(n)=g+h"
+    frontier_table=f"| Node | g(n) | h(n) | {f_label} |\n|------|------|------|-----------|\n"
     for f in s['frontier']:
         mark = "✅" if f['name']==node['name'] else ""
         g_val = f.get('g','-'); h_val=f.get('h','-'); f_val=f.get('f','-')
         frontier_table += f"| {f['name']} | {g_val} | {h_val} | {f_val} {mark} |\n"
-    path_edges = " + ".join(str(graph[s['path'][i]][s['path'][i+1]]) for i in range(len(s['path'])-1))
+    costs = session.get("costs", {})
+    path_edges = " + ".join(f"{costs.get((a, b), graph[a][b]):g}" for a, b in zip(s['path'], s['path'][1:]))
     g_val = node.get('g','-'); h_val=node.get('h','-'); f_val=node.get('f','-')
     reason = f"g(n) = sum of edge costs along path: {path_edges} = {g_val}\n" \
              f"h(n) = heuristic: {h_val}\n" \
-             f"f(n)=g+h = {f_val}\n" \
+             f"{f_label} = {f_val}\n" \
              f"Selected **{node['name']}** (lowest f/h as per {s['algo']})"
-    step_info = f"### Step {session['step']+1}\n**Expanded:** {', '.join(s['expanded'])}\n**Path so far:** {' → '.join(s['path'])}"
+    # Price paid for the memory bound (RBFS / SMA*)
+    if "f_limit" in s:
+        reason += f"\nf-limit = {s['f_limit']}"
+    if "memory" in s:
+        reason += f"\nNodes in memory: {s['memory']}/{s['memory_limit']}, dropped so far: {s['dropped']}"
+    if "direction" in s:
+        reason += f"\nSearch direction: {s['direction']}"
+    if "re_expansions" in s:
+        reason += f"\nRe-expansions so far: {s['re_expansions']}"
+    # Weighted searches: the weight, and for ARA* the best solution so far
+    if "w" in s:
+        reason += f"\nWeight w = {s['w']:g}: the solution costs at most {s['w']:g} × optimal"
+    if "bound" in s:
+        reason += f"\nBest solution so far: cost {s['incumbent']}, proven ≤ {s['bound']:.3f} × optimal"
+    if s.get("plan", 1) > 1:
+        reason += f"\nRepair {s['plan'] - 1} after road changes: only the affected cities are expanded again"
+    if costs:
+        reason += "\nChanged roads: " + ", ".join(f"{a} – {b} = {c:g}" for (a, b), c in costs.items() if a<b)
+    if "stats" in s:
+        reason += f"\nCounters: {summary(s['stats'])}"
+    status = session.get("status")
+    step_info = (status + "\n\n" if status else "") + f"### Step {session['step']+1}\n**Expanded:** {', '.join(s['expanded'])}\n**Path so far:** {' → '.join(s['path'])}"
     selected_info = f"## 🟦 Selected Node\n➡️ **{node['name']}**"
-    return step_info + "\n\n" + reason, selected_info + "\n\n" + frontier_table, plot_map(s)
-
-# Gradio UI
-with gr.Blocks() as demo:
-    gr.Markdown("# 🌍 Romania Search Visualizer — GBFS / A* / RBFS")
-    with gr.Row():
-        start_city = gr.Dropdown(list(graph.keys()), label="Start City", value="Arad")
-        goal_city = gr.Dropdown(list(graph.keys()), label="Goal City", value="Bucharest")
-        algo_choice = gr.Radio(["GBFS","A*","RBFS"], label="Algorithm", value="A*")
-    with gr.Row():
-        btn_start = gr.Button("▶️ Start Search")
-        btn_back = gr.Button("⬅️ Back")
-        btn_next = gr.Button("➡️ Next Step")
-    with gr.Row():
-        output_text = gr.Markdown()
-        frontier_text = gr.Markdown()
-    with gr.Row():
-        output_plot = gr.Plot()
-    btn_start.click(start_search, [start_city, goal_city, algo_choice], [output_text, frontier_text, output_plot])
-    btn_next.click(step_forward, None, [output_text, frontier_text, output_plot])
-    btn_back.click(step_back, None, [output_text, frontier_text, output_plot])
-
-demo.launch()
+    frame = png_image(step_frame(*session["query"], session["step"]) if session["query"] else get_renderer().render(s))
+    return step_info + "\n\n" + reason, selected_info + "\n\n" + frontier_table, frame
+
+# Gradio UI (only built when run as a script; importing this file has no side effects)
+def build_demo():
+    import gradio as gr
+    with gr.Blocks() as demo:
+        gr.Markdown("# 🌍 Romania Search Visualizer — GBFS / A* / WA* / ARA* / RBFS / SMA* / CH / LPA*\n"
+                    "h(n): straight-line distance for Bucharest, landmark (ALT) lower bound for any other goal.\n"
+                    "LPA*: change road costs after a search; the repair re-expands only the affected cities (purple).")
+        with gr.Row():
+            start_city = gr.Dropdown(list(graph.keys()), label="Start City", value="Arad")
+            goal_city = gr.Dropdown(list(graph.keys()), label="Goal City", value="Bucharest")
+            algo_choice = gr.Radio(["GBFS","A*","WA*","ARA*","RBFS","SMA*","CH","LPA*"], label="Algorithm", value="A*")
+            sma_memory = gr.Slider(3, 20, value=SMA_MEMORY, step=1, label="SMA* memory (nodes)")
+            weight = gr.Slider(1, 5, value=ARA_WEIGHT, step=0.25, label="Weight w (WA*, ARA* start)")
+        with gr.Row():
+            time_budget = gr.Number(TIME_BUDGET, label="Time budget (s, 0 = none)")
+            node_budget = gr.Number(NODE_BUDGET, label="Node budget (expansions, 0 = none)", precision=0)
+            road = gr.Dropdown(ROADS, label="Road (LPA*)", value=ROADS[0])
+            road_cost = gr.Number(0, label="New cost (0 = closed)")
+        with gr.Row():
+            btn_start = gr.Button("▶️ Start Search")
+            btn_stop = gr.Button("⏹️ Stop")
+            btn_save = gr.Button("💾 Save trace")
+            btn_back = gr.Button("⬅️ Back")
+            btn_next = gr.Button("➡️ Next Step")
+            btn_road = gr.Button("🚧 Apply change")
+            btn_reset = gr.Button("↩️ Reset roads")
+        with gr.Row():
+            output_text = gr.Markdown()
+            frontier_text = gr.Markdown()
+        with gr.Row():
+            output_plot = gr.Image(type="pil", show_label=False)
+        with gr.Row():
+            saved_file = gr.File(label="Saved trace")
+            replay_file = gr.File(label="Replay a saved trace", file_types=[".trace"])
+        session_state = gr.State(new_session())
+        outputs = [output_text, frontier_text, output_plot, session_state]
+        search = btn_start.click(start_search, [start_city, goal_city, algo_choice, sma_memory, weight,
+                                                time_budget, node_budget, session_state], outputs)
+        btn_stop.click(stop_search, session_state, outputs, cancels=[search])
+        btn_save.click(save_trace, session_state, saved_file)
+        replay_file.upload(replay_trace, [replay_file, session_state], outputs)
+        btn_next.click(step_forward, session_state, outputs)
+        btn_back.click(step_back, session_state, outputs)
+        btn_road.click(change_road, [road, road_cost, session_state], outputs)
+        btn_reset.click(reset_roads, session_state, outputs)
+    return demo
+
+# Handlers keep no global state and rendering is locked, so they can run in parallel
+CONCURRENCY = 8
+
+if __name__ == "__main__":
+    demo = build_demo()
+    demo.queue(default_concurrency_limit=CONCURRENCY)
+    demo.launch()
@@ -0,0 +1,321 @@
+import argparse
+import heapq
+import json
+import sys
+import time
+from array import array
+
+from SearchStats import counters, drain, record
+
+INF = float("inf")
+
+# -------------------------
+# Contraction hierarchies
+# -------------------------
+# Preprocessing contracts the nodes one by one, least important first. Removing
+# node v deletes its arcs; for every pair u -> v -> w whose cost no other path
+# matches (checked with a small "witness" Dijkstra that avoids v), a shortcut
+# u -> w remembering v as its middle node is added. The contraction order is the
+# node rank.
+#
+# After contraction every shortest path goes up in rank and then down. A query
+# therefore runs two Dijkstras that only follow arcs towards higher ranks: one
+# forward from the start and one backward from the goal. They meet at the
+# highest node of the path. On road networks each side settles a few hundred
+# nodes, whatever the size of the map. Shortcuts are unpacked through their
+# middle nodes, so the result is a path in the original graph.
+#
+# Works on anything indexable as graph[node] -> {neighbor: cost}: the Romania
+# dict in RouteSearch.py, or a RoadNetwork CSRGraph.
+#
+#   python ContractionHierarchy.py build roads.gr -o roads.ch
+#   python ContractionHierarchy.py query roads.ch 1 5000
+
+# Witness searches stop after settling this many nodes. A search cut short
+# only means an unneeded shortcut is added, never a wrong answer.
+WITNESS_SETTLE_LIMIT = 60
+
+def build(graph, settle_limit=WITNESS_SETTLE_LIMIT, log=None):
+    nodes = list(graph)
+    index = {v: i for i, v in enumerate(nodes)}
+    n = len(nodes)
+    integral = True
+    # out[u][w] / inn[w][u] = (cost, middle node or -1) over the uncontracted nodes
+    out, inn = [{} for _ in range(n)], [{} for _ in range(n)]
+    for a in nodes:
+        i = index[a]
+        for b, cost in graph[a].items():
+            j = index[b]
+            integral &= float(cost).is_integer()
+            if i != j and cost < out[i].get(j, (INF,))[0]:
+                out[i][j] = inn[j][i] = (cost, -1)
+
+    # Distances from source avoiding skip; stops once every target is settled
+    def witness(source, skip, targets, limit):
+        dist, pq, settled, left = {source: 0}, [(0, source)], 0, len(targets)
+        while pq and left:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            settled += 1
+            if settled > settle_limit:
+                break
+            if u in targets:
+                left -= 1
+            for x, (cost, _) in out[u].items():
+                nd = d + cost
+                if nd <= limit and x != skip and nd < dist.get(x, INF):
+                    dist[x] = nd
+                    heapq.heappush(pq, (nd, x))
+        return dist
+
+    def shortcuts(v):
+        added = []
+        if not out[v]:
+            return added
+        longest = max(cost for cost, _ in out[v].values())
+        for u, (cu, _) in inn[v].items():
+            dist = witness(u, v, out[v], cu + longest)
+            for w, (cw, _) in out[v].items():
+                if w != u and dist.get(w, INF) > cu + cw:
+                    added.append((u, w, cu + cw))
+        return added
+
+    # Priority: edge difference (shortcuts added - arcs removed) plus the number
+    # of already contracted neighbors, which spreads contraction evenly.
+    # Priorities go stale as neighbors are contracted, so they are recomputed
+    # when popped (lazy updates).
+    deleted = [0] * n
+    priority = lambda v, added: len(added) - len(out[v]) - len(inn[v]) + deleted[v]
+    heap = [(priority(v, shortcuts(v)), v) for v in range(n)]
+    heapq.heapify(heap)
+    rank = array("i", [0]) * n
+    up, down = [None] * n, [None] * n  # arcs to higher nodes, stored per node
+    level, total = 0, 0
+    while heap:
+        _, v = heapq.heappop(heap)
+        added = shortcuts(v)
+        p = priority(v, added)
+        if heap and p > heap[0][0]:
+            heapq.heappush(heap, (p, v))
+            continue
+        rank[v] = level
+        level += 1
+        up[v], down[v] = out[v], inn[v]
+        for u in inn[v]:
+            del out[u][v]
+            deleted[u] += 1
+        for w in out[v]:
+            del inn[w][v]
+            deleted[w] += 1
+        for u, w, cost in added:
+            if cost < out[u].get(w, (INF,))[0]:
+                out[u][w] = inn[w][u] = (cost, v)
+        total += len(added)
+        out[v] = inn[v] = None
+        if log and level % max(1, n // 10) == 0:
+            log(f"  contracted {level}/{n}, {total} shortcuts")
+    if log:
+        log(f"contracted {n} nodes, {total} shortcuts")
+    return ContractionHierarchy(nodes, rank, _pack(up, integral), _pack(down, integral))
+
+# Per-node dicts -> CSR arrays (offsets, targets, costs, middle nodes)
+def _pack(adjacency, integral):
+    offsets, targets = array("q", [0]), array("i")
+    costs, mids = array("q" if integral else "d"), array("i")
+    for arcs in adjacency:
+        for x, (cost, mid) in arcs.items():
+            targets.append(x)
+            costs.append(int(cost) if integral else cost)
+            mids.append(mid)
+        offsets.append(len(targets))
+    return offsets, targets, costs, mids
+
+class ContractionHierarchy:
+    # up: arcs v -> x, down: arcs x -> v, both only towards higher-ranked x
+    # nodes: node keys by id, or None when the keys are the ids (CSR graphs;
+    # base is then the label offset of the input file, 1 for DIMACS)
+    def __init__(self, nodes, rank, up, down, base=0):
+        self.nodes, self.rank, self.up, self.down = nodes, rank, up, down
+        self.base = base
+        self.index = None if nodes is None else {v: i for i, v in enumerate(nodes)}
+
+    def _id(self, node):
+        return node if self.index is None else self.index[node]
+
+    def _key(self, i):
+        return i if self.nodes is None else self.nodes[i]
+
+    @property
+    def num_shortcuts(self):
+        return sum(1 for side in (self.up, self.down) for m in side[3] if m >= 0)
+
+    # Shortest path as (cost, [nodes]), or (INF, None) when the goal is not
+    # reachable. stats["settled"] counts the nodes settled by both searches,
+    # the SearchStats counters are filled in as well.
+    def query(self, start, goal, stats=None):
+        return drain(self._query(start, goal, stats, False))
+
+    # Generator version of query() for the traced visualizer: yields
+    # (direction, node, dist, path, frontier, counters) for every settled node,
+    # with the path from the start (forward) or to the goal (backward) and the
+    # queued (node, dist) pairs of both searches, and returns what query()
+    # does. Closing it stops the query; stats then get the counters so far.
+    def query_steps(self, start, goal, stats=None):
+        return self._query(start, goal, stats, True)
+
+    def _query(self, start, goal, stats, trace):
+        started, c = time.perf_counter(), counters()
+        s, t = self._id(start), self._id(goal)
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: None}, {t: None})
+        queues = ([(0, s)], [(0, t)])
+        settled = (set(), set())
+        best, meet = (0, s) if s == t else (INF, None)
+        count, side = 0, 0
+        while (queues[0] or queues[1]) and s != t:
+            # alternate, skipping a side that is empty or cannot improve best
+            if not queues[side] or queues[side][0][0] >= best:
+                side ^= 1
+                if not queues[side] or queues[side][0][0] >= best:
+                    break
+            d, v = heapq.heappop(queues[side])
+            if d > dist[side][v] or v in settled[side]:
+                side ^= 1
+                continue
+            settled[side].add(v)
+            count += 1
+            c["peak_frontier"] = max(c["peak_frontier"], len(queues[0]) + len(queues[1]) + 1)
+            other = dist[side ^ 1].get(v)
+            if other is not None and d + other < best:
+                best, meet = d + other, v
+            offsets, targets, costs, mids = self.up if side == 0 else self.down
+            for i in range(offsets[v], offsets[v + 1]):
+                x, nd = targets[i], d + costs[i]
+                if nd < dist[side].get(x, INF):
+                    c["generated"] += 1
+                    if x in dist[side]: c["duplicates"] += 1
+                    dist[side][x] = nd
+                    parent[side][x] = (v, mids[i])
+                    heapq.heappush(queues[side], (nd, x))
+            if trace:
+                c["expanded"], c["peak_closed"] = count, count
+                half = self._half_path(parent[side], v, side)
+                frontier = [(self._key(x), dd) for k in (0, 1) for dd, x in queues[k]
+                            if dd == dist[k][x] and x not in settled[k]]
+                try:
+                    yield ("forward", "backward")[side], self._key(v), d, half, frontier, dict(c)
+                except GeneratorExit:
+                    record(stats, c, "query", started)
+                    raise
+            side ^= 1
+        c["expanded"], c["peak_closed"] = count, count
+        if stats is not None:
+            stats["settled"] = count
+        record(stats, c, "query", started)
+        if meet is None:
+            return INF, None
+        path = self._half_path(parent[0], meet, 0)[:-1] + self._half_path(parent[1], meet, 1)
+        return best, path
+
+    # Unpacked path start -> v (forward) or v -> goal (backward)
+    def _half_path(self, parent, v, side):
+        arcs = []
+        while parent[v] is not None:
+            u, mid = parent[v]
+            arcs.append((u, v, mid) if side == 0 else (v, u, mid))
+            v = u
+        if side == 0:
+            arcs.reverse()
+        path = [v if side == 0 else (arcs[0][0] if arcs else v)]
+        for a, b, mid in arcs:
+            path.extend(self._unpack(a, b, mid))
+        return [self._key(x) for x in path]
+
+    # Original nodes after a along the arc a -> b (b included)
+    def _unpack(self, a, b, mid):
+        result, stack = [], [(a, b, mid)]
+        while stack:
+            a, b, mid = stack.pop()
+            if mid < 0:
+                result.append(b)
+                continue
+            # mid was contracted before a and b: a -> mid is a down arc of mid,
+            # mid -> b an up arc of mid
+            stack.append((mid, b, self._mid(self.up, mid, b)))
+            stack.append((a, mid, self._mid(self.down, mid, a)))
+        return result
+
+    def _mid(self, side, v, x):
+        offsets, targets, _, mids = side
+        for i in range(offsets[v], offsets[v + 1]):
+            if targets[i] == x:
+                return mids[i]
+        raise KeyError((v, x))
+
+    # JSON header line, then rank and the two CSR sides as raw arrays
+    def save(self, path):
+        arrays = [self.rank, *self.up, *self.down]
+        header = {"nodes": self.nodes, "base": self.base, "n": len(self.rank), "costs": self.up[2].typecode,
+                  "sizes": [len(a) for a in arrays], "byteorder": sys.byteorder}
+        with open(path, "wb") as fh:
+            fh.write(json.dumps(header).encode() + b"\n")
+            for a in arrays:
+                a.tofile(fh)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path}: written on a {header['byteorder']}-endian machine")
+            arrays = []
+            for code, size in zip(["i"] + ["q", "i", header["costs"], "i"] * 2, header["sizes"]):
+                a = array(code)
+                a.fromfile(fh, size)
+                arrays.append(a)
+        return cls(header["nodes"], arrays[0], tuple(arrays[1:5]), tuple(arrays[5:9]), header["base"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Contraction-hierarchy index for repeated route queries")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="contract a road network (.gr, .csv or .csr) and save the index")
+    b.add_argument("input")
+    b.add_argument("-o", "--output", help="index file (default: <input>.ch)")
+    q = sub.add_parser("query", help="shortest path between two nodes")
+    q.add_argument("index")
+    q.add_argument("start")
+    q.add_argument("goal")
+    args = parser.parse_args(argv)
+
+    log = lambda msg: print(msg, file=sys.stderr)
+    t0 = time.perf_counter()
+    if args.command == "build":
+        import RoadNetwork
+        network = RoadNetwork.load(args.input)
+        ch = build(network, log=log)
+        # CSR node ids are already 0..n-1; keep the file's labels for queries
+        ch.nodes, ch.index, ch.base = network.names, None, network.base
+        if ch.nodes is not None:
+            ch.index = {v: i for i, v in enumerate(ch.nodes)}
+        out = ch.save(args.output or args.input + ".ch")
+        print(f"{out}: {len(ch.rank)} nodes, {ch.num_shortcuts} shortcuts, {time.perf_counter() - t0:.1f}s")
+        return
+
+    ch = ContractionHierarchy.load(args.index)
+    parse = (lambda label: int(label) - ch.base) if ch.nodes is None else str
+    stats = {}
+    t0 = time.perf_counter()
+    cost, path = ch.query(parse(args.start), parse(args.goal), stats)
+    if path is not None and ch.nodes is None:
+        path = [v + ch.base for v in path]
+    elapsed = time.perf_counter() - t0
+    if path is None:
+        print(f"no route from {args.start} to {args.goal}")
+        return
+    print(" -> ".join(map(str, path)))
+    print(f"cost {cost}, {len(path) - 1} arcs, {stats['settled']} settled, {elapsed * 1000:.2f}ms")
+
+if __name__ == "__main__":
+    main()
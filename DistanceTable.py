@@ -0,0 +1,113 @@
+import argparse
+import os
+
+from SlidingPuzzle import get_board, is_solvable
+
+# -------------------------
+# Exact distances for the whole 8-puzzle
+# -------------------------
+# Only 181,440 states are reachable from the goal, so one BFS can store the
+# optimal cost-to-go of every one of them, one byte each (about 180 KB).
+#
+# Index of a state: blank cell * 8!/2 + Lehmer rank of the 8 tiles (read in
+# row order, blank skipped) divided by 2. On a 3x3 board a state is solvable
+# iff that tile order has an even number of inversions; swapping the last two
+# tiles only flips the last Lehmer digit (weight 1) and the parity, so rank // 2
+# numbers the solvable orders without gaps.
+#
+# With the table, solving is a greedy walk: from each state step to any
+# neighbor whose distance is one less. No search at all.
+
+HALF = 20160  # 8! / 2
+SIZE = 9 * HALF
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdb", "8puzzle-distances.bin")
+
+def rank(state):
+    tiles = [t for t in state if t]
+    r = 0
+    for i in range(7):
+        t = tiles[i]
+        smaller = 0
+        for u in tiles[i + 1:]:
+            if u < t:
+                smaller += 1
+        r = r * (8 - i) + smaller
+    return state.index(0) * HALF + r // 2
+
+def _neighbors(state, moves):
+    blank = state.index(0)
+    for j in moves[blank]:
+        s = list(state)
+        s[blank], s[j] = s[j], s[blank]
+        yield tuple(s)
+
+# BFS from the goal over all reachable states
+def build(path=TABLE_PATH):
+    moves = get_board(3).moves
+    table = bytearray(b"\xff") * SIZE
+    goal = get_board(3).goal
+    table[rank(goal)] = 0
+    layer, depth = [goal], 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for state in layer:
+            for nxt in _neighbors(state, moves):
+                r = rank(nxt)
+                if table[r] == 0xff:
+                    table[r] = depth
+                    next_layer.append(nxt)
+        layer = next_layer
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(table)
+    os.replace(tmp, path)
+    return bytes(table)
+
+# Loaded on first use; built (about a second) and saved when the file is missing
+_table = None
+
+def load(path=TABLE_PATH):
+    global _table
+    if _table is None:
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                data = fh.read()
+            if len(data) != SIZE:
+                raise ValueError(f"{path}: expected {SIZE} bytes, got {len(data)}")
+            _table = data
+        else:
+            _table = build(path)
+    return _table
+
+# Optimal number of moves to the goal, None for an unsolvable state
+def distance(state):
+    if not is_solvable(state, 3):
+        return None
+    return load()[rank(state)]
+
+# Optimal path from start to the goal (list of states), None if unsolvable.
+# Neighbors are tried Up, Down, Left, Right; the first one that is one move
+# closer is taken.
+def optimal_path(start):
+    d = distance(start)
+    if d is None:
+        return None
+    table, moves = load(), get_board(3).moves
+    path = [tuple(start)]
+    while d:
+        d -= 1
+        path.append(next(s for s in _neighbors(path[-1], moves) if table[rank(s)] == d))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the exact 8-puzzle distance table")
+    parser.add_argument("-o", "--output", default=TABLE_PATH)
+    args = parser.parse_args(argv)
+    table = build(args.output)
+    print(f"{args.output}: {SIZE} states, max depth {max(table)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import heapq
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from itertools import accumulate, count as count_up, groupby, islice
+
+from SearchStats import add_time, drain, record
+from SlidingPuzzle import board_width, get_board, is_solvable, parse_state
+
+# -------------------------
+# External-memory breadth-first search
+# -------------------------
+# A* and the traced route searches keep g, parents and the closed set in dicts,
+# so RAM caps the state space they can explore. This BFS keeps its layers on
+# disk instead and finds duplicates late (delayed duplicate detection, Korf
+# 2004). Layer d+1 is built with sequential reads and writes only:
+#
+#   1. expand: stream layer d and collect its successors in a buffer of at most
+#      `memory` bytes. A full buffer is sorted, deduplicated and written out as
+#      a run. Nothing is looked up while expanding.
+#   2. merge: k-way merge of the runs, minus every state of the previous layers
+#      (themselves sorted files, merged alongside). What is left is layer d+1,
+#      written as one sorted file. Each open file holds one decompressed block;
+#      when more runs than `memory` allows would be open, they are first merged
+#      into fewer, longer ones.
+#   3. delete the runs and the layers that can no longer hold duplicates.
+#
+# In an undirected space (every move can be undone, like sliding puzzles) the
+# successors of layer d lie in layers d-1, d and d+1, so only the last two
+# layers are kept (frontier search, undirected=True). Directed graphs need
+# all the previous layers.
+#
+# States are integers in [0, 2**64): packed puzzle codes up to 4x4, CSR node
+# ids. A file is a sequence of blocks of up to BLOCK_STATES sorted states:
+# [4-byte length][zlib of the 64-bit deltas between consecutive states]. Sorted
+# neighbors share most of their high bits, so a state takes a byte or two.
+#
+#   python ExternalSearch.py puzzle --width 3 --memory 1M     # all 181,440 8-puzzle states
+#   python ExternalSearch.py puzzle "0 12 9 13 15 11 10 14 3 7 2 5 4 8 6 1" --max-depth 20
+#   python ExternalSearch.py graph USA-road-d.NY.gr 1 --memory 64M
+
+BLOCK_STATES = 16384
+COMPRESSION = 1  # zlib level: the deltas already compress well at the fastest level
+LENGTH = struct.Struct("<I")
+MEMORY = 64 << 20
+
+# Bytes a buffered state costs while the buffer is sorted: its 8-byte array
+# slot plus the Python int and list slot sorted() creates
+STATE_BYTES = 48
+# Bytes one open file takes during a merge: a decompressed block and its array
+OPEN_FILE_BYTES = 2 * 8 * BLOCK_STATES
+
+INF = float("inf")
+
+# -------------------------
+# Sorted state files
+# -------------------------
+# Write sorted states (duplicates dropped); returns (states, bytes) written
+def write_states(path, states):
+    count = size = 0
+    unique = (k for k, _ in groupby(states))
+    with open(path, "wb") as out:
+        last = 0
+        while True:
+            block = list(islice(unique, BLOCK_STATES))
+            if not block:
+                break
+            deltas = array("Q", [block[0] - last])
+            deltas.extend(map(int.__sub__, block[1:], block))
+            data = zlib.compress(deltas.tobytes(), COMPRESSION)
+            out.write(LENGTH.pack(len(data)))
+            out.write(data)
+            count += len(block)
+            size += LENGTH.size + len(data)
+            last = block[-1]
+    return count, size
+
+def read_states(path):
+    with open(path, "rb") as f:
+        last = 0
+        while True:
+            head = f.read(LENGTH.size)
+            if not head:
+                return
+            deltas = array("Q")
+            deltas.frombytes(zlib.decompress(f.read(LENGTH.unpack(head)[0])))
+            deltas[0] += last
+            states = array("Q", accumulate(deltas))
+            yield from states
+            last = states[-1]
+
+# States of a sorted stream that are not in another sorted stream
+def difference(states, seen):
+    seen = iter(seen)
+    other = next(seen, INF)
+    for s in states:
+        while other < s:
+            other = next(seen, INF)
+        if other != s:
+            yield s
+
+# -------------------------
+# Layered search
+# -------------------------
+# bfs_steps() yields one progress dict per finished layer: {"depth", "layer"
+# (states in it), "expanded", "generated", "runs", "disk" (bytes on disk now)}
+# and returns the list of layer sizes. With a `goal` it stops at the layer
+# holding it (its depth is len(layers) - 1) and returns None when the goal is
+# unreachable; with `max_depth` it stops after that layer. Only distances
+# come out: nothing on disk records parents.
+#
+# Duplicates are checked against two sorted files: the current layer and
+# "older", which is the layer before it when `undirected`, and otherwise the
+# union of all earlier layers (rewritten by a merge after every layer).
+#
+# stats get the SearchStats counters (duplicates = successors dropped as
+# already seen, peak_frontier = largest layer, peak_closed = most states in the
+# files checked against), "layers", "bytes_written", "peak_disk" and "expand" /
+# "merge" phase times. Files live in a temporary directory under `directory`
+# (default: the system temp dir), removed when the search ends or is closed.
+def bfs_steps(starts, successors, memory=MEMORY, undirected=False, goal=None, max_depth=None,
+              directory=None, stats=None):
+    capacity = max(BLOCK_STATES, memory // STATE_BYTES)
+    fan_in = max(3, memory // OPEN_FILE_BYTES)
+    starts = sorted(starts)
+    expanded = generated = duplicates = peak_frontier = peak_closed = written = peak_disk = 0
+    times = {"expand": 0.0, "merge": 0.0}
+    sizes = {}  # bytes of every live file
+
+    def finish():
+        record(stats, {"generated": generated, "expanded": expanded, "reexpanded": 0,
+                       "duplicates": duplicates, "peak_frontier": peak_frontier, "peak_closed": peak_closed,
+                       "layers": len(counts), "bytes_written": written, "peak_disk": peak_disk})
+        for phase, seconds in times.items():
+            if stats is not None:
+                add_time(stats, phase, seconds)
+
+    def write(path, states):
+        nonlocal written, peak_disk
+        count, size = write_states(path, states)
+        sizes[path] = size
+        written += size
+        peak_disk = max(peak_disk, sum(sizes.values()))
+        return count
+
+    def delete(path):
+        os.remove(path)
+        del sizes[path]
+
+    def merge(paths):
+        return heapq.merge(*map(read_states, paths))
+
+    with tempfile.TemporaryDirectory(prefix="bfs-", dir=directory) as tmp:
+        names = (os.path.join(tmp, f"{i}.states") for i in count_up())
+        layer, older, older_count = next(names), None, 0
+        counts = [write(layer, starts)]
+        peak_frontier = counts[0]
+        found = goal is not None and goal in starts
+        while counts[-1] and not found and (max_depth is None or len(counts) <= max_depth):
+            # 1. expand layer d into sorted runs
+            t0 = time.perf_counter()
+            runs, buffer = [], array("Q")
+            for state in read_states(layer):
+                succ = successors(state)
+                buffer.extend(succ)
+                if goal is not None and goal in succ:
+                    found = True
+                if len(buffer) >= capacity:
+                    generated += len(buffer)
+                    runs.append(next(names))
+                    write(runs[-1], sorted(buffer))
+                    buffer = array("Q")
+            generated += len(buffer)
+            runs.append(next(names))
+            write(runs[-1], sorted(buffer))
+            del buffer
+            expanded += counts[-1]
+            t1 = time.perf_counter()
+            # 2. merge the runs (first into fewer runs when too many would be open)
+            # minus the current and older layers
+            while len(runs) + 2 > fan_in:
+                group, runs = runs[:fan_in], runs[fan_in:]
+                runs.append(next(names))
+                write(runs[-1], merge(group))
+                for path in group:
+                    delete(path)
+            peak_closed = max(peak_closed, older_count + counts[-1])
+            new = next(names)
+            counts.append(write(new, difference(merge(runs), merge([p for p in (older, layer) if p]))))
+            duplicates = generated - sum(counts[1:])
+            peak_frontier = max(peak_frontier, counts[-1])
+            merged_runs = len(runs)
+            for path in runs:
+                delete(path)
+            # 3. keep only what the next layer is checked against
+            if undirected:
+                if older:
+                    delete(older)
+                older, older_count = layer, counts[-2]
+            elif older:
+                union = next(names)
+                older_count = write(union, merge([older, layer]))
+                delete(older)
+                delete(layer)
+                older = union
+            else:
+                older, older_count = layer, counts[-2]
+            layer = new
+            times["expand"] += t1 - t0
+            times["merge"] += time.perf_counter() - t1
+            if not counts[-1]:
+                break
+            try:
+                yield {"depth": len(counts) - 1, "layer": counts[-1], "expanded": expanded,
+                       "generated": generated, "runs": merged_runs, "disk": sum(sizes.values())}
+            except GeneratorExit:
+                finish()
+                raise
+        if not counts[-1]:
+            counts.pop()
+        finish()
+    if goal is not None and not found:
+        return None
+    return counts
+
+def external_bfs(starts, successors, memory=MEMORY, undirected=False, goal=None, max_depth=None,
+                 directory=None, stats=None):
+    return drain(bfs_steps(starts, successors, memory, undirected, goal, max_depth, directory, stats))
+
+# -------------------------
+# State spaces
+# -------------------------
+# Successors of a packed sliding-puzzle code (SlidingPuzzle.Board). The blank
+# is found without unpacking: (code - ones) & ~code & highs flags the zero
+# field, exact for the lowest zero field and there is only one.
+def puzzle_successors(width):
+    board = get_board(width)
+    if board.bits * board.size > 64:
+        raise ValueError(f"{width}x{width} codes take {board.bits * board.size} bits, at most 64 fit")
+    bits, mask, shift, moves = board.bits, board.mask, board.shift, board.moves
+    ones = sum(board.shift)
+    highs = ones << (bits - 1)
+
+    def successors(code):
+        flag = (code - ones) & ~code & highs
+        blank = ((flag & -flag).bit_length() - 1) // bits
+        return [code + ((code >> (bits * j)) & mask) * (shift[blank] - shift[j]) for j in moves[blank]]
+    return successors
+
+# Breadth-first layers of a sliding puzzle from `start` (default: the goal,
+# which enumerates every solvable state by its distance to the goal). With
+# `solve`, stops at the goal: its depth is the optimal solution length.
+def puzzle_bfs(start=None, width=3, solve=False, memory=MEMORY, max_depth=None, directory=None, stats=None):
+    return drain(puzzle_bfs_steps(start, width, solve, memory, max_depth, directory, stats))
+
+def puzzle_bfs_steps(start=None, width=3, solve=False, memory=MEMORY, max_depth=None, directory=None, stats=None):
+    board = get_board(width if start is None else board_width(start))
+    if start is not None and not is_solvable(start, board.width):
+        return None
+    start = board.pack(start if start is not None else board.goal)
+    goal = board.goal_code if solve else None
+    return (yield from bfs_steps([start], puzzle_successors(board.width), memory, True, goal,
+                                 max_depth, directory, stats))
+
+# Reachability in a RoadNetwork CSRGraph: nodes by number of arcs from `start`
+def graph_bfs_steps(graph, start, undirected=False, goal=None, memory=MEMORY, max_depth=None,
+                    directory=None, stats=None):
+    offsets, targets = graph.offsets, graph.targets
+    return (yield from bfs_steps([start], lambda u: targets[offsets[u]:offsets[u + 1]], memory, undirected,
+                                 goal, max_depth, directory, stats))
+
+# "64M", "512K", "2G" or plain bytes
+def parse_size(text):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def main(argv=None):
+    from SearchStats import summary
+
+    parser = argparse.ArgumentParser(description="Disk-backed breadth-first search with delayed duplicate detection")
+    parser.add_argument("--memory", type=parse_size, default=MEMORY, help="RAM budget, e.g. 64M (default: 64M)")
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--dir", default=None, help="where the layer files go (default: system temp dir)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("puzzle", help="layers of a sliding puzzle (boards up to 4x4)")
+    p.add_argument("state", nargs="?", help="start state (default: the goal, i.e. every state by distance)")
+    p.add_argument("--width", type=int, default=3, help="board width when no state is given")
+    p.add_argument("--solve", action="store_true", help="stop at the goal and print its distance")
+    g = sub.add_parser("graph", help="reachability in a road network")
+    g.add_argument("input", help=".gr, .csv or .csr file")
+    g.add_argument("start")
+    g.add_argument("--goal")
+    g.add_argument("--undirected", action="store_true", help="every arc has its reverse (only the last two layers are kept)")
+    args = parser.parse_args(argv)
+
+    stats = {}
+    if args.command == "puzzle":
+        start = parse_state(args.state) if args.state else None
+        steps = puzzle_bfs_steps(start, args.width, args.solve, args.memory, args.max_depth, args.dir, stats)
+    else:
+        import RoadNetwork
+        graph = RoadNetwork.load(args.input)
+        goal = graph.node(args.goal) if args.goal else None
+        steps = graph_bfs_steps(graph, graph.node(args.start), args.undirected, goal, args.memory,
+                                args.max_depth, args.dir, stats)
+    t0 = time.perf_counter()
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as done:
+            layers = done.value
+            break
+        print(f"depth {progress['depth']:4d}: {progress['layer']:>14,} states  {progress['runs']:4d} runs  "
+              f"{progress['disk'] / 1e6:9.1f} MB on disk  {time.perf_counter() - t0:8.1f} s", file=sys.stderr)
+    if layers is None:
+        print("unreachable" if args.command == "graph" else "unsolvable")
+        return
+    if args.command == "puzzle" and args.solve or args.command == "graph" and args.goal:
+        print(f"goal at depth {len(layers) - 1}")
+    print(f"{sum(layers):,} states in {len(layers)} layers; {summary(stats)}")
+    print(f"{stats['bytes_written'] / 1e6:.1f} MB written, peak {stats['peak_disk'] / 1e6:.1f} MB on disk")
+
+if __name__ == "__main__":
+    main()
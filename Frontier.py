@@ -0,0 +1,92 @@
+import heapq
+from itertools import count
+
+# -------------------------
+# Priority-queue frontier
+# -------------------------
+# Binary heap of [priority, seq, key, item] entries plus a key -> entry map, so
+# each key is queued at most once. Ties on priority go to the entry pushed first
+# (seq), which is the order the old "append, stable sort, pop(0)" list gave.
+# Decrease-key is lazy: the old entry is marked removed and a new one pushed;
+# removed entries are dropped when they reach the top of the heap.
+_REMOVED = object()
+
+class Frontier:
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._seq = count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def priority(self, key):
+        return self._entries[key][0]
+
+    # Queue key with this priority, or lower its priority if already queued.
+    # Returns False (and changes nothing) when it is queued at <= priority.
+    def push(self, key, priority, item):
+        old = self._entries.get(key)
+        if old is not None:
+            if old[0] <= priority:
+                return False
+            old[2] = _REMOVED
+            old[3] = None
+        entry = [priority, next(self._seq), key, item]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def remove(self, key):
+        entry = self._entries.pop(key)
+        entry[2] = _REMOVED
+        entry[3] = None
+
+    # Priority of the next pop (inf when empty)
+    def min_priority(self):
+        heap = self._heap
+        while heap and heap[0][2] is _REMOVED:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else float("inf")
+
+    def pop(self):
+        heap = self._heap
+        while heap:
+            _, _, key, item = heapq.heappop(heap)
+            if key is not _REMOVED:
+                del self._entries[key]
+                return item
+        raise IndexError("pop from an empty frontier")
+
+    # Items in pop order, for the trace. Copying the heap is O(n); the sort
+    # only happens if the snapshot is actually read (see FrontierView).
+    def snapshot(self):
+        return FrontierView([(e[0], e[1], e[3]) for e in self._heap if e[2] is not _REMOVED])
+
+class FrontierView:
+    def __init__(self, entries):
+        self._entries = entries
+        self._items = None
+
+    def _sorted(self):
+        if self._items is None:
+            self._items = [item for _, _, item in sorted(self._entries)]
+        return self._items
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __bool__(self):
+        return bool(self._entries)
+
+    def __iter__(self):
+        return iter(self._sorted())
+
+    def __getitem__(self, index):
+        return self._sorted()[index]
+
+    def __repr__(self):
+        return f"FrontierView({self._sorted()!r})"
@@ -1,6 +1,7 @@
 import heapq
-import matplotlib.pyplot as plt
-import networkx as nx
+import time
+
+from SearchStats import counters, record
 
 # -------------------------
 # Graph Representation of Romania Map
@@ -39,63 +40,83 @@ heuristic = {
 # -------------------------
 # Greedy Best First Search Algorithm
 # -------------------------
-def greedy_best_first_search(start, goal):
-    visited = set()
+# log receives one line per step (print them with log=print); stats gets the
+# SearchStats counters.
+def greedy_best_first_search(start, goal, log=None, stats=None):
+    started, c = time.perf_counter(), counters()
+    visited, pushed = set(), {start}
     pq = [(heuristic[start], start, [start])]  # (h(n), current_node, path)
     step = 1
+    result = None
 
     while pq:
         h, current, path = heapq.heappop(pq)
 
         # Log the expansion step
-        print(f"\nStep {step}: Expanding {current} (h={h}), Path so far: {' -> '.join(path)}")
+        if log: log(f"\nStep {step}: Expanding {current} (h={h}), Path so far: {' -> '.join(path)}")
         step += 1
 
         # Goal check
         if current == goal:
-            print("\n🎯 Goal reached!")
-            return path
+            if log: log("\n🎯 Goal reached!")
+            result = path
+            break
 
         # Expand neighbors
         if current not in visited:
             visited.add(current)
+            c["expanded"] += 1
             for neighbor in graph.get(current, []):
                 if neighbor not in visited:
+                    c["generated"] += 1
+                    if neighbor in pushed: c["duplicates"] += 1
+                    pushed.add(neighbor)
                     heapq.heappush(pq, (heuristic[neighbor], neighbor, path + [neighbor]))
+            c["peak_frontier"] = max(c["peak_frontier"], len(pq))
+            c["peak_closed"] = len(visited)
 
-    return None
+    record(stats, c, "search", started)
+    return result
 
 # -------------------------
-# Run the Search
+# Graph Visualization with Heuristic Labels
 # -------------------------
-start, goal = "Arad", "Bucharest"
-path = greedy_best_first_search(start, goal)
-print("\n✅ Final Greedy Best First Search Path:", " -> ".join(path))
+# NetworkX and Matplotlib are imported here, not at the top, so importing this
+# file for greedy_best_first_search stays cheap.
+def draw_graph(path):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    G = nx.Graph()
+    for city, neighbors in graph.items():
+        for neighbor in neighbors:
+            G.add_edge(city, neighbor)
+
+    plt.figure(figsize=(12, 10))
+    pos = nx.spring_layout(G, seed=42)  # layout for better visualization
+
+    # Draw all nodes and edges
+    nx.draw(G, pos, with_labels=True, node_size=2000, node_color="lightblue",
+            font_size=10, font_weight="bold", edge_color="gray")
+
+    # Draw heuristic values as numeric labels below the city names
+    h_labels = {city: str(heuristic[city]) for city in G.nodes()}
+    nx.draw_networkx_labels(G, pos, labels=h_labels, font_color="red", font_size=9, verticalalignment='bottom')
+
+    # Highlight the GBFS path if found
+    if path:
+        path_edges = list(zip(path, path[1:]))
+        nx.draw_networkx_nodes(G, pos, nodelist=path, node_color='orange')   # path nodes
+        nx.draw_networkx_edges(G, pos, edgelist=path_edges, edge_color='red', width=2)  # path edges
+
+    plt.title("Romania Map Graph with GBFS Path and Heuristic Values", fontsize=14)
+    plt.show()
 
 # -------------------------
-# Graph Visualization with Heuristic Labels
+# Run the Search
 # -------------------------
-G = nx.Graph()
-for city, neighbors in graph.items():
-    for neighbor in neighbors:
-        G.add_edge(city, neighbor)
-
-plt.figure(figsize=(12, 10))
-pos = nx.spring_layout(G, seed=42)  # layout for better visualization
-
-# Draw all nodes and edges
-nx.draw(G, pos, with_labels=True, node_size=2000, node_color="lightblue",
-        font_size=10, font_weight="bold", edge_color="gray")
-
-# Draw heuristic values as numeric labels below the city names
-h_labels = {city: str(heuristic[city]) for city in G.nodes()}
-nx.draw_networkx_labels(G, pos, labels=h_labels, font_color="red", font_size=9, verticalalignment='bottom')
-
-# Highlight the GBFS path if found
-if path:
-    path_edges = list(zip(path, path[1:]))
-    nx.draw_networkx_nodes(G, pos, nodelist=path, node_color='orange')   # path nodes
-    nx.draw_networkx_edges(G, pos, edgelist=path_edges, edge_color='red', width=2)  # path edges
-
-plt.title("Romania Map Graph with GBFS Path and Heuristic Values", fontsize=14)
-plt.show()
+if __name__ == "__main__":
+    start, goal = "Arad", "Bucharest"
+    path = greedy_best_first_search(start, goal, log=print)
+    print("\n✅ Final Greedy Best First Search Path:", " -> ".join(path))
+    draw_graph(path)
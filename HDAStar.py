@@ -0,0 +1,296 @@
+import argparse
+import heapq
+import multiprocessing
+import os
+import queue
+import time
+
+from SearchStats import COUNTERS, counters, record
+from SlidingPuzzle import astar, board_width, get_board, is_solvable, parse_state
+
+INF = float("inf")
+
+# -------------------------
+# Hash-distributed A* (HDA*)
+# -------------------------
+# Every state has an owner: one of `workers` processes, picked by hashing its
+# packed code. A worker keeps the open list, g values and parents of its own
+# states only. It expands them exactly like astar() in SlidingPuzzle.py: same
+# packed moves, same Manhattan delta table or PDB `aux` update, same heap
+# entries. Children owned by another worker are buffered and sent to that
+# worker's inbox in batches. There is no shared open list and no lock; the hash
+# scatters neighboring states, so every worker gets a similar share of the work.
+#
+# The first goal a worker pops is not necessarily optimal: another worker may
+# still hold nodes with a smaller f. Its cost becomes the incumbent, which the
+# coordinator (the calling process) broadcasts; from then on nodes with
+# f >= incumbent are dropped. The search is over when every worker is idle
+# (open list empty or only f >= incumbent left) and no batch is in flight.
+# The coordinator checks this with probes: each worker answers with its idle
+# flag and how many batches it has sent and received. Two consecutive rounds
+# in which every worker is idle and the totals match and have not changed mean
+# nothing is still on its way (Mattern's four-counter method), so every node
+# with f below the incumbent has been expanded and the incumbent is optimal.
+# The path is then rebuilt by asking the owner of each state for its parent.
+#
+#   python HDAStar.py "0 12 9 13 15 11 10 14 3 7 2 5 4 8 6 1" --workers 8 --compare
+
+# Children buffered per destination before a batch is sent
+BATCH_SIZE = 256
+# Expansions between two looks at the inbox
+EXPANSIONS_PER_POLL = 512
+# Seconds between termination probes
+PROBE_INTERVAL = 0.005
+
+# Fibonacci hashing of the packed code
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+HASH_MASK = (1 << 64) - 1
+
+# Messages to a worker
+NODES, PROBE, INCUMBENT, PARENT, STOP = range(5)
+# Messages to the coordinator
+GOAL, STATUS, PARENT_OF, DONE = range(4)
+
+def owner(code, workers):
+    return (((code * HASH_MULTIPLIER) & HASH_MASK) >> 32) % workers
+
+def _worker(index, workers, width, pdb_path, inboxes, results):
+    import PatternDB
+    board = get_board(width)
+    pdb = PatternDB.load(pdb_path) if pdb_path else None
+    size, bits, mask = board.size, board.bits, board.mask
+    shift, moves, delta = board.shift, board.moves, board.delta
+    goal = board.goal_code
+    weight = pdb.weight if pdb else None
+    inbox = inboxes[index]
+
+    pq, best_g, came_from, closed = [], {}, {}, set()
+    outgoing = [[] for _ in range(workers)]
+    incumbent = INF
+    sent = received = 0
+    expanded = generated = reopened = duplicates = peak_frontier = peak_closed = 0
+
+    # entries are (f, h, code, blank, aux, parent), as sent between workers
+    def offer(entry):
+        nonlocal duplicates, reopened, peak_closed
+        f, h, code = entry[0], entry[1], entry[2]
+        if f >= incumbent:
+            return
+        g = f - h
+        old_g = best_g.get(code)
+        if old_g is not None:
+            if old_g <= g:
+                return
+            duplicates += 1
+            if code in closed:
+                # only happens with a PDB, see astar()
+                if len(closed) > peak_closed:
+                    peak_closed = len(closed)
+                closed.remove(code)
+                reopened += 1
+        best_g[code] = g
+        came_from[code] = entry[5]
+        heapq.heappush(pq, entry[:5])
+
+    def send(target):
+        nonlocal sent
+        inboxes[target].put((NODES, outgoing[target]))
+        outgoing[target] = []
+        sent += 1
+
+    while True:
+        busy = bool(pq) and pq[0][0] < incumbent
+        while True:
+            try:
+                message = inbox.get(not busy)
+            except queue.Empty:
+                break
+            busy = True  # block only for the first message
+            kind = message[0]
+            if kind == NODES:
+                received += 1
+                for entry in message[1]:
+                    offer(entry)
+            elif kind == PROBE or kind == INCUMBENT:
+                incumbent = min(incumbent, message[-1])
+                if kind == PROBE:
+                    idle = not (pq and pq[0][0] < incumbent)
+                    results.put((STATUS, index, message[1], sent, received, idle))
+            elif kind == PARENT:
+                results.put((PARENT_OF, message[1], came_from.get(message[1])))
+            elif kind == STOP:
+                results.put((DONE, index, {"generated": generated, "expanded": expanded,
+                                           "reexpanded": reopened, "duplicates": duplicates,
+                                           "peak_frontier": peak_frontier,
+                                           "peak_closed": max(peak_closed, len(closed))}))
+                return
+
+        for _ in range(EXPANSIONS_PER_POLL):
+            if not pq or pq[0][0] >= incumbent:
+                break
+            f, h, code, blank, aux = heapq.heappop(pq)
+            if code in closed:
+                continue
+            if code == goal:
+                incumbent = f
+                results.put((GOAL, index, f))
+                continue
+            if len(pq) >= peak_frontier:
+                peak_frontier = len(pq) + 1
+            closed.add(code)
+            expanded += 1
+            new_g = f - h + 1
+            for j in moves[blank]:
+                tile = (code >> (bits * j)) & mask
+                neighbor = code + tile * (shift[blank] - shift[j])
+                if pdb:
+                    new_aux = aux + (blank - j) * weight[tile]
+                    new_h = pdb.value(new_aux)
+                else:
+                    new_aux = 0
+                    new_h = h + delta[(tile * size + j) * size + blank]
+                new_f = new_g + new_h
+                if new_f >= incumbent:
+                    continue
+                generated += 1
+                target = (((neighbor * HASH_MULTIPLIER) & HASH_MASK) >> 32) % workers  # owner()
+                if target != index:
+                    batch = outgoing[target]
+                    batch.append((new_f, new_h, neighbor, j, new_aux, code))
+                    if len(batch) >= BATCH_SIZE:
+                        send(target)
+                    continue
+                # own child: same as offer(), inlined
+                old_g = best_g.get(neighbor)
+                if old_g is not None:
+                    if old_g <= new_g:
+                        continue
+                    duplicates += 1
+                    if neighbor in closed:
+                        if len(closed) > peak_closed:
+                            peak_closed = len(closed)
+                        closed.remove(neighbor)
+                        reopened += 1
+                best_g[neighbor] = new_g
+                came_from[neighbor] = code
+                heapq.heappush(pq, (new_f, new_h, neighbor, j, new_aux))
+        # flush everything before looking at the inbox, so an idle worker has
+        # nothing left to send
+        for target in range(workers):
+            if outgoing[target]:
+                send(target)
+
+# Optimal path as a list of state tuples (None when unsolvable), like astar().
+# `pdb` is a PatternDB.PatternDatabase; each worker maps the same file.
+# stats gets the SearchStats counters summed over the workers (peaks are summed
+# too, i.e. the combined memory), plus "workers".
+def hda_star(start, width=None, pdb=None, workers=None, stats=None):
+    board = get_board(width or board_width(start))
+    if not is_solvable(start, board.width):
+        return None
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    ctx = multiprocessing.get_context()
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, daemon=True,
+                         args=(i, workers, board.width, pdb.path if pdb else None, inboxes, results))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    try:
+        code = board.pack(start)
+        aux = pdb.aux(start) if pdb else 0
+        h = pdb.value(aux) if pdb else board.manhattan(start)
+        inboxes[owner(code, workers)].put((NODES, [(h, h, code, start.index(0), aux, None)]))
+
+        incumbent, probe, previous = INF, 0, None
+        while True:
+            probe += 1
+            for inbox in inboxes:
+                inbox.put((PROBE, probe, incumbent))
+            replies = []
+            while len(replies) < workers:
+                message = results.get()
+                if message[0] == GOAL:
+                    if message[2] < incumbent:
+                        incumbent = message[2]
+                        for inbox in inboxes:
+                            inbox.put((INCUMBENT, incumbent))
+                elif message[0] == STATUS and message[2] == probe:
+                    replies.append(message[3:])
+            # the start batch counts as sent by the coordinator
+            totals = (1 + sum(s for s, _, _ in replies), sum(r for _, r, _ in replies))
+            if all(idle for _, _, idle in replies) and totals[0] == totals[1]:
+                if totals == previous:
+                    break
+                previous = totals
+            else:
+                previous = None
+                time.sleep(PROBE_INTERVAL)
+
+        path = None
+        if incumbent < INF:
+            path, code = [], board.goal_code
+            while code is not None:
+                path.append(code)
+                inboxes[owner(code, workers)].put((PARENT, code))
+                while True:
+                    message = results.get()
+                    if message[0] == PARENT_OF and message[1] == code:
+                        code = message[2]
+                        break
+            path.reverse()
+            path = [board.unpack(c) for c in path]
+
+        for inbox in inboxes:
+            inbox.put((STOP,))
+        totals, done = counters(), 0
+        while done < workers:
+            message = results.get()
+            if message[0] == DONE:
+                done += 1
+                for key in COUNTERS:
+                    totals[key] += message[2][key]
+        for p in procs:
+            p.join()
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+    totals["workers"] = workers
+    record(stats, totals, "search", started)
+    return path
+
+def main(argv=None):
+    from PatternDB import load_default
+    from SearchStats import summary
+
+    parser = argparse.ArgumentParser(description="Hash-distributed parallel A* for sliding puzzles")
+    parser.add_argument("state", help='start state, e.g. "0 12 9 13 15 11 10 14 3 7 2 5 4 8 6 1"')
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-pdb", action="store_true", help="use Manhattan distance even when a PDB is built")
+    parser.add_argument("--compare", action="store_true", help="also run single-core astar() and report the speedup")
+    args = parser.parse_args(argv)
+
+    start = parse_state(args.state)
+    width = board_width(start)
+    pdb = None if args.no_pdb else load_default(width)
+    stats = {}
+    t0 = time.perf_counter()
+    path = hda_star(start, width, pdb, args.workers, stats)
+    elapsed = time.perf_counter() - t0
+    if path is None:
+        print("unsolvable")
+        return
+    print(f"HDA*  {args.workers} workers: {len(path) - 1} moves, {elapsed:.2f}s  ({summary(stats)})")
+    if args.compare:
+        serial = {}
+        t0 = time.perf_counter()
+        reference = astar(start, width, pdb, serial)
+        base = time.perf_counter() - t0
+        print(f"A*    1 core:    {len(reference) - 1} moves, {base:.2f}s  ({summary(serial)})")
+        print(f"speedup {base / elapsed:.2f}x")
+
+if __name__ == "__main__":
+    main()
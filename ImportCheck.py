@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# -------------------------
+# Import cost of the headless modules
+# -------------------------
+# Imports each module in a fresh interpreter under `python -X importtime` and
+# reports its cumulative import time and any UI/plotting package it pulled in.
+# The search code must import without them; Gradio, Matplotlib, NetworkX and
+# PIL are only loaded when a UI is launched or a frame is drawn. Exits with
+# status 1 when a module drags one in, so it can gate CI.
+#
+#   python ImportCheck.py                  # all modules
+#   python ImportCheck.py RouteSearch      # just one
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+HEAVY = ("gradio", "matplotlib", "networkx", "PIL", "numpy")
+
+MODULES = ("SearchStats", "SlidingPuzzle", "PatternDB", "DistanceTable", "BatchSolve", "ExternalSearch", "Frontier", "Landmarks",
+           "LPAStar", "HDAStar", "TraceStore", "RouteSearch", "RoadNetwork", "ContractionHierarchy", "GreedyBestFirstSearch",
+           "8Puzzle", "Compare")
+
+# Run in the child: import the module, print the heavy top-level packages loaded
+PROBE = ("import json, sys; __import__(sys.argv[1]); "
+         "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[2:]))))")
+
+# (cumulative import time in seconds, heavy packages loaded)
+def measure(module):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE, module, *HEAVY],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    heavy = json.loads(proc.stdout.strip().splitlines()[-1])
+    # importtime lines: "import time: self [us] | cumulative | imported package"
+    seconds = None
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            seconds = int(parts[1]) / 1e6
+    return seconds, heavy
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the search modules import without UI/plotting packages")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        seconds, heavy = measure(module)
+        status = "ok" if not heavy else "pulls in " + ", ".join(heavy)
+        failed |= bool(heavy)
+        print(f"{module:24s} {seconds * 1000:8.1f} ms  {status}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import argparse
+import random
+import time
+
+from Frontier import Frontier
+from SearchStats import counters, drain, on_expand, record
+
+INF = float("inf")
+
+# -------------------------
+# Live graph (edge cost updates)
+# -------------------------
+# Wraps a graph (the Romania dict or a RoadNetwork CSRGraph) and overrides
+# some arc costs without touching it, so the shared map stays as loaded.
+# graph[u] gives u's neighbors with the overrides applied. Roads are two-way:
+# set_cost() changes both arcs. A cost can go up (a traffic penalty, or inf for
+# a closed road) and back down, but not below the map's own cost, which the
+# heuristics (straight-line distance, ALT) are lower bounds of.
+#
+# set_cost() and reset() return the changed arcs as (u, v, old, new), the
+# input of LPAStar.update().
+class LiveGraph:
+    def __init__(self, graph):
+        self.base = graph
+        self.overrides = {}  # u -> {v: cost}
+
+    def __len__(self):
+        return len(self.base)
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __contains__(self, u):
+        return u in self.base
+
+    def __getitem__(self, u):
+        over = self.overrides.get(u)
+        if over is None:
+            return self.base[u]
+        merged = dict(self.base[u].items())
+        merged.update(over)
+        return merged
+
+    def keys(self):
+        return iter(self.base)
+
+    def cost(self, u, v):
+        over = self.overrides.get(u)
+        if over is not None and v in over:
+            return over[v]
+        return self.base[u][v]
+
+    def set_cost(self, u, v, cost):
+        base = self.base[u][v]  # KeyError when there is no such road
+        if cost < base:
+            raise ValueError(f"cost {cost} is below the map's {base}: the heuristic would overestimate")
+        changes = []
+        for a, b in ((u, v), (v, u)):
+            if b not in self.base[a]:
+                continue  # one-way arc in a directed CSR graph
+            old = self.cost(a, b)
+            if cost == self.base[a][b]:
+                self.overrides.get(a, {}).pop(b, None)
+                if not self.overrides.get(a, True):
+                    del self.overrides[a]
+            else:
+                self.overrides.setdefault(a, {})[b] = cost
+            if old != cost:
+                changes.append((a, b, old, cost))
+        return changes
+
+    # (u, v, cost) of every arc that differs from the map
+    def changed(self):
+        return [(u, v, cost) for u, over in self.overrides.items() for v, cost in over.items()]
+
+    def reset(self):
+        changes = [(u, v, cost, self.base[u][v]) for u, v, cost in self.changed()]
+        self.overrides.clear()
+        return changes
+
+# -------------------------
+# Lifelong Planning A* (Koenig & Likhachev)
+# -------------------------
+# A* that can repair its result when arc costs change. Every node has g (its
+# distance as of the last expansion) and rhs, a one-step lookahead:
+#     rhs(v) = min over neighbors u of g(u) + c(u, v)      (rhs(start) = 0)
+# A node is consistent when g = rhs. The queue holds the inconsistent nodes
+# keyed by (min(g, rhs) + h, min(g, rhs)). Expanding an overconsistent node
+# (g > rhs) sets g = rhs and lowers its neighbors' rhs, like an A* expansion;
+# an underconsistent one (g < rhs, a path got more expensive) resets g to inf
+# and recomputes rhs of the neighbors that depended on it. Planning stops once
+# the goal is consistent and no queued key is below the goal's.
+#
+# The first plan expands what A* would. After a cost change only the ends of
+# the changed arcs get a new rhs; the next plan expands just the nodes whose
+# distance the change actually affects, and those they affect in turn. bp(v)
+# remembers the neighbor giving rhs(v), so a cost increase only rescans the
+# nodes that were routed through the changed arc and the path is read off bp.
+#
+# Roads are two-way (as Landmarks.py and ContractionHierarchy.py assume): the
+# neighbors of v are also its predecessors. `h` must be consistent.
+#
+# replan_steps() yields one step per expansion in the RouteSearch format
+# ("pushed" / "removed" queue entries, with g = min(g, rhs) and f the first
+# key; the full "path" to the current node along bp; "plan" = 1 for the first
+# plan, 2, 3, ... for repairs). Its first step re-pushes the whole queue, so
+# every plan is a self-contained trace; closing it early stops the plan, and
+# the next one carries on from there. replan() plans without building steps
+# and returns the path. stats get the SearchStats counters of the last plan
+# (reexpanded = nodes some earlier plan expanded too) and "search" / "replan"
+# times.
+class LPAStar:
+    def __init__(self, graph, start, goal, h, stats=None):
+        self.graph, self.start, self.goal, self.h = graph, start, goal, h
+        self.g, self.rhs, self.bp = {}, {start: 0}, {}
+        self.queue = Frontier()
+        self.stats = stats
+        self.plans = 0
+        self.ever_expanded = set()
+        # queue changes since the last traced step, kept only while tracing
+        self._tracing, self._pushed, self._removed = False, [], {}
+        self._queue(start)
+
+    def key(self, u):
+        m = min(self.g.get(u, INF), self.rhs.get(u, INF))
+        return (m + self.h[u], m)
+
+    # Put u in the queue with its current key when inconsistent, take it out otherwise
+    def _queue(self, u):
+        g, rhs = self.g.get(u, INF), self.rhs.get(u, INF)
+        queue = self.queue
+        if g != rhs:
+            m = min(g, rhs)
+            item = {"name": u, "g": m, "h": self.h[u], "f": m + self.h[u]}
+            if u in queue:
+                queue.remove(u)
+            queue.push(u, (item["f"], m), item)
+            if self._tracing:
+                self._removed.pop(u, None)  # the step's removals are applied after its pushes
+                self._pushed.append(item)
+        elif u in queue:
+            queue.remove(u)
+            if self._tracing:
+                self._removed[u] = None
+
+    # rhs(v) from all its neighbors, after the one it came through got worse
+    def _rescan(self, v):
+        g, best, via = self.g, INF, None
+        for u, cost in self.graph[v].items():
+            d = g.get(u, INF) + cost
+            if d < best:
+                best, via = d, u
+        self.rhs[v], self.bp[v] = best, via
+
+    # Arc cost changes, as returned by LiveGraph.set_cost()
+    def update(self, changes):
+        g, rhs, bp = self.g, self.rhs, self.bp
+        for u, v, old, new in changes:
+            if v == self.start:
+                continue
+            if new < old:
+                if g.get(u, INF) + new < rhs.get(v, INF):
+                    rhs[v], bp[v] = g.get(u, INF) + new, u
+            elif bp.get(v) == u:
+                self._rescan(v)
+            self._queue(v)
+
+    def set_cost(self, u, v, cost):
+        changes = self.graph.set_cost(u, v, cost)
+        self.update(changes)
+        return changes
+
+    def reset(self):
+        changes = self.graph.reset()
+        self.update(changes)
+        return changes
+
+    @property
+    def cost(self):
+        return self.g.get(self.goal, INF)
+
+    # Path from the start to the goal (None when unreachable), or to u along bp
+    def path(self, u=None):
+        if u is None:
+            if self.cost == INF:
+                return None
+            u = self.goal
+        path, seen = [u], {u}
+        while u != self.start:
+            u = self.bp.get(u)
+            if u is None or u in seen:
+                return None
+            path.append(u)
+            seen.add(u)
+        path.reverse()
+        return path
+
+    def replan(self):
+        drain(self._plan(False))
+        return self.path()
+
+    def replan_steps(self):
+        return self._plan(True)
+
+    def _plan(self, trace):
+        started, hook, c = time.perf_counter(), on_expand(self.stats), counters()
+        g, rhs, bp, h = self.g, self.rhs, self.bp, self.h
+        graph, start, goal, queue = self.graph, self.start, self.goal, self.queue
+        self.plans += 1
+        plan = self.plans
+        if trace:
+            self._tracing, self._pushed, self._removed = True, list(queue.snapshot()), {}
+        expanded = set()
+        while queue and (queue.min_priority() < self.key(goal) or rhs.get(goal, INF) != g.get(goal, INF)):
+            c["peak_frontier"] = max(c["peak_frontier"], len(queue))
+            node = queue.pop()
+            u = node["name"]
+            c["expanded"] += 1
+            if u in self.ever_expanded: c["reexpanded"] += 1
+            self.ever_expanded.add(u)
+            expanded.add(u)
+            c["peak_closed"] = len(expanded)
+            if hook: hook(u, node["g"], node["h"])
+            if trace:
+                try:
+                    yield {"current": node, "pushed": self._pushed, "removed": list(self._removed), "expanded": [u],
+                           "path": self.path(u) or [u], "goal": goal, "algo": "LPA*", "stats": dict(c), "plan": plan}
+                except GeneratorExit:
+                    self._tracing = False
+                    self._queue(u)  # closed before expanding u: the next plan picks it up again
+                    raise
+                self._pushed, self._removed = [], {}
+            if g.get(u, INF) > rhs.get(u, INF):
+                # overconsistent: settle u and relax its arcs
+                g[u] = gu = rhs[u]
+                for v, cost in graph[u].items():
+                    c["generated"] += 1
+                    if v != start and gu + cost < rhs.get(v, INF):
+                        rhs[v], bp[v] = gu + cost, u
+                        self._queue(v)
+            else:
+                # underconsistent: forget g(u), rescan the nodes routed through u
+                g[u] = INF
+                for v in list(graph[u]):
+                    c["generated"] += 1
+                    if v != start and bp.get(v) == u:
+                        self._rescan(v)
+                        self._queue(v)
+                self._queue(u)
+        self._tracing, self._pushed, self._removed = False, [], {}
+        record(self.stats, c, "search" if plan == 1 else "replan", started)
+
+# -------------------------
+# Benchmark: repairs vs planning from scratch
+# -------------------------
+# On a random grid map (Benchmark.grid_graph), plans corner to corner, then
+# raises the cost of `changes` random roads one at a time, and after each one
+# times the LPA* repair against a fresh plan on the updated map. Changes far
+# from the route cost the repair next to nothing; --on-route picks roads of
+# the current route, the worst case.
+def main(argv=None):
+    from Benchmark import grid_graph
+
+    parser = argparse.ArgumentParser(description="Incremental replanning (LPA*) vs planning from scratch")
+    parser.add_argument("--size", type=int, default=40000, help="grid nodes (default: 40000)")
+    parser.add_argument("--changes", type=int, default=20, help="roads made more expensive, one at a time")
+    parser.add_argument("--penalty", type=float, default=3.0, help="cost multiplier of a changed road")
+    parser.add_argument("--on-route", action="store_true", help="only change roads of the current route")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    base = grid_graph(args.size, rng)
+    start, goal = 0, len(base) - 1
+    live = LiveGraph(base)
+    stats = {}
+    planner = LPAStar(live, start, goal, base.heuristic(goal), stats)
+    t0 = time.perf_counter()
+    path = planner.replan()
+    print(f"plan: cost {planner.cost:g}, {len(path) - 1} arcs, {stats['expanded']:,} expanded, "
+          f"{time.perf_counter() - t0:.3f}s")
+    repair_time = scratch_time = repair_nodes = scratch_nodes = 0
+    for _ in range(args.changes):
+        if args.on_route:
+            i = rng.randrange(len(path) - 1)
+            u, v = path[i], path[i + 1]
+        else:
+            u = rng.randrange(len(base))
+            v = rng.choice(list(base[u]))
+        planner.set_cost(u, v, live.cost(u, v) * args.penalty)
+        t0 = time.perf_counter()
+        path = planner.replan()
+        repair_time += time.perf_counter() - t0
+        repair_nodes += stats["expanded"]
+        fresh, scratch = {}, LPAStar(live, start, goal, planner.h)
+        scratch.stats = fresh
+        t0 = time.perf_counter()
+        scratch.replan()
+        scratch_time += time.perf_counter() - t0
+        scratch_nodes += fresh["expanded"]
+        if scratch.cost != planner.cost:
+            raise RuntimeError(f"repaired cost {planner.cost} != {scratch.cost} from scratch")
+    n = args.changes
+    print(f"repair:  {repair_nodes / n:10,.0f} expanded, {repair_time / n * 1000:8.2f} ms per change")
+    print(f"scratch: {scratch_nodes / n:10,.0f} expanded, {scratch_time / n * 1000:8.2f} ms per change")
+    print(f"speedup {scratch_time / repair_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import heapq
+import json
+from array import array
+
+INF = float("inf")
+
+# -------------------------
+# ALT heuristic (A*, Landmarks, Triangle inequality)
+# -------------------------
+# Preprocessing picks k landmark nodes and runs one Dijkstra from each,
+# storing the distance to every node in a flat array. For an undirected graph,
+# the triangle inequality gives for any landmark L:
+#     dist(n, goal) >= |d(L, goal) - d(L, n)|
+# and the max over all landmarks is an admissible (and consistent) heuristic
+# for *any* goal, with no hand-written table.
+#
+# Landmarks are chosen by farthest-point selection: start from the node
+# farthest from the first node, then repeatedly add the node farthest from all
+# landmarks chosen so far. Such landmarks sit "behind" most start/goal pairs,
+# where the bounds are tight.
+
+def dijkstra(graph, source):
+    dist = {source: 0}
+    pq = [(0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if d > dist[u]:
+            continue
+        for v, cost in graph[u].items():
+            nd = d + cost
+            if nd < dist.get(v, INF):
+                dist[v] = nd
+                heapq.heappush(pq, (nd, v))
+    return dist
+
+class Landmarks:
+    def __init__(self, graph, k=4, landmarks=None):
+        self.nodes = list(graph)
+        self.index = {n: i for i, n in enumerate(self.nodes)}
+        self.landmarks, self.distances = [], []
+        if landmarks is None:
+            landmarks = self._select(graph, k)
+        for landmark in landmarks:
+            self._add(graph, landmark)
+
+    def _add(self, graph, landmark):
+        dist = dijkstra(graph, landmark)
+        self.landmarks.append(landmark)
+        self.distances.append(array("d", (dist.get(n, INF) for n in self.nodes)))
+        return dist
+
+    def _select(self, graph, k):
+        k = min(k, len(self.nodes))
+        if not k:
+            return []
+        first = dijkstra(graph, self.nodes[0])
+        chosen = [max(self.nodes, key=lambda n: first.get(n, -1))]
+        closest = dijkstra(graph, chosen[0])  # distance to the nearest chosen landmark
+        while len(chosen) < k:
+            nxt = max((n for n in self.nodes if n not in chosen), key=lambda n: closest.get(n, INF))
+            chosen.append(nxt)
+            for n, d in dijkstra(graph, nxt).items():
+                if d < closest.get(n, INF):
+                    closest[n] = d
+        return chosen
+
+    def h(self, node, goal):
+        i, j = self.index[node], self.index[goal]
+        best = 0
+        for dist in self.distances:
+            a, b = dist[i], dist[j]
+            if a == INF or b == INF:
+                continue  # landmark does not reach both; it gives no bound
+            if abs(a - b) > best:
+                best = abs(a - b)
+        return int(best) if best == int(best) else best
+
+    # h(n) for every node towards one goal, as a dict like hSLD
+    def table(self, goal):
+        return {n: self.h(n, goal) for n in self.nodes}
+
+    # Distance arrays on disk: JSON header line, then one float64 array per landmark
+    def save(self, path):
+        with open(path, "wb") as fh:
+            fh.write(json.dumps({"nodes": self.nodes, "landmarks": self.landmarks}).encode() + b"\n")
+            for dist in self.distances:
+                dist.tofile(fh)
+
+    @classmethod
+    def load(cls, path):
+        self = cls.__new__(cls)
+        with open(path, "rb") as fh:
+            header = json.loads(fh.readline())
+            self.nodes, self.landmarks = header["nodes"], header["landmarks"]
+            self.index = {n: i for i, n in enumerate(self.nodes)}
+            self.distances = []
+            for _ in self.landmarks:
+                dist = array("d")
+                dist.fromfile(fh, len(self.nodes))
+                self.distances.append(dist)
+        return self
@@ -0,0 +1,260 @@
+import argparse
+import json
+import mmap
+import os
+import random
+import sys
+from array import array
+
+from SlidingPuzzle import astar, get_board
+
+# -------------------------
+# Additive disjoint pattern databases
+# -------------------------
+# The tiles are split into disjoint patterns (e.g. 5-5-5 for the 15-puzzle).
+# For each pattern the table stores, for every placement of its tiles, the
+# minimum number of moves *of those tiles* needed to bring them home. Moves of
+# other tiles are free, so the tables of disjoint patterns can be added and the
+# sum is still a lower bound on the real distance (and never below Manhattan).
+#
+# A placement is indexed as sum(pos[i] * n**i) over the pattern's tiles, with n
+# the number of cells. That wastes slots for impossible placements but lets the
+# search update the index with one add when a tile moves (see PatternDatabase.aux).
+#
+# File layout: one JSON header line padded to HEADER_SIZE bytes, then the tables
+# back to back, one byte per entry. Tables are memory-mapped read-only, so all
+# solver processes on a machine share one copy through the page cache.
+
+HEADER_SIZE = 4096
+UNSEEN = 255
+
+PDB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdb")
+
+# Default partitions per board width (consecutive tiles, i.e. row chunks)
+DEFAULT_PARTITIONS = {3: "4-4", 4: "5-5-5", 5: "5-5-5-5-4"}
+
+def split_tiles(width, partition):
+    sizes = [int(x) for x in partition.split("-")]
+    if sum(sizes) != width * width - 1:
+        raise ValueError(f"partition {partition} does not cover the {width * width - 1} tiles")
+    patterns, tile = [], 1
+    for k in sizes:
+        patterns.append(list(range(tile, tile + k)))
+        tile += k
+    return patterns
+
+def default_path(width, partition=None):
+    partition = partition or DEFAULT_PARTITIONS[width]
+    return os.path.join(PDB_DIR, f"{width}x{width}-{partition}.pdb")
+
+# -------------------------
+# Building (retrograde BFS from the goal)
+# -------------------------
+# The abstract state is (placement of the pattern tiles, region of the blank).
+# Blank moves through non-pattern cells cost nothing, so instead of tracking the
+# blank cell we track the connected empty region it is in (named by its lowest
+# cell). Every edge of this abstract graph is one move of a pattern tile, and a
+# plain layered BFS gives exact pattern costs.
+def _grid_masks(width):
+    size = width * width
+    full = (1 << size) - 1
+    not_left = full & ~sum(1 << (r * width) for r in range(width))
+    not_right = full & ~sum(1 << (r * width + width - 1) for r in range(width))
+    return full, not_left, not_right
+
+def build_table(width, tiles, log=None):
+    board = get_board(width)
+    n, k = board.size, len(tiles)
+    full, not_left, not_right = _grid_masks(width)
+    power = [n ** i for i in range(k)]
+
+    def region_of(cell, free):
+        region = 1 << cell
+        while True:
+            grown = (region | (region << width) | (region >> width)
+                     | ((region << 1) & not_left) | ((region >> 1) & not_right)) & free
+            if grown == region:
+                return region
+            region = grown
+
+    def lowest(mask):
+        return (mask & -mask).bit_length() - 1
+
+    table = bytearray([UNSEEN]) * (n ** k)
+    visited = bytearray((n ** k * n + 7) // 8)
+
+    goal_idx = sum(t * power[i] for i, t in enumerate(tiles))
+    goal_free = full & ~sum(1 << t for t in tiles)
+    canon = lowest(region_of(0, goal_free))
+    code = goal_idx * n + canon
+    visited[code >> 3] |= 1 << (code & 7)
+    table[goal_idx] = 0
+
+    layer = array("Q", [code])
+    depth = 0
+    while layer:
+        next_layer = array("Q")
+        for code in layer:
+            idx, canon = divmod(code, n)
+            pos, rest = [], idx
+            for _ in range(k):
+                rest, p = divmod(rest, n)
+                pos.append(p)
+            occupied = sum(1 << p for p in pos)
+            free = full & ~occupied
+            region = region_of(canon, free)
+            for i, p in enumerate(pos):
+                for q in board.moves[p]:
+                    if not (region >> q) & 1:
+                        continue
+                    # tile i slides from p into the blank at q
+                    new_idx = idx + (q - p) * power[i]
+                    new_free = (free & ~(1 << q)) | (1 << p)
+                    new_code = new_idx * n + lowest(region_of(p, new_free))
+                    if visited[new_code >> 3] & (1 << (new_code & 7)):
+                        continue
+                    visited[new_code >> 3] |= 1 << (new_code & 7)
+                    next_layer.append(new_code)
+                    if table[new_idx] == UNSEEN:
+                        table[new_idx] = depth + 1
+        depth += 1
+        if log and next_layer:
+            log(f"  tiles {tiles}: depth {depth}, {len(next_layer)} states")
+        layer = next_layer
+    return table
+
+def build(width, partition=None, path=None, log=None):
+    partition = partition or DEFAULT_PARTITIONS[width]
+    path = path or default_path(width, partition)
+    patterns = split_tiles(width, partition)
+    tables = []
+    for tiles in patterns:
+        if log:
+            log(f"building pattern {tiles}")
+        tables.append(build_table(width, tiles, log))
+    header = json.dumps({"width": width, "patterns": patterns,
+                         "sizes": [len(t) for t in tables]}).encode()
+    if len(header) >= HEADER_SIZE:
+        raise ValueError("pattern database header too large")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(header + b"\n" + b"\0" * (HEADER_SIZE - len(header) - 1))
+        for table in tables:
+            fh.write(table)
+    os.replace(tmp, path)
+    return path
+
+# -------------------------
+# Loading and lookups
+# -------------------------
+# The search carries one integer `aux` holding every pattern's placement index
+# in its own bit field. When tile t slides from j to b, aux changes by
+# (b - j) * weight[t], so h(n) of a child costs one add plus one byte lookup
+# per pattern.
+class PatternDatabase:
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            header = json.loads(fh.read(HEADER_SIZE).split(b"\n", 1)[0])
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.width = header["width"]
+        self.patterns = header["patterns"]
+        n = self.width * self.width
+
+        view = memoryview(self._mmap)
+        self.tables, self.fields, self.weight = [], [], [0] * n
+        start, shift = HEADER_SIZE, 0
+        for tiles, size in zip(self.patterns, header["sizes"]):
+            if size != n ** len(tiles):
+                raise ValueError(f"{path}: bad table size for pattern {tiles}")
+            table = view[start:start + size]
+            bits = (size - 1).bit_length()
+            self.tables.append(table)
+            self.fields.append((table, shift, (1 << bits) - 1))
+            for i, t in enumerate(tiles):
+                self.weight[t] = (n ** i) << shift
+            start += size
+            shift += bits
+        if start > len(self._mmap):
+            raise ValueError(f"{path}: truncated pattern database")
+
+    def aux(self, state):
+        return sum((i * self.weight[val]) for i, val in enumerate(state))
+
+    def value(self, aux):
+        return sum(table[(aux >> shift) & mask] for table, shift, mask in self.fields)
+
+    def h(self, state):
+        return self.value(self.aux(state))
+
+_loaded = {}
+
+def load(path):
+    pdb = _loaded.get(path)
+    if pdb is None:
+        pdb = _loaded[path] = PatternDatabase(path)
+    return pdb
+
+# Default database for a board width, or None when it has not been built yet
+def load_default(width):
+    if width not in DEFAULT_PARTITIONS:
+        return None
+    path = default_path(width)
+    return load(path) if os.path.exists(path) else None
+
+# -------------------------
+# Consistency check
+# -------------------------
+# Random solvable states (random walks from the goal): the PDB sum must be at
+# least Manhattan, per pattern and in total, and for boards small enough to
+# solve with A* it must not exceed the optimal solution length.
+def check(path, samples=200, seed=0, log=print):
+    pdb = load(path)
+    board = get_board(pdb.width)
+    rng = random.Random(seed)
+    goal_aux = pdb.aux(board.goal)
+    if pdb.value(goal_aux) != 0:
+        raise AssertionError("goal state has non-zero PDB value")
+    for _ in range(samples):
+        state, blank = list(board.goal), 0
+        for _ in range(rng.randrange(20, 200)):
+            j = rng.choice(board.moves[blank])
+            state[blank], state[j] = state[j], state[blank]
+            blank = j
+        state = tuple(state)
+        aux = pdb.aux(state)
+        for (table, shift, mask), tiles in zip(pdb.fields, pdb.patterns):
+            md = sum(board.dist[val * board.size + i] for i, val in enumerate(state) if val in tiles)
+            if table[(aux >> shift) & mask] < md:
+                raise AssertionError(f"pattern {tiles} below Manhattan on {state}")
+        h = pdb.value(aux)
+        if pdb.width <= 3:
+            optimal = len(astar(state)) - 1
+            if h > optimal:
+                raise AssertionError(f"PDB {h} exceeds optimal {optimal} on {state}")
+    log(f"{path}: {len(pdb.patterns)} tables ok on {samples} samples")
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and check additive pattern databases")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="build a PDB with a retrograde BFS")
+    b.add_argument("--width", type=int, default=4)
+    b.add_argument("--partition", help="pattern sizes, e.g. 5-5-5 or 6-6-3")
+    b.add_argument("-o", "--output", help="output file (default: pdb/<w>x<w>-<partition>.pdb)")
+    c = sub.add_parser("check", help="load a PDB and verify it against Manhattan")
+    c.add_argument("path")
+    c.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        log = lambda msg: print(msg, file=sys.stderr)
+        path = build(args.width, args.partition, args.output, log)
+        print(path)
+        check(path)
+    else:
+        check(args.path, args.samples)
+
+if __name__ == "__main__":
+    main()
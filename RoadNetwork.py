@@ -0,0 +1,395 @@
+import argparse
+import csv
+import json
+import math
+import mmap
+import os
+import sys
+import time
+from array import array
+
+# -------------------------
+# Road networks as CSR arrays
+# -------------------------
+# Nodes are numbered 0..n-1. The arcs leaving node u are
+#     targets[offsets[u]:offsets[u+1]]   with costs   weights[same slice]
+# and node u sits at (coords[2u], coords[2u+1]). Four flat arrays, no per-node
+# Python objects, so a few million nodes take tens of MB instead of GBs.
+#
+# CSRGraph behaves like the dict-of-dicts Romania graph (graph[u] -> neighbor
+# view with .items(), iteration, graph[u][v]), so the trace functions in
+# RouteSearch.py and the Dijkstra in Landmarks.py run on it unchanged.
+#
+# Input formats:
+#   DIMACS   .gr ("a u v w" arcs, 1-based ids) plus optional .co ("v id x y",
+#            longitude/latitude in millionths of a degree)
+#   CSV      header source,target,weight[,source_x,source_y,target_x,target_y];
+#            node ids are free-form labels, edges are two-way unless --directed
+#
+# Parsing text is slow, so the arrays are cached next to the input as <input>.csr
+# and memory-mapped on the next load: startup is then O(1) and every process
+# on the machine shares the pages.
+#
+#   python RoadNetwork.py convert USA-road-d.NY.gr --coords USA-road-d.NY.co
+#   python RoadNetwork.py route USA-road-d.NY.gr 1 5000
+
+MAGIC = b"CSRGRAPH"
+EARTH_RADIUS = 6371008.8  # metres
+ALGORITHMS = ("A*", "GBFS")
+
+# -------------------------
+# Graph views
+# -------------------------
+class Neighbors:
+    __slots__ = ("targets", "weights")
+
+    def __init__(self, targets, weights):
+        self.targets, self.weights = targets, weights
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __iter__(self):
+        return iter(self.targets)
+
+    def __contains__(self, v):
+        return v in self.targets
+
+    def __getitem__(self, v):
+        for t, w in zip(self.targets, self.weights):
+            if t == v:
+                return w
+        raise KeyError(v)
+
+    def keys(self):
+        return iter(self.targets)
+
+    def items(self):
+        return zip(self.targets, self.weights)
+
+class Positions:
+    def __init__(self, coords):
+        self.coords = coords
+
+    def __len__(self):
+        return len(self.coords) // 2
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __contains__(self, u):
+        return isinstance(u, int) and 0 <= u < len(self)
+
+    def __getitem__(self, u):
+        return self.coords[2 * u], self.coords[2 * u + 1]
+
+# Straight-line lower bound towards one goal, indexable like hSLD. `scale` is
+# the smallest cost per unit of straight-line distance over all arcs, so for
+# every arc h(u) - h(v) <= scale * dist(u, v) <= cost(u, v): the heuristic is
+# consistent whatever the arc costs measure (metres, seconds, ...). With integer
+# costs it is rounded down, which keeps it consistent and keeps f integral.
+class StraightLine:
+    def __init__(self, network, goal):
+        self.network, self.goal = network, goal
+        self.scale = network.scale
+        self.integral = network.weights.format == "q"
+
+    def __getitem__(self, u):
+        if not self.scale:
+            return 0
+        h = self.scale * self.network.distance(u, self.goal)
+        return math.floor(h) if self.integral else h
+
+class CSRGraph:
+    def __init__(self, offsets, targets, weights, coords=None, meta=None):
+        meta = meta or {}
+        self.offsets, self.targets, self.weights = memoryview(offsets), memoryview(targets), memoryview(weights)
+        self.coords = memoryview(coords) if coords is not None and len(coords) else None
+        self.n = len(self.offsets) - 1
+        self.metric = meta.get("metric", "euclid")
+        self.names = meta.get("names")
+        self.base = meta.get("base", 0)
+        self.scale = meta.get("scale")
+        self.path = None
+        self._index = None
+        if self.scale is None:
+            self.scale = self._min_cost_per_distance()
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(range(self.n))
+
+    def __contains__(self, u):
+        return isinstance(u, int) and 0 <= u < self.n
+
+    def __getitem__(self, u):
+        a, b = self.offsets[u], self.offsets[u + 1]
+        return Neighbors(self.targets[a:b], self.weights[a:b])
+
+    def keys(self):
+        return iter(range(self.n))
+
+    @property
+    def num_arcs(self):
+        return len(self.targets)
+
+    @property
+    def positions(self):
+        return Positions(self.coords) if self.coords is not None else None
+
+    # Node id <-> label as written in the input file
+    def node(self, label):
+        if self.names is None:
+            return int(label) - self.base
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index[str(label)]
+
+    def label(self, u):
+        return self.names[u] if self.names is not None else str(u + self.base)
+
+    def distance(self, u, v):
+        c = self.coords
+        x1, y1, x2, y2 = c[2 * u], c[2 * u + 1], c[2 * v], c[2 * v + 1]
+        if self.metric == "geo":
+            # haversine, coordinates are longitude/latitude in degrees
+            p1, p2 = math.radians(y1), math.radians(y2)
+            a = (math.sin((p2 - p1) / 2) ** 2
+                 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(x2 - x1) / 2) ** 2)
+            return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+        return math.hypot(x2 - x1, y2 - y1)
+
+    def heuristic(self, goal):
+        return StraightLine(self, goal)
+
+    def _min_cost_per_distance(self):
+        if self.coords is None:
+            return 0
+        best = math.inf
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        for u in range(self.n):
+            for i in range(offsets[u], offsets[u + 1]):
+                d = self.distance(u, targets[i])
+                if d > 0 and weights[i] < best * d:
+                    best = weights[i] / d
+        # a hair below the minimum so float rounding cannot break admissibility
+        return 0 if best == math.inf else best * (1 - 1e-9)
+
+    # -------------------------
+    # Binary cache
+    # -------------------------
+    # MAGIC, 8-byte header length, JSON header, padding to 8 bytes, then the
+    # arrays offsets (q), weights (q or d), coords (d), targets (i) in native
+    # byte order. Every array starts 8-byte aligned.
+    def save(self, path):
+        meta = {"n": self.n, "m": self.num_arcs, "metric": self.metric, "names": self.names,
+                "base": self.base, "scale": self.scale, "weights": self.weights.format,
+                "coords": self.coords is not None, "byteorder": sys.byteorder}
+        header = json.dumps(meta).encode()
+        header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for view in (self.offsets, self.weights, self.coords, self.targets):
+                if view is not None:
+                    fh.write(view.tobytes())
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a CSR graph file")
+            size = int.from_bytes(fh.read(8), "little")
+            meta = json.loads(fh.read(size))
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: written on a {meta['byteorder']}-endian machine")
+        n, m = meta["n"], meta["m"]
+        view, start = memoryview(mm), len(MAGIC) + 8 + size
+        arrays = []
+        for code, count in (("q", n + 1), (meta["weights"], m), ("d", 2 * n if meta["coords"] else 0), ("i", m)):
+            nbytes = count * array(code).itemsize
+            if start + nbytes > len(mm):
+                raise ValueError(f"{path}: truncated CSR graph file")
+            arrays.append(view[start:start + nbytes].cast(code))
+            start += nbytes
+        offsets, weights, coords, targets = arrays
+        self = cls(offsets, targets, weights, coords, meta)
+        self.path, self._mmap = path, mm
+        return self
+
+# -------------------------
+# Building from arc lists
+# -------------------------
+# Counting sort of the arcs by source node. Parallel arcs keep the cheapest
+# cost, so graph[u][v] and graph[u].items() agree.
+def from_arcs(n, sources, targets, weights, coords=None, meta=None):
+    integral = all(float(w).is_integer() for w in weights)
+    offsets = array("q", bytes(8 * (n + 1)))
+    for u in sources:
+        offsets[u + 1] += 1
+    for u in range(n):
+        offsets[u + 1] += offsets[u]
+    fill = array("q", offsets[:-1])
+    out_targets = array("i", bytes(4 * len(sources)))
+    out_weights = array("q" if integral else "d", bytes(8 * len(sources)))
+    for u, v, w in zip(sources, targets, weights):
+        i = fill[u]
+        out_targets[i], out_weights[i] = v, int(w) if integral else w
+        fill[u] = i + 1
+
+    keep_t, keep_w = array("i"), array(out_weights.typecode)
+    new_offsets, deduped = array("q", [0]), False
+    for u in range(n):
+        a, b = offsets[u], offsets[u + 1]
+        best = {}
+        for i in range(a, b):
+            v, w = out_targets[i], out_weights[i]
+            if v not in best or w < best[v]:
+                best[v] = w
+        deduped |= len(best) != b - a
+        keep_t.extend(best)
+        keep_w.extend(best.values())
+        new_offsets.append(len(keep_t))
+    if deduped:
+        offsets, out_targets, out_weights = new_offsets, keep_t, keep_w
+    return CSRGraph(offsets, out_targets, out_weights, coords, meta)
+
+def read_dimacs(gr_path, co_path=None):
+    n, sources, targets, weights = 0, array("i"), array("i"), array("d")
+    with open(gr_path) as fh:
+        for line in fh:
+            if line.startswith("a "):
+                _, u, v, w = line.split()
+                sources.append(int(u) - 1)
+                targets.append(int(v) - 1)
+                weights.append(float(w))
+            elif line.startswith("p "):
+                n = int(line.split()[2])
+    coords = None
+    if co_path:
+        coords = array("d", bytes(16 * n))
+        with open(co_path) as fh:
+            for line in fh:
+                if line.startswith("v "):
+                    _, u, x, y = line.split()
+                    u = int(u) - 1
+                    coords[2 * u], coords[2 * u + 1] = int(x) / 1e6, int(y) / 1e6
+    return from_arcs(n, sources, targets, weights, coords, {"metric": "geo", "base": 1})
+
+def read_csv(path, directed=False, geo=False):
+    index, names = {}, []
+    sources, targets, weights = array("i"), array("i"), array("d")
+    xy = {}
+
+    def node(label):
+        u = index.get(label)
+        if u is None:
+            u = index[label] = len(names)
+            names.append(label)
+        return u
+
+    with open(path, newline="") as fh:
+        reader = csv.DictReader(fh)
+        missing = {"source", "target", "weight"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+        has_xy = {"source_x", "source_y", "target_x", "target_y"} <= set(reader.fieldnames)
+        for row in reader:
+            u, v, w = node(row["source"]), node(row["target"]), float(row["weight"])
+            sources.append(u); targets.append(v); weights.append(w)
+            if not directed:
+                sources.append(v); targets.append(u); weights.append(w)
+            if has_xy:
+                xy[u] = (float(row["source_x"]), float(row["source_y"]))
+                xy[v] = (float(row["target_x"]), float(row["target_y"]))
+    coords = None
+    if xy:
+        coords = array("d")
+        for u in range(len(names)):
+            coords.extend(xy.get(u, (0.0, 0.0)))
+    meta = {"metric": "geo" if geo else "euclid", "names": names}
+    return from_arcs(len(names), sources, targets, weights, coords, meta)
+
+# -------------------------
+# Loading with the binary cache
+# -------------------------
+# A .csr file is mapped directly. For a text input, <input>.csr is used when it
+# is newer than the input (and the .co file); otherwise the text is parsed and,
+# with cache=True, the cache is written for next time.
+def cache_path(path):
+    return path + ".csr"
+
+# DIMACS coordinates usually sit next to the arcs: USA-road-d.NY.gr / .co
+def default_coords(path):
+    co = path[:-3] + ".co"
+    return co if path.endswith(".gr") and os.path.exists(co) else None
+
+def load(path, coords=None, directed=False, geo=False, cache=True):
+    if path.endswith(".csr"):
+        return CSRGraph.open(path)
+    cached = cache_path(path)
+    sources = [path] + ([coords or default_coords(path)] if path.endswith(".gr") else [])
+    sources = [s for s in sources if s]
+    if cache and os.path.exists(cached) and all(os.path.getmtime(cached) >= os.path.getmtime(s) for s in sources):
+        return CSRGraph.open(cached)
+    if path.endswith(".gr"):
+        network = read_dimacs(path, coords or default_coords(path))
+    else:
+        network = read_csv(path, directed, geo)
+    if cache:
+        network.save(cached)
+        network.path = cached
+    return network
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load road networks into CSR arrays and search them")
+    sub = parser.add_subparsers(dest="command", required=True)
+    c = sub.add_parser("convert", help="parse a DIMACS .gr or edge-list CSV and write the binary cache")
+    c.add_argument("input")
+    c.add_argument("--coords", help="DIMACS .co file (default: next to the .gr)")
+    c.add_argument("--directed", action="store_true", help="CSV edges are one-way")
+    c.add_argument("--geo", action="store_true", help="CSV coordinates are longitude/latitude")
+    c.add_argument("-o", "--output", help="binary file (default: <input>.csr)")
+    r = sub.add_parser("route", help="run a traced search between two nodes")
+    r.add_argument("input", help=".gr, .csv or .csr file")
+    r.add_argument("start")
+    r.add_argument("goal")
+    r.add_argument("-a", "--algorithm", choices=ALGORITHMS, default="A*")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    if args.command == "convert":
+        if args.input.endswith(".gr"):
+            network = read_dimacs(args.input, args.coords or default_coords(args.input))
+        else:
+            network = read_csv(args.input, args.directed, args.geo)
+        out = network.save(args.output or cache_path(args.input))
+        print(f"{out}: {network.n} nodes, {network.num_arcs} arcs, "
+              f"{time.perf_counter() - t0:.2f}s")
+        return
+
+    from RouteSearch import astar_trace, gbfs_trace, path_cost
+    network = load(args.input)
+    print(f"loaded {network.n} nodes, {network.num_arcs} arcs in {time.perf_counter() - t0:.2f}s",
+          file=sys.stderr)
+    search = astar_trace if args.algorithm == "A*" else gbfs_trace
+    start, goal = network.node(args.start), network.node(args.goal)
+    t0 = time.perf_counter()
+    trace = search(start, goal, network)
+    elapsed = time.perf_counter() - t0
+    last = trace[-1] if trace else None
+    if last is None or last["current"]["name"] != goal:
+        print(f"no route from {args.start} to {args.goal}")
+        return
+    path = last["path"]
+    cost = path_cost(path, network)
+    print(" -> ".join(network.label(u) for u in path))
+    print(f"cost {cost}, {len(path) - 1} arcs, {len(trace)} expanded, {elapsed:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,462 @@
+import time
+from functools import lru_cache
+import ContractionHierarchy
+from Frontier import Frontier
+from Landmarks import Landmarks
+from LPAStar import LiveGraph, LPAStar
+from SearchStats import counters, on_expand, record
+from TraceStore import TraceStore
+
+# -------------------------
+# Route search core (no UI)
+# -------------------------
+# The Romania map and the traced searches used by Compare.py. Every trace
+# function takes an optional `graph` and `h`: `graph` is anything indexable as
+# graph[node] -> {neighbor: cost} (the dict below, or a RoadNetwork CSRGraph),
+# and `h` is anything indexable as h[node] (defaults to heuristic_for(goal, graph)).
+# Every step carries the SearchStats counters so far under "stats"; an optional
+# `stats` mapping gets the final counters and the search time.
+#
+# Each algorithm is written as a generator, <name>_steps, that yields its
+# steps while it searches, so a UI can show the first steps of a long search
+# and stop it (close the generator) at any time. Steps only carry what changed
+# ("expanded": nodes added, GBFS/A* "pushed"/"removed" frontier entries and the
+# "parent" of the current node, or the full "frontier" and "path" of the
+# memory-bounded searches); a TraceStore (TraceStore.py) turns them into full
+# steps on demand. <name>_trace records them all into one.
+
+# Romania graph
+graph = {
+    "Arad": {"Zerind": 75, "Sibiu": 140, "Timisoara": 118},
+    "Zerind": {"Arad": 75, "Oradea": 71},
+    "Oradea": {"Zerind": 71, "Sibiu": 151},
+    "Sibiu": {"Arad": 140, "Oradea": 151, "Fagaras": 99, "Rimnicu Vilcea": 80},
+    "Fagaras": {"Sibiu": 99, "Bucharest": 211},
+    "Rimnicu Vilcea": {"Sibiu": 80, "Pitesti": 97, "Craiova": 146},
+    "Pitesti": {"Rimnicu Vilcea": 97, "Craiova": 138, "Bucharest": 101},
+    "Timisoara": {"Arad": 118, "Lugoj": 111},
+    "Lugoj": {"Timisoara": 111, "Mehadia": 70},
+    "Mehadia": {"Lugoj": 70, "Drobeta": 75},
+    "Drobeta": {"Mehadia": 75, "Craiova": 120},
+    "Craiova": {"Drobeta": 120, "Pitesti": 138, "Rimnicu Vilcea": 146},
+    "Bucharest": {"Fagaras": 211, "Pitesti": 101, "Giurgiu": 90, "Urziceni": 85},
+    "Urziceni": {"Bucharest": 85, "Hirsova": 98, "Vaslui": 142},
+    "Hirsova": {"Urziceni": 98, "Eforie": 86},
+    "Eforie": {"Hirsova": 86},
+    "Vaslui": {"Urziceni": 142, "Iasi": 92},
+    "Iasi": {"Vaslui": 92, "Neamt": 87},
+    "Neamt": {"Iasi": 87},
+    "Giurgiu": {"Bucharest": 90},
+}
+
+# Heuristic (SLD to Bucharest)
+hSLD = {
+    "Arad": 366, "Bucharest": 0, "Craiova": 160, "Drobeta": 242, "Eforie": 161,
+    "Fagaras": 176, "Giurgiu": 77, "Hirsova": 151, "Iasi": 226, "Lugoj": 244,
+    "Mehadia": 241, "Neamt": 234, "Oradea": 380, "Pitesti": 100,
+    "Rimnicu Vilcea": 193, "Sibiu": 253, "Timisoara": 329,
+    "Urziceni": 80, "Vaslui": 199, "Zerind": 374
+}
+
+positions = {
+    "Arad": (1, 3), "Zerind": (0, 4), "Oradea": (0.5, 5), "Sibiu": (2, 4),
+    "Fagaras": (3, 5), "Rimnicu Vilcea": (3, 3), "Pitesti": (4, 2.5),
+    "Timisoara": (0, 2), "Lugoj": (1, 1.5), "Mehadia": (2, 1),
+    "Drobeta": (2.5, 0.5), "Craiova": (3.5, 1.5), "Bucharest": (5, 2),
+    "Urziceni": (6, 2.5), "Hirsova": (7, 3), "Eforie": (8, 2.5),
+    "Vaslui": (6, 4), "Iasi": (6.5, 5), "Neamt": (6.5, 6), "Giurgiu": (5, 1)
+}
+
+ROMANIA = graph
+
+# Helpers
+def reconstruct(parent, node):
+    path = []
+    while node is not None:  # node ids of a CSR graph start at 0
+        path.insert(0, node)
+        node = parent.get(node)
+    return path
+
+def path_cost(path, graph=ROMANIA):
+    return sum(graph[path[i]][path[i+1]] for i in range(len(path)-1))
+
+# Heuristic towards any goal city. hSLD is only valid for Bucharest; every
+# other goal uses ALT lower bounds from landmark distances (Landmarks.py),
+# which are admissible for any goal. Other graphs bring their own heuristic
+# (a RoadNetwork CSRGraph derives one from its node coordinates).
+LANDMARK_COUNT = 4
+landmarks = Landmarks(graph, k=LANDMARK_COUNT)
+
+@lru_cache(maxsize=None)
+def romania_heuristic(goal):
+    if goal=="Bucharest": return hSLD
+    return landmarks.table(goal)
+
+def heuristic_for(goal, graph=ROMANIA):
+    if graph is ROMANIA: return romania_heuristic(goal)
+    return graph.heuristic(goal)
+
+# GBFS
+# Frontier (Frontier.py) holds each city once, ordered by h; ties go to the
+# city queued first. A city seen again keeps its place but takes the new parent.
+def gbfs_trace(start, goal, graph=ROMANIA, h=None, stats=None):
+    return TraceStore.record(gbfs_steps(start, goal, graph, h, stats))
+
+def gbfs_steps(start, goal, graph=ROMANIA, h=None, stats=None):
+    started, hook, c = time.perf_counter(), on_expand(stats), counters()
+    if h is None: h = heuristic_for(goal, graph)
+    frontier, pushed = Frontier(), []
+
+    def push(key, priority, item):
+        if not frontier.push(key, priority, item): return False
+        pushed.append(item)
+        return True
+
+    push(start, h[start], {"name": start, "h": h[start]})
+    expanded, parent = set(), {}
+    while frontier:
+        c["peak_frontier"] = max(c["peak_frontier"], len(frontier))
+        node = frontier.pop()
+        expanded.add(node["name"])
+        c["expanded"] += 1; c["peak_closed"] = len(expanded)
+        if hook: hook(node["name"], None, node["h"])
+        yield {"current": node, "pushed": pushed, "expanded": [node["name"]],
+               "parent": parent.get(node["name"]), "goal": goal, "algo": "GBFS", "stats": dict(c)}
+        pushed = []
+        if node["name"]==goal: break
+        for nbr in graph[node["name"]]:
+            c["generated"] += 1
+            if nbr not in expanded:
+                parent[nbr] = node["name"]
+                queued = nbr in frontier
+                if push(nbr, h[nbr], {"name": nbr, "h": h[nbr]}) and queued: c["duplicates"] += 1
+    record(stats, c, "search", started)
+
+# A*
+# A cheaper path to a queued city replaces its frontier entry (decrease-key).
+# With a weight w > 1 it is weighted A* ("WA*"): f = g + w*h, which goes
+# straight for the goal and returns a path at most w times the optimal cost
+# (every heuristic here is consistent, so expanded cities need not be
+# reopened). Its steps carry "w".
+def astar_trace(start, goal, graph=ROMANIA, h=None, stats=None, w=1):
+    return TraceStore.record(astar_steps(start, goal, graph, h, stats, w))
+
+def astar_steps(start, goal, graph=ROMANIA, h=None, stats=None, w=1):
+    started, hook, c = time.perf_counter(), on_expand(stats), counters()
+    if h is None: h = heuristic_for(goal, graph)
+    frontier, pushed, removed = Frontier(), [], []
+    algo, extra = ("A*", {}) if w == 1 else ("WA*", {"w": w})
+
+    def push(key, priority, item):
+        if not frontier.push(key, priority, item): return False
+        pushed.append(item)
+        return True
+
+    push(start, w*h[start], {"name": start, "g": 0, "h": h[start], "f": w*h[start]})
+    expanded, parent, g = set(), {}, {start:0}
+    while frontier:
+        c["peak_frontier"] = max(c["peak_frontier"], len(frontier))
+        node = frontier.pop()
+        if node["name"] in expanded:
+            removed.append(node["name"])
+            continue
+        expanded.add(node["name"])
+        c["expanded"] += 1; c["peak_closed"] = len(expanded)
+        if hook: hook(node["name"], node["g"], node["h"])
+        yield {"current": node, "pushed": pushed, "removed": removed, "expanded": [node["name"]],
+               "parent": parent.get(node["name"]), "goal": goal, "algo": algo, "stats": dict(c), **extra}
+        pushed, removed = [], []
+        if node["name"]==goal: break
+        for nbr, cost in graph[node["name"]].items():
+            c["generated"] += 1
+            new_g = g[node["name"]] + cost
+            if nbr not in g or new_g<g[nbr]:
+                if nbr in frontier: c["duplicates"] += 1  # decrease-key leaves a stale heap entry
+                g[nbr]=new_g
+                parent[nbr]=node["name"]
+                push(nbr, new_g+w*h[nbr], {"name": nbr, "g": new_g, "h": h[nbr], "f": new_g+w*h[nbr]})
+    record(stats, c, "search", started)
+
+INF = float("inf")
+
+# ARA* (Anytime Repairing A*)
+# WA* runs with w = ARA_WEIGHT, then ARA_STEP less each time down to 1, that
+# keep the search tree instead of starting over, as in
+# SlidingPuzzle.ara_star_steps(). A city expanded in the current run whose g
+# improves waits in INCONS, and a run ends once no frontier f is below the
+# goal's g. The goal is never expanded: each run ends with a step on the goal
+# carrying "incumbent" (its cost) and "bound", the proven suboptimality
+# min(w, cost / smallest g + h still waiting). The next run re-keys the
+# frontier plus INCONS with the smaller weight, so only cities whose g improved
+# are expanded again. Every step carries "w"; the search stops when the bound
+# reaches 1, and closing it early keeps the incumbent as the answer.
+ARA_WEIGHT = 2.5
+ARA_STEP = 0.5
+
+def ara_trace(start, goal, graph=ROMANIA, h=None, stats=None, w=ARA_WEIGHT, step=ARA_STEP):
+    return TraceStore.record(ara_steps(start, goal, graph, h, stats, w, step))
+
+def ara_steps(start, goal, graph=ROMANIA, h=None, stats=None, w=ARA_WEIGHT, step=ARA_STEP):
+    started, hook, c = time.perf_counter(), on_expand(stats), counters()
+    if h is None: h = heuristic_for(goal, graph)
+    frontier, pushed, g, parent = Frontier(), [], {start: 0}, {}
+    closed, incons, seen, found = set(), {}, set(), {}
+
+    def push(name):
+        f = g[name] + w*h[name]
+        item = {"name": name, "g": g[name], "h": h[name], "f": f}
+        if frontier.push(name, f, item): pushed.append(item)
+
+    push(start)
+    while True:
+        goal_g = g.get(goal, INF)
+        while frontier.min_priority() < goal_g:
+            c["peak_frontier"] = max(c["peak_frontier"], len(frontier) + len(incons))
+            node = frontier.pop()
+            name = node["name"]
+            closed.add(name)
+            c["expanded"] += 1; c["peak_closed"] = max(c["peak_closed"], len(closed))
+            if name in seen: c["reexpanded"] += 1
+            seen.add(name)
+            if hook: hook(name, node["g"], node["h"])
+            yield {"current": node, "pushed": pushed, "expanded": [name], "parent": parent.get(name),
+                   "goal": goal, "algo": "ARA*", "stats": dict(c), "w": w, **found}
+            pushed = []
+            for nbr, cost in graph[name].items():
+                c["generated"] += 1
+                new_g = g[name] + cost
+                if nbr in g and new_g >= g[nbr]: continue
+                if nbr in frontier or nbr in incons: c["duplicates"] += 1
+                g[nbr], parent[nbr] = new_g, name
+                if nbr == goal: goal_g = new_g
+                if nbr in closed: incons[nbr] = None
+                else: push(nbr)
+        if goal_g == INF: break
+        if goal in frontier: frontier.remove(goal)
+        lower = min([goal_g] + [e["g"] + e["h"] for e in frontier.snapshot()] + [g[n] + h[n] for n in incons])
+        found = {"incumbent": goal_g, "bound": min(w, goal_g / lower) if lower else 1.0}
+        yield {"current": {"name": goal, "g": goal_g, "h": h[goal], "f": goal_g + w*h[goal]}, "pushed": pushed,
+               "expanded": [], "parent": parent.get(goal), "goal": goal, "algo": "ARA*", "stats": dict(c),
+               "w": w, **found}
+        pushed = []
+        if found["bound"] <= 1: break
+        # next run: everything still waiting, re-keyed with the smaller weight
+        w = max(1, w - step)
+        waiting = [e["name"] for e in frontier.snapshot()] + list(incons)
+        frontier, closed, incons = Frontier(), set(), {}
+        for name in waiting: push(name)
+    if stats is not None and found: stats["bound"] = found["bound"]
+    record(stats, c, "search", started)
+
+# RBFS (Recursive Best-First Search)
+# Depth-first along the best child, keeping only the children of the nodes on
+# the current path (linear memory). A child is explored with the f-limit
+# min(f_limit, f of the best alternative); when it fails its f is replaced by
+# the backed-up value (lowest f found beyond the limit) and the alternatives are
+# compared again. Forgotten subtrees are re-expanded later; the trace counts
+# those re-expansions. Cities already on the current path are not revisited.
+def rbfs_trace(start, goal, graph=ROMANIA, h=None, stats=None):
+    return TraceStore.record(rbfs_steps(start, goal, graph, h, stats))
+
+def rbfs_steps(start, goal, graph=ROMANIA, h=None, stats=None):
+    started, hook, c = time.perf_counter(), on_expand(stats), counters()
+    if h is None: h = heuristic_for(goal, graph)
+    expanded = set()
+    stack = []  # children lists of the nodes on the current path
+
+    def rbfs(node, path, on_path, f_limit):
+        name = node["name"]
+        if name in expanded: c["reexpanded"] += 1
+        expanded.add(name)
+        c["expanded"] += 1
+        if hook: hook(name, node["g"], node["h"])
+        frontier = sorted((dict(x) for children in stack for x in children if x["name"] not in on_path),
+                          key=lambda x: x["f"])
+        yield {"current": dict(node), "frontier": frontier, "expanded": [name],
+               "path": list(path), "goal": goal, "algo": "RBFS",
+               "f_limit": f_limit, "re_expansions": c["reexpanded"], "stats": dict(c)}
+        if name==goal: return True, node["f"]
+        children = []
+        for nbr, cost in graph[name].items():
+            if nbr in on_path: continue
+            g = node["g"] + cost
+            children.append({"name": nbr, "g": g, "h": h[nbr], "f": max(g + h[nbr], node["f"])})
+        c["generated"] += len(children)
+        if not children: return False, INF
+        stack.append(children)
+        c["peak_frontier"] = max(c["peak_frontier"], sum(len(x) for x in stack))
+        while True:
+            children.sort(key=lambda x: x["f"])
+            best = children[0]
+            if best["f"] > f_limit:
+                stack.pop()
+                return False, best["f"]
+            alternative = children[1]["f"] if len(children) > 1 else INF
+            path.append(best["name"]); on_path.add(best["name"])
+            found, best["f"] = yield from rbfs(best, path, on_path, min(f_limit, alternative))
+            if found: return True, best["f"]
+            path.pop(); on_path.discard(best["name"])
+
+    yield from rbfs({"name": start, "g": 0, "h": h[start], "f": h[start]}, [start], {start}, INF)
+    record(stats, c, "search", started)
+
+# SMA* (Simplified Memory-Bounded A*)
+# A* over a search tree of at most `memory` nodes. The best leaf (lowest f,
+# deepest) generates one successor per step. When memory is full, the worst
+# leaf (highest f, shallowest) is dropped and its f is remembered in its parent,
+# which regenerates it later if it becomes the best choice again (a
+# re-expansion). Once all of a node's successors have been generated, its f is
+# backed up to the best f among them. Paths longer than the memory allows get
+# f = inf; the result is optimal when the optimal path fits in memory.
+SMA_MEMORY = 8
+
+def sma_trace(start, goal, memory=SMA_MEMORY, graph=ROMANIA, h=None, stats=None):
+    return TraceStore.record(sma_steps(start, goal, memory, graph, h, stats))
+
+def sma_steps(start, goal, memory=SMA_MEMORY, graph=ROMANIA, h=None, stats=None):
+    started, hook, c = time.perf_counter(), on_expand(stats), counters()
+    memory = max(memory, 2)
+    if h is None: h = heuristic_for(goal, graph)
+    root = {"name": start, "g": 0, "h": h[start], "f": h[start], "depth": 0, "parent": None,
+            "children": [], "succ": None, "next": 0, "forgotten": {}}
+    tree, open_nodes = [root], [root]
+    expanded = set()
+    dropped = 0
+    public = lambda n: {"name": n["name"], "g": n["g"], "h": n["h"], "f": n["f"]}
+
+    def path_of(n):
+        path = []
+        while n:
+            path.insert(0, n["name"])
+            n = n["parent"]
+        return path
+
+    def backup(n):
+        # f of a fully generated node = best f among its successors (in memory or forgotten)
+        while n and n["next"] == len(n["succ"]):
+            best = min([c["f"] for c in n["children"]] + list(n["forgotten"].values()), default=INF)
+            if best == n["f"]: return
+            n["f"] = best
+            n = n["parent"]
+
+    while open_nodes:
+        n = min(open_nodes, key=lambda x: (x["f"], -x["depth"]))
+        if n["f"] == INF: break  # no path fits in memory
+        path = path_of(n)
+        expanded.add(n["name"])
+        c["expanded"] += 1
+        c["peak_frontier"] = max(c["peak_frontier"], len(open_nodes))
+        c["peak_closed"] = max(c["peak_closed"], len(tree))
+        if hook: hook(n["name"], n["g"], n["h"])
+        yield {"current": public(n),
+               "frontier": sorted((public(x) for x in open_nodes if x is not n), key=lambda x: x["f"]),
+               "expanded": [n["name"]], "path": path, "goal": goal, "algo": "SMA*",
+               "memory": len(tree), "memory_limit": memory,
+               "dropped": dropped, "re_expansions": c["reexpanded"], "stats": dict(c)}
+        if n["name"]==goal: break
+        if n["succ"] is None:
+            on_path = set(path)
+            n["succ"] = [(nbr, cost) for nbr, cost in graph[n["name"]].items() if nbr not in on_path]
+        if n["next"] == len(n["succ"]) and not n["forgotten"]:
+            # dead end
+            n["f"] = INF
+            open_nodes.remove(n)
+            backup(n["parent"])
+            continue
+
+        # next successor: a new one, else the best forgotten one again
+        if n["next"] < len(n["succ"]):
+            nbr, cost = n["succ"][n["next"]]
+            n["next"] += 1
+            f_known = 0
+        else:
+            nbr = min(n["forgotten"], key=n["forgotten"].get)
+            f_known = n["forgotten"].pop(nbr)
+            cost = graph[n["name"]][nbr]
+            c["reexpanded"] += 1
+        c["generated"] += 1
+        g = n["g"] + cost
+        child = {"name": nbr, "g": g, "h": h[nbr], "depth": n["depth"] + 1, "parent": n,
+                 "children": [], "succ": None, "next": 0, "forgotten": {}}
+        if nbr != goal and child["depth"] >= memory - 1:
+            child["f"] = INF
+        else:
+            child["f"] = max(n["f"], g + h[nbr], f_known)
+
+        # make room: drop the worst leaf and remember its f in the parent
+        stored = True
+        if len(tree) >= memory:
+            leaves = [x for x in tree if not x["children"] and x is not n and x is not root]
+            if leaves:
+                worst = max(leaves, key=lambda x: (x["f"], -x["depth"]))
+                p = worst["parent"]
+                p["children"].remove(worst)
+                p["forgotten"][worst["name"]] = worst["f"]
+                tree.remove(worst)
+                if worst in open_nodes: open_nodes.remove(worst)
+                if p not in open_nodes: open_nodes.append(p)
+                dropped += 1
+            else:
+                n["forgotten"][nbr] = INF  # memory too small for this path
+                stored = False
+        if stored:
+            tree.append(child)
+            n["children"].append(child)
+            open_nodes.append(child)
+        if n["next"] == len(n["succ"]) and not n["forgotten"]:
+            open_nodes.remove(n)
+        backup(n)
+    record(stats, c, "search", started)
+
+# CH (contraction hierarchy query)
+# The hierarchy is preprocessed once per map (ContractionHierarchy.py) and then
+# serves every query: a forward search from the start and a backward search
+# from the goal, both only climbing to higher-ranked cities, alternate until
+# they cannot improve the best meeting point. Each settled city is streamed as
+# a step; the last step shows the path with its shortcuts unpacked. h is not
+# used; g is the distance within the current search direction. `ch` is the
+# hierarchy of `graph`, built (and for Romania kept) when not given.
+@lru_cache(maxsize=None)
+def romania_ch():
+    return ContractionHierarchy.build(ROMANIA)
+
+def ch_trace(start, goal, graph=ROMANIA, h=None, stats=None, ch=None):
+    return TraceStore.record(ch_steps(start, goal, graph, h, stats, ch))
+
+def ch_steps(start, goal, graph=ROMANIA, h=None, stats=None, ch=None):
+    if ch is None: ch = romania_ch() if graph is ROMANIA else ContractionHierarchy.build(graph)
+    entry = lambda name, d: {"name": name, "g": d, "h": 0, "f": d}
+    query_stats = {} if stats is None else stats
+    steps = ch.query_steps(start, goal, query_stats)
+    while True:
+        try:
+            direction, node, d, path, frontier, counts = next(steps)
+        except StopIteration as done:
+            cost, path = done.value
+            break
+        yield {"current": entry(node, d),
+               "frontier": sorted((entry(x, dd) for x, dd in frontier), key=lambda x: x["f"]),
+               "expanded": [node], "path": path, "goal": goal, "algo": "CH",
+               "direction": direction, "stats": counts}
+    if path is not None:
+        yield {"current": entry(goal, cost), "frontier": [], "expanded": [],
+               "path": path, "goal": goal, "algo": "CH", "direction": "done, shortcuts unpacked",
+               "stats": {k: query_stats[k] for k in counters()}}
+
+# LPA* (incremental replanning)
+# A planner keeps its search between queries on a LiveGraph, so road costs can
+# change (traffic, closures) and the next plan only re-expands the cities whose
+# distance the change affects (LPAStar.py). The heuristic is taken from the
+# map as loaded: a changed road only costs more, so it stays a lower bound.
+# planner.replan_steps() traces one plan; planner.set_cost(a, b, cost) and
+# planner.reset() change the roads in between.
+def lpa_planner(start, goal, graph=ROMANIA, h=None, stats=None):
+    if h is None: h = heuristic_for(goal, graph)
+    return LPAStar(LiveGraph(graph), start, goal, h, stats)
+
+def lpa_trace(start, goal, graph=ROMANIA, h=None, stats=None):
+    return TraceStore.record(lpa_steps(start, goal, graph, h, stats))
+
+# The first plan of a new planner (the same expansions as A*)
+def lpa_steps(start, goal, graph=ROMANIA, h=None, stats=None):
+    return lpa_planner(start, goal, graph, h, stats).replan_steps()
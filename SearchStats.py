@@ -0,0 +1,91 @@
+import time
+
+# -------------------------
+# Search statistics
+# -------------------------
+# One set of counters filled in by every search in the project. Searches take
+# an optional `stats` mapping (a plain dict works, which is what the older
+# stats={} callers pass) and write these keys into it when they finish:
+#
+#   generated      successors created
+#   expanded       nodes expanded
+#   reexpanded     expansions repeated (reopened closed nodes, IDA*/RBFS/SMA*
+#                  iterations over forgotten nodes)
+#   duplicates     pushes of a node that was already queued
+#   peak_frontier  largest frontier: heap, open list, children on the stack
+#   peak_closed    largest closed set or stored tree (0 when there is none)
+#   time           {phase: seconds}
+#
+# Counters live in local variables during the search and are written once at
+# the end, so a search without `stats` pays only a few integer additions.
+# SearchStats can also carry an on_expand(node, g, h) hook, called for every
+# expansion when set.
+
+COUNTERS = ("generated", "expanded", "reexpanded", "duplicates", "peak_frontier", "peak_closed")
+
+LABELS = {"generated": "generated", "expanded": "expanded", "reexpanded": "re-expanded",
+          "duplicates": "duplicate pushes", "peak_frontier": "peak frontier", "peak_closed": "peak closed"}
+
+class SearchStats(dict):
+    def __init__(self, on_expand=None):
+        super().__init__(dict.fromkeys(COUNTERS, 0), time={})
+        self.on_expand = on_expand
+
+def counters():
+    return dict.fromkeys(COUNTERS, 0)
+
+def on_expand(stats):
+    return getattr(stats, "on_expand", None)
+
+# Copy finished counters into stats and add the elapsed time of a phase
+def record(stats, values, phase=None, started=None):
+    if stats is None:
+        return
+    stats.update(values)
+    if phase is not None:
+        add_time(stats, phase, time.perf_counter() - started)
+
+def add_time(stats, phase, seconds):
+    times = stats.setdefault("time", {})
+    times[phase] = times.get(phase, 0.0) + seconds
+
+# One line for the UI panels: "expanded 12 · generated 30 · ... · search 0.41 ms"
+def summary(stats):
+    parts = [f"{LABELS[k]} {stats[k]:,}" for k in COUNTERS if stats.get(k) is not None]
+    parts += [f"{phase} {seconds * 1000:.2f} ms" for phase, seconds in stats.get("time", {}).items()]
+    return " · ".join(parts)
+
+# -------------------------
+# Streaming searches
+# -------------------------
+# The *_steps generators (SlidingPuzzle.astar_steps, RouteSearch.astar_steps,
+# ...) yield progress while they run and return their result. Closing one
+# stops the search; that is how the UIs cancel a solve.
+
+# Run a generator to the end and return its result
+def drain(steps):
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+# Time and node limits for one request. exceeded(expanded) is checked after
+# each progress update; once it returns True, `reason` says which limit hit.
+# A limit of None or 0 means no limit.
+class Budget:
+    def __init__(self, seconds=None, nodes=None):
+        self.seconds, self.nodes = seconds, nodes
+        self.started = time.perf_counter()
+        self.reason = None
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def exceeded(self, expanded):
+        if self.seconds and self.elapsed > self.seconds:
+            self.reason = f"time budget of {self.seconds:g} s"
+        elif self.nodes and expanded >= self.nodes:
+            self.reason = f"node budget of {self.nodes:,} expansions"
+        return self.reason is not None
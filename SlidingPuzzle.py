@@ -0,0 +1,523 @@
+import heapq
+import time
+from math import isqrt
+
+from SearchStats import counters, drain, on_expand as expand_hook, record
+
+INF = float("inf")
+
+# -------------------------
+# Compact sliding-puzzle engine
+# -------------------------
+# A board of width w has w*w positions. The whole board is packed into a
+# single integer: the tile at position i lives in bits [i*bits, (i+1)*bits).
+# The blank (0) position is carried next to the packed code, so sliding a tile
+# into the blank is one add on the code and one table lookup for h(n).
+# Goal layout is 0, 1, 2, ... (blank top-left), same as goal_state in 8Puzzle.py.
+
+class Board:
+    def __init__(self, width):
+        self.width = width
+        self.size = size = width * width
+        self.bits = max(4, (size - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.goal = tuple(range(size))
+        self.shift = [1 << (self.bits * i) for i in range(size)]
+
+        # moves[b] = positions the blank at b can swap with (Up, Down, Left, Right)
+        self.moves = []
+        for b in range(size):
+            r, c = divmod(b, width)
+            self.moves.append(tuple(
+                nr * width + nc
+                for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                if 0 <= nr < width and 0 <= nc < width
+            ))
+
+        # dist[t*size + p] = Manhattan distance of tile t standing at position p
+        self.dist = dist = [0] * (size * size)
+        for t in range(1, size):
+            gr, gc = divmod(t, width)
+            for p in range(size):
+                r, c = divmod(p, width)
+                dist[t * size + p] = abs(r - gr) + abs(c - gc)
+
+        # delta[(t*size + j)*size + b] = change of h when tile t slides from j into the blank at b
+        self.delta = delta = [0] * (size * size * size)
+        for t in range(1, size):
+            for j in range(size):
+                for b in self.moves[j]:
+                    delta[(t * size + j) * size + b] = dist[t * size + b] - dist[t * size + j]
+
+        self.goal_code = self.pack(self.goal)
+
+    def pack(self, state):
+        code = 0
+        for i, val in enumerate(state):
+            code |= val << (self.bits * i)
+        return code
+
+    def unpack(self, code):
+        bits, mask = self.bits, self.mask
+        return tuple((code >> (bits * i)) & mask for i in range(self.size))
+
+    def manhattan(self, state):
+        size, dist = self.size, self.dist
+        return sum(dist[val * size + i] for i, val in enumerate(state))
+
+_boards = {}
+
+def get_board(width=3):
+    board = _boards.get(width)
+    if board is None:
+        board = _boards[width] = Board(width)
+    return board
+
+# -------------------------
+# Input checks
+# -------------------------
+# Parse "7 2 4 5 0 6 8 3 1" (spaces and/or commas) into a state tuple
+def parse_state(text):
+    return tuple(map(int, text.replace(",", " ").split()))
+
+# Width of the square board holding this state; raises ValueError when the
+# state is not a permutation of 0..n-1 on a square board (2x2 or larger).
+def board_width(state):
+    n = len(state)
+    width = isqrt(n)
+    if width < 2 or width * width != n:
+        raise ValueError(f"expected a square board (9, 16, 25, ... numbers), got {n}")
+    if set(state) != set(range(n)):
+        raise ValueError(f"expected each number 0..{n-1} exactly once")
+    return width
+
+# Solvability in O(n): every move swaps the blank with a neighbor, flipping both
+# the permutation parity and the parity of the blank's distance from its goal
+# cell (top-left). The state is reachable iff those two parities agree.
+# Permutation parity comes from the cycle count instead of counting inversions.
+def is_solvable(state, width=None):
+    width = width or board_width(state)
+    size = width * width
+    seen = [False] * size
+    cycles = 0
+    for i in range(size):
+        if not seen[i]:
+            cycles += 1
+            j = i
+            while not seen[j]:
+                seen[j] = True
+                j = state[j]
+    r, c = divmod(state.index(0), width)
+    return (size - cycles) % 2 == (r + c) % 2
+
+# -------------------------
+# A* on packed states
+# -------------------------
+# Heap entries are (f, h, code, blank, aux); g is recovered as f - h.
+# Ties on f prefer the smaller h (deeper node). Manhattan is consistent, so a
+# state is final the first time it is popped: later (stale) copies are skipped
+# through the closed set and a neighbor is only pushed when it improves g.
+# With a pattern database (PatternDB.py) h comes from table lookups on `aux`
+# instead of the Manhattan delta table. PDB values ignore the blank, which keeps
+# them admissible but not consistent, so a closed state is reopened when a
+# cheaper path to it shows up (this never happens with Manhattan).
+# When a `stats` mapping is given it gets the SearchStats counters and the
+# "search" / "path" phase times.
+#
+# astar_steps() is the same search as a generator: every PROGRESS_EVERY
+# expansions it yields {"expanded", "generated", "f", "frontier"} (f of the
+# node being expanded, a lower bound on the solution length; frontier = open
+# list size) and it returns the path. Closing it stops the search; stats then
+# get the counters so far. astar() runs it to the end.
+#
+# Weighted A* (WA*): with w > 1 the heap is ordered by f = g + w*h. The search
+# dives towards the goal and expands far fewer states, and because closed
+# states are still reopened when their g improves, the path is at most w times
+# longer than the optimal one for any admissible h. Weighted h is not
+# consistent, so reopening happens with Manhattan too. stats then also get
+# "bound", the proven bound: min(w, length / smallest g + h left open).
+PROGRESS_EVERY = 2000
+
+def astar(start, width=None, pdb=None, stats=None, w=1):
+    return drain(astar_steps(start, width, pdb, stats, w))
+
+def astar_steps(start, width=None, pdb=None, stats=None, w=1):
+    board = get_board(width or board_width(start))
+    if not is_solvable(start, board.width):
+        return None
+    started = time.perf_counter()
+    hook = expand_hook(stats)
+    size, bits, mask = board.size, board.bits, board.mask
+    shift, moves, delta = board.shift, board.moves, board.delta
+    goal = board.goal_code
+    weight = pdb.weight if pdb else None
+
+    code = board.pack(start)
+    aux = pdb.aux(start) if pdb else 0
+    h = pdb.value(aux) if pdb else board.manhattan(start)
+    pq = [(w * h, h, code, start.index(0), aux)]
+    best_g = {code: 0}
+    came_from = {}
+    closed = set()
+    expanded = generated = reopened = duplicates = peak_frontier = peak_closed = 0
+    next_report = PROGRESS_EVERY
+
+    def finish():
+        record(stats, {"generated": generated, "expanded": expanded, "reexpanded": reopened,
+                       "duplicates": duplicates, "peak_frontier": peak_frontier,
+                       "peak_closed": max(peak_closed, len(closed))}, "search", started)
+
+    while pq:
+        f, h, code, blank, aux = heapq.heappop(pq)
+        if code in closed:
+            continue
+        if code == goal:
+            if stats is not None:
+                finish()
+                started = time.perf_counter()
+            path = [code]
+            while code in came_from:
+                code = came_from[code]
+                path.append(code)
+            path.reverse()
+            if w != 1 and stats is not None:
+                stats["bound"] = suboptimality(len(path) - 1, w, open_lengths(pq, closed, best_g))
+            path = [board.unpack(c) for c in path]
+            record(stats, {}, "path", started)
+            return path
+        if len(pq) >= peak_frontier:
+            peak_frontier = len(pq) + 1
+        closed.add(code)
+        expanded += 1
+        g = f - w * h
+        if w != 1:
+            g = round(g)  # f - w*h can be off by a rounding error
+        if hook:
+            hook(board.unpack(code), g, h)
+        if expanded == next_report:
+            next_report += PROGRESS_EVERY
+            try:
+                yield {"expanded": expanded, "generated": generated, "f": f, "frontier": len(pq)}
+            except GeneratorExit:
+                finish()
+                raise
+        new_g = g + 1
+        generated += len(moves[blank])
+        for j in moves[blank]:
+            tile = (code >> (bits * j)) & mask
+            neighbor = code + tile * (shift[blank] - shift[j])
+            old_g = best_g.get(neighbor)
+            if old_g is not None:
+                if old_g <= new_g:
+                    continue
+                duplicates += 1
+                if neighbor in closed:
+                    # only with a PDB or w > 1; the closed set shrinks, so note its peak first
+                    if len(closed) > peak_closed:
+                        peak_closed = len(closed)
+                    closed.remove(neighbor)
+                    reopened += 1
+            best_g[neighbor] = new_g
+            came_from[neighbor] = code
+            if pdb:
+                new_aux = aux + (blank - j) * weight[tile]
+                new_h = pdb.value(new_aux)
+            else:
+                new_aux = 0
+                new_h = h + delta[(tile * size + j) * size + blank]
+            heapq.heappush(pq, (new_g + w * new_h, new_h, neighbor, j, new_aux))
+    if stats is not None:
+        finish()
+    return None
+
+# g + h of every state still waiting in a heap (stale copies of closed states
+# skipped) or in `extra` ({code: (h, ...)}); the smallest is a lower bound on
+# the optimal length. Along an optimal path, the deepest state whose g is
+# already optimal has not been expanded since: it is still waiting.
+def open_lengths(pq, closed, best_g, extra=()):
+    for entry in pq:
+        if entry[2] not in closed:
+            yield best_g[entry[2]] + entry[1]
+    for code in extra:
+        yield best_g[code] + extra[code][0]
+
+# Proven bound on length / optimal length for a weighted search with weight w
+# (the found solution itself is one of the candidates for the optimal length)
+def suboptimality(length, w, lengths):
+    lower = min(length, min(lengths, default=length))
+    return min(w, length / lower) if lower else 1.0
+
+# -------------------------
+# Anytime Repairing A* (ARA*)
+# -------------------------
+# Runs WA* with a decreasing weight (w, w - step, ..., 1) and keeps the search
+# tree between runs instead of starting over (Likhachev, Gordon & Thrun 2003).
+# Within one run a state is expanded at most once: when a closed state gets a
+# better g it goes to INCONS instead of back on the heap. A run ends as soon as
+# the goal's g is no larger than the smallest key on the heap. The next run
+# merges INCONS into the heap, re-keys it with the smaller weight and clears
+# the closed set, so only states whose g improved are expanded again.
+#
+# ara_star_steps() yields the same progress dicts as astar_steps() plus, after
+# each run, {"path", "length", "w", "bound"}: the best path so far and its proven
+# bound (see suboptimality()). It returns the optimal path once the bound
+# reaches 1. Closing it after a solution keeps that solution; ara_star() does
+# that when `seconds` have passed and returns the best path found. The first
+# solution is always waited for. stats get the counters of all runs
+# ("reexpanded" counts expansions repeated by later runs), "runs" and "bound".
+ARA_WEIGHT = 3.0
+ARA_STEP = 0.5
+
+def ara_star(start, width=None, pdb=None, w=ARA_WEIGHT, step=ARA_STEP, seconds=None, stats=None):
+    started = time.perf_counter()
+    steps = ara_star_steps(start, width, pdb, w, step, stats)
+    best = None
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as done:
+            return done.value
+        if "path" in progress:
+            best = progress["path"]
+        if best and seconds and time.perf_counter() - started > seconds:
+            steps.close()
+            return best
+
+def ara_star_steps(start, width=None, pdb=None, w=ARA_WEIGHT, step=ARA_STEP, stats=None):
+    board = get_board(width or board_width(start))
+    if not is_solvable(start, board.width):
+        return None
+    started = time.perf_counter()
+    hook = expand_hook(stats)
+    size, bits, mask = board.size, board.bits, board.mask
+    shift, moves, delta = board.shift, board.moves, board.delta
+    goal = board.goal_code
+    weight = pdb.weight if pdb else None
+
+    code = board.pack(start)
+    aux = pdb.aux(start) if pdb else 0
+    h = pdb.value(aux) if pdb else board.manhattan(start)
+    pq = [(w * h, h, code, start.index(0), aux)]
+    best_g = {code: 0}
+    came_from = {}
+    closed = set()
+    incons = {}  # code -> (h, blank, aux)
+    expanded = generated = repeated = duplicates = peak_frontier = peak_closed = runs = 0
+    seen = set()
+    bound = float("inf")
+    next_report = PROGRESS_EVERY
+
+    def finish():
+        record(stats, {"generated": generated, "expanded": expanded, "reexpanded": repeated,
+                       "duplicates": duplicates, "peak_frontier": peak_frontier,
+                       "peak_closed": max(peak_closed, len(closed)), "runs": runs,
+                       "bound": bound}, "search", started)
+
+    while True:
+        runs += 1
+        goal_g = best_g.get(goal, INF)
+        while pq and pq[0][0] < goal_g:
+            f, h, code, blank, aux = heapq.heappop(pq)
+            if code in closed:
+                continue
+            if len(pq) + len(incons) >= peak_frontier:
+                peak_frontier = len(pq) + len(incons) + 1
+            closed.add(code)
+            expanded += 1
+            if code in seen:
+                repeated += 1
+            else:
+                seen.add(code)
+            g = best_g[code]
+            if hook:
+                hook(board.unpack(code), g, h)
+            if expanded == next_report:
+                next_report += PROGRESS_EVERY
+                try:
+                    yield {"expanded": expanded, "generated": generated, "f": f, "frontier": len(pq)}
+                except GeneratorExit:
+                    finish()
+                    raise
+            new_g = g + 1
+            generated += len(moves[blank])
+            for j in moves[blank]:
+                tile = (code >> (bits * j)) & mask
+                neighbor = code + tile * (shift[blank] - shift[j])
+                old_g = best_g.get(neighbor)
+                if old_g is not None:
+                    if old_g <= new_g:
+                        continue
+                    duplicates += 1
+                best_g[neighbor] = new_g
+                came_from[neighbor] = code
+                if pdb:
+                    new_aux = aux + (blank - j) * weight[tile]
+                    new_h = pdb.value(new_aux)
+                else:
+                    new_aux = 0
+                    new_h = h + delta[(tile * size + j) * size + blank]
+                if neighbor == goal:
+                    goal_g = new_g
+                if neighbor in closed:
+                    incons[neighbor] = (new_h, j, new_aux)
+                else:
+                    heapq.heappush(pq, (new_g + w * new_h, new_h, neighbor, j, new_aux))
+
+        if goal_g == INF:
+            finish()
+            return None
+        code, path = goal, [goal]
+        while code in came_from:
+            code = came_from[code]
+            path.append(code)
+        path.reverse()
+        path = [board.unpack(c) for c in path]
+        bound = suboptimality(goal_g, w if pdb is None else INF, open_lengths(pq, closed, best_g, incons))
+        if bound <= 1:
+            finish()
+            return path
+        try:
+            yield {"expanded": expanded, "generated": generated, "f": goal_g, "frontier": len(pq),
+                   "path": path, "length": goal_g, "w": w, "bound": bound}
+        except GeneratorExit:
+            finish()
+            raise
+
+        # next run: waiting states (heap and INCONS) re-keyed with the smaller weight
+        w = max(1, w - step)
+        waiting = {code: (h, blank, aux) for _, h, code, blank, aux in pq if code not in closed}
+        waiting.update(incons)
+        if len(closed) > peak_closed:
+            peak_closed = len(closed)
+        pq = [(best_g[c] + w * h, h, c, blank, aux) for c, (h, blank, aux) in waiting.items()]
+        heapq.heapify(pq)
+        closed, incons = set(), {}
+
+# -------------------------
+# IDA* (linear memory, any board width)
+# -------------------------
+# Depth-first probes bounded by f = g + h; each failed iteration raises the bound
+# to the smallest f that exceeded it. Only the current path is kept in memory,
+# which is what makes 15- and 24-puzzles feasible. Moving the blank straight
+# back to where it came from is pruned. `pdb` and `stats` work as in astar();
+# stats also gets the number of iterations (bound increases + 1). Expansions of
+# every iteration but the last repeat earlier work and count as re-expanded;
+# the frontier is the current path.
+#
+# The depth-first probe runs on an explicit stack (children pushed in reverse
+# so they are visited Up, Down, Left, Right), which lets ida_star_steps() yield
+# progress like astar_steps(); "f" is then the current bound and "frontier"
+# the pending stack entries.
+def ida_star(start, width=None, pdb=None, stats=None):
+    return drain(ida_star_steps(start, width, pdb, stats))
+
+def ida_star_steps(start, width=None, pdb=None, stats=None):
+    board = get_board(width or board_width(start))
+    if not is_solvable(start, board.width):
+        return None
+    started = time.perf_counter()
+    hook = expand_hook(stats)
+    size, bits, mask = board.size, board.bits, board.mask
+    shift, moves, delta = board.shift, board.moves, board.delta
+    goal = board.goal_code
+    weight = pdb.weight if pdb else None
+
+    code = board.pack(start)
+    aux = pdb.aux(start) if pdb else 0
+    h = pdb.value(aux) if pdb else board.manhattan(start)
+    root = (code, start.index(0), -1, 0, h, aux)
+    bound = h
+    expanded = generated = peak_frontier = iterations = repeated = 0
+    next_report = PROGRESS_EVERY
+
+    def finish():
+        record(stats, {"generated": generated, "expanded": expanded, "reexpanded": repeated,
+                       "duplicates": 0, "peak_frontier": peak_frontier, "peak_closed": 0,
+                       "iterations": iterations}, "search", started)
+
+    while True:
+        iterations += 1
+        before = expanded
+        path, stack, minimum = [], [root], None
+        pop, push = stack.pop, stack.append
+        while stack:
+            code, blank, prev, g, h, aux = pop()
+            path[g:] = (code,)
+            if code == goal:
+                finish()
+                return [board.unpack(c) for c in path]
+            expanded += 1
+            if hook:
+                hook(board.unpack(code), g, h)
+            if g >= peak_frontier:
+                peak_frontier = g + 1
+            if expanded == next_report:
+                next_report += PROGRESS_EVERY
+                try:
+                    yield {"expanded": expanded, "generated": generated, "f": bound, "frontier": len(stack)}
+                except GeneratorExit:
+                    finish()
+                    raise
+            generated += len(moves[blank]) - (prev >= 0)
+            child_g = g + 1
+            for j in reversed(moves[blank]):
+                if j == prev:
+                    continue
+                tile = (code >> (bits * j)) & mask
+                if pdb:
+                    child_aux = aux + (blank - j) * weight[tile]
+                    child_h = pdb.value(child_aux)
+                else:
+                    child_aux = 0
+                    child_h = h + delta[(tile * size + j) * size + blank]
+                f = child_g + child_h
+                if f > bound:
+                    if minimum is None or f < minimum:
+                        minimum = f
+                    continue
+                push((code + tile * (shift[blank] - shift[j]), j, blank, child_g, child_h, child_aux))
+        if minimum is None:
+            finish()
+            return None
+        repeated += expanded - before
+        bound = minimum
+
+# -------------------------
+# Solver dispatch
+# -------------------------
+# "auto" reads 8-puzzles off the exact distance table (DistanceTable.py), runs
+# A* on 2x2 boards and IDA* on 15-puzzles and up. A* and IDA* use the default
+# pattern database for the width when it has been built (PatternDB.py).
+# A weight w > 1 makes A* weighted (see astar()) and "auto" picks it for every
+# width; the table and IDA* are exact only.
+ALGORITHMS = ("auto", "table", "astar", "ida")
+
+def solve(start, algorithm="auto", stats=None, w=1):
+    return drain(solve_steps(start, algorithm, stats, w))
+
+# Generator version of solve(): yields the progress of astar_steps() /
+# ida_star_steps() and returns the path (the table lookup yields nothing)
+def solve_steps(start, algorithm="auto", stats=None, w=1):
+    # imported here: both modules import this one
+    import DistanceTable
+    from PatternDB import load_default
+
+    width = board_width(start)
+    if algorithm == "auto":
+        algorithm = "astar" if w != 1 or width < 3 else "table" if width == 3 else "ida"
+    if w != 1 and algorithm != "astar":
+        raise ValueError(f"a weight only applies to astar, not {algorithm!r}")
+    if w < 1:
+        raise ValueError(f"the weight must be at least 1, got {w}")
+    if algorithm == "table":
+        if width != 3:
+            raise ValueError("the distance table only covers the 8-puzzle")
+        started = time.perf_counter()
+        path = DistanceTable.optimal_path(start)
+        record(stats, counters(), "lookup", started)  # no search: every counter is 0
+        return path
+    if algorithm == "astar":
+        return (yield from astar_steps(start, width, load_default(width), stats, w))
+    if algorithm == "ida":
+        return (yield from ida_star_steps(start, width, load_default(width), stats))
+    raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {ALGORITHMS}")
@@ -0,0 +1,378 @@
+import argparse
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from SearchStats import COUNTERS
+
+# -------------------------
+# Delta-encoded search traces
+# -------------------------
+# A trace used to be a list of full steps, each with a copy of the expanded set
+# and of the sorted frontier: quadratic memory in the number of steps. Here a
+# step only stores what changed:
+#
+#   current     the node expanded at this step (name, g, h, f)
+#   pushes      frontier entries added at this step (decrease-key pushes too)
+#   removes     frontier entries gone at this step, by push index
+#   expanded    nodes added to the expanded set
+#   path        GBFS/A* steps give the parent of the current node: the path is
+#               the path of the step that expanded the parent plus the current
+#               node (path_parent). Other steps give their full path: stored as
+#               the length of the prefix shared with the previous path + new tail
+#   stats       the SearchStats counters, plus any algorithm-specific scalars
+#               (f_limit, memory, direction, ...)
+#
+# Every frontier entry ever pushed gets a push index (its position in the push
+# pool). The frontier of a step is the set of live push indices, ordered by
+# (f, or h when there is no f; push index), which is the Frontier.py order.
+# Every CHECKPOINT_EVERY steps the live set and the path are stored in full,
+# so step i is rebuilt from the checkpoint before it plus at most
+# CHECKPOINT_EVERY deltas. The expanded set only grows, so it is a prefix of
+# the expanded pool and needs no checkpoint.
+#
+# Steps come from the RouteSearch *_steps generators in one of two forms:
+#   - "pushed" / "removed" lists (GBFS, A*): the frontier is a Frontier, each
+#     name is queued at most once and the current node leaves it;
+#   - a full "frontier" list (RBFS, SMA*, CH): small frontiers recomputed every
+#     step, diffed here against the previous one.
+# Either way store[i] returns the full step ("frontier" list, "expanded" set).
+#
+# Every column is a flat array, so the whole trace is saved as one columnar
+# file (same layout as RoadNetwork.py's CSR cache) and opened memory-mapped:
+#
+#   python TraceStore.py record A* Arad Bucharest -o arad.trace
+#   python TraceStore.py show arad.trace 3
+
+MAGIC = b"TRACESTR"
+CHECKPOINT_EVERY = 256
+
+# Per step
+STEP_COLUMNS = (("cur_node", "i"), ("cur_g", "d"), ("cur_h", "d"), ("cur_f", "d"),
+                ("push_end", "q"), ("remove_end", "q"), ("expand_end", "q"),
+                ("path_parent", "q"), ("path_keep", "i"), ("path_end", "q")) + tuple(("stat_" + k, "q") for k in COUNTERS)
+# Pools indexed by the *_end columns, and checkpoints
+POOL_COLUMNS = (("push_node", "i"), ("push_g", "d"), ("push_h", "d"), ("push_f", "d"),
+                ("remove", "q"), ("expand", "i"), ("path", "i"),
+                ("ckpt_frontier_end", "q"), ("ckpt_frontier", "q"), ("ckpt_path_end", "q"), ("ckpt_path", "i"))
+
+# Step keys with their own columns; any other key is an extra scalar column
+KNOWN = {"current", "frontier", "pushed", "removed", "expanded", "path", "parent", "goal", "algo", "stats"}
+
+# path_parent values that are not step numbers
+PATH_START, PATH_STORED = -1, -2
+
+NAN = float("nan")
+
+# Stored as doubles; missing fields are NaN. Integral values come back as ints.
+def _value(v):
+    return NAN if v is None else float(v)
+
+def _restore(v):
+    return int(v) if v.is_integer() else v
+
+def _entry(name, g, h, f):
+    entry = {"name": name}
+    for key, v in (("g", g), ("h", h), ("f", f)):
+        if v == v:  # not NaN
+            entry[key] = _restore(v)
+    return entry
+
+class TraceStore:
+    def __init__(self, algo=None, goal=None, checkpoint_every=CHECKPOINT_EVERY):
+        self.algo, self.goal = algo, goal
+        self.checkpoint_every = checkpoint_every
+        self.names, self._ids = [], {}
+        self.labels, self._label_ids = [], {}
+        self.extras = {}  # extra column name -> "num" or "label"
+        self.columns = {name: array(code) for name, code in STEP_COLUMNS + POOL_COLUMNS}
+        self.readonly = False
+        # state while appending
+        self._live = set()   # push indices in the frontier
+        self._by_node = {}   # node id -> live push index ("pushed" steps)
+        self._path = []
+        self._expanded_at = {}  # node id -> last step it was current ("parent" steps)
+
+    def __len__(self):
+        return len(self.columns["cur_node"])
+
+    # Frontier size after the last append (while recording)
+    @property
+    def frontier_size(self):
+        return len(self._live)
+
+    def _id(self, name):
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def _label(self, text):
+        i = self._label_ids.get(text)
+        if i is None:
+            i = self._label_ids[text] = len(self.labels)
+            self.labels.append(text)
+        return i
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    @classmethod
+    def record(cls, steps, checkpoint_every=CHECKPOINT_EVERY):
+        store = cls(checkpoint_every=checkpoint_every)
+        for step in steps:
+            store.append(step)
+        return store
+
+    def append(self, step):
+        if self.readonly:
+            raise ValueError("trace opened from a file is read-only")
+        c = self.columns
+        if self.algo is None:
+            self.algo, self.goal = step["algo"], step["goal"]
+        cur = step["current"]
+        c["cur_node"].append(self._id(cur["name"]))
+        c["cur_g"].append(_value(cur.get("g")))
+        c["cur_h"].append(_value(cur.get("h")))
+        c["cur_f"].append(_value(cur.get("f")))
+
+        if "frontier" in step:
+            pushes, removes = self._diff(step["frontier"])
+        else:
+            pushes, removes = step["pushed"], []
+        for e in pushes:
+            index, node = len(c["push_node"]), self._id(e["name"])
+            c["push_node"].append(node)
+            c["push_g"].append(_value(e.get("g")))
+            c["push_h"].append(_value(e.get("h")))
+            c["push_f"].append(_value(e.get("f")))
+            if "frontier" not in step:
+                old = self._by_node.get(node)
+                if old is not None:
+                    removes.append(old)
+                self._by_node[node] = index
+            self._live.add(index)
+        if "frontier" not in step:
+            for name in [cur["name"], *step.get("removed", ())]:
+                index = self._by_node.pop(self._ids[name], None)
+                if index is not None:
+                    removes.append(index)
+        for index in removes:
+            self._live.discard(index)
+            c["remove"].append(index)
+        c["push_end"].append(len(c["push_node"]))
+        c["remove_end"].append(len(c["remove"]))
+
+        for name in step["expanded"]:
+            c["expand"].append(self._id(name))
+        c["expand_end"].append(len(c["expand"]))
+
+        if "parent" in step:
+            parent = step["parent"]
+            c["path_parent"].append(PATH_START if parent is None else self._expanded_at[self._ids[parent]])
+            self._expanded_at[c["cur_node"][-1]] = len(self) - 1
+            keep, path = 0, []
+        else:
+            c["path_parent"].append(PATH_STORED)
+            path = [self._id(x) for x in step["path"]]
+            keep = 0
+            for a, b in zip(self._path, path):
+                if a != b:
+                    break
+                keep += 1
+            self._path = path
+        c["path_keep"].append(keep)
+        c["path"].extend(path[keep:])
+        c["path_end"].append(len(c["path"]))
+
+        stats = step.get("stats", {})
+        for k in COUNTERS:
+            c["stat_" + k].append(stats.get(k, 0))
+        for key, v in step.items():
+            if key in KNOWN:
+                continue
+            if key not in self.extras:
+                self.extras[key] = "label" if isinstance(v, str) else "num"
+                c["x_" + key] = array("d", [NAN]) * (len(self) - 1)
+            c["x_" + key].append(self._label(v) if self.extras[key] == "label" else _value(v))
+        for key in self.extras:
+            if key not in step:
+                c["x_" + key].append(NAN)
+
+        if (len(self) - 1) % self.checkpoint_every == 0:
+            c["ckpt_frontier"].extend(sorted(self._live))
+            c["ckpt_frontier_end"].append(len(c["ckpt_frontier"]))
+            c["ckpt_path"].extend(path)
+            c["ckpt_path_end"].append(len(c["ckpt_path"]))
+
+    # Pushes and removes turning the live frontier into this full frontier
+    # list. Entries are matched by value, since RBFS and SMA* can list a city
+    # twice. When the stored order would not reproduce the list (ties on f
+    # broken differently) the whole frontier is pushed again in list order.
+    def _diff(self, frontier):
+        c = self.columns
+        pool = {}
+        for index in self._live:
+            pool.setdefault(self._push_key(index), []).append(index)
+        pushes, kept = [], []
+        for e in frontier:
+            key = (self._id(e["name"]), _value(e.get("g")), _value(e.get("h")), _value(e.get("f")))
+            match = pool.get(key)
+            if match:
+                kept.append(match.pop())
+            else:
+                pushes.append(e)
+        removes = [index for indices in pool.values() for index in indices]
+        next_index = len(c["push_node"])
+        order = sorted([(self._sort_key(i), i, None) for i in kept] +
+                       [(_value(e.get("f")) if e.get("f") is not None else _value(e.get("h")), next_index + j, e)
+                        for j, e in enumerate(pushes)])
+        if [self.names[c["push_node"][i]] if e is None else e["name"] for _, i, e in order] != \
+                [e["name"] for e in frontier]:
+            return list(frontier), removes + kept
+        return pushes, removes
+
+    def _push_key(self, index):
+        c = self.columns
+        return (c["push_node"][index], c["push_g"][index], c["push_h"][index], c["push_f"][index])
+
+    def _sort_key(self, index):
+        f = self.columns["push_f"][index]
+        return f if f == f else self.columns["push_h"][index]
+
+    # -------------------------
+    # Rebuilding steps
+    # -------------------------
+    def __getitem__(self, i):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("trace step out of range")
+        c, k = self.columns, i // self.checkpoint_every
+        first = k * self.checkpoint_every
+        lo = c["ckpt_frontier_end"][k - 1] if k else 0
+        live = set(c["ckpt_frontier"][lo:c["ckpt_frontier_end"][k]])
+        lo = c["ckpt_path_end"][k - 1] if k else 0
+        path = list(c["ckpt_path"][lo:c["ckpt_path_end"][k]])
+        for s in range(first + 1, i + 1):
+            live.update(range(c["push_end"][s - 1], c["push_end"][s]))
+            live.difference_update(c["remove"][c["remove_end"][s - 1]:c["remove_end"][s]])
+            del path[c["path_keep"][s]:]
+            path.extend(c["path"][c["path_end"][s - 1]:c["path_end"][s]])
+        return self._step(i, live, path)
+
+    def __iter__(self):
+        c = self.columns
+        live, path = set(), []
+        for s in range(len(self)):
+            live.update(range(c["push_end"][s - 1] if s else 0, c["push_end"][s]))
+            live.difference_update(c["remove"][c["remove_end"][s - 1] if s else 0:c["remove_end"][s]])
+            del path[c["path_keep"][s]:]
+            path.extend(c["path"][c["path_end"][s - 1] if s else 0:c["path_end"][s]])
+            yield self._step(s, live, path)
+
+    def _step(self, i, live, path):
+        c, names = self.columns, self.names
+        if c["path_parent"][i] != PATH_STORED:
+            path, s = [], i
+            while s != PATH_START:
+                path.append(c["cur_node"][s])
+                s = c["path_parent"][s]
+            path.reverse()
+        step = {"current": _entry(names[c["cur_node"][i]], c["cur_g"][i], c["cur_h"][i], c["cur_f"][i]),
+                "frontier": [_entry(names[c["push_node"][p]], c["push_g"][p], c["push_h"][p], c["push_f"][p])
+                             for p in sorted(live, key=lambda p: (self._sort_key(p), p))],
+                "expanded": {names[x] for x in c["expand"][:c["expand_end"][i]]},
+                "path": [names[x] for x in path], "goal": self.goal, "algo": self.algo}
+        for key, kind in self.extras.items():
+            v = c["x_" + key][i]
+            if v == v:
+                step[key] = self.labels[int(v)] if kind == "label" else _restore(v)
+        step["stats"] = {k: c["stat_" + k][i] for k in COUNTERS}
+        return step
+
+    # -------------------------
+    # Columnar file
+    # -------------------------
+    # MAGIC, 8-byte header length, JSON header, padding to 8 bytes, then the
+    # columns in header order, each padded to 8 bytes, in native byte order.
+    def save(self, path):
+        columns = [(name, a.typecode if isinstance(a, array) else a.format, len(a))
+                   for name, a in self.columns.items()]
+        meta = {"algo": self.algo, "goal": self.goal, "checkpoint_every": self.checkpoint_every,
+                "names": self.names, "labels": self.labels, "extras": self.extras,
+                "columns": columns, "byteorder": sys.byteorder}
+        header = json.dumps(meta).encode()
+        header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + len(header).to_bytes(8, "little") + header)
+            for a in self.columns.values():
+                data = a.tobytes()
+                fh.write(data + b"\0" * (-len(data) % 8))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path}: not a trace file")
+            size = int.from_bytes(fh.read(8), "little")
+            meta = json.loads(fh.read(size))
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: written on a {meta['byteorder']}-endian machine")
+        self = cls(meta["algo"], meta["goal"], meta["checkpoint_every"])
+        self.names, self.labels, self.extras = meta["names"], meta["labels"], meta["extras"]
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        view, start = memoryview(mm), len(MAGIC) + 8 + size
+        for name, code, count in meta["columns"]:
+            nbytes = count * array(code).itemsize
+            if start + nbytes > len(mm):
+                raise ValueError(f"{path}: truncated trace file")
+            self.columns[name] = view[start:start + nbytes].cast(code)
+            start += nbytes + (-nbytes % 8)
+        self.readonly, self.path, self._mmap = True, path, mm
+        return self
+
+    @property
+    def nbytes(self):
+        return sum(len(a) * a.itemsize for a in self.columns.values())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, inspect and replay delta-encoded search traces")
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("record", help="run a Romania search and save its trace")
+    r.add_argument("algorithm", choices=("GBFS", "A*", "RBFS", "SMA*", "CH", "ARA*", "LPA*"))
+    r.add_argument("start")
+    r.add_argument("goal")
+    r.add_argument("-o", "--output", required=True)
+    s = sub.add_parser("show", help="print one step of a saved trace (default: the last)")
+    s.add_argument("trace")
+    s.add_argument("step", type=int, nargs="?", default=-1)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        import RouteSearch
+        steps = {"GBFS": RouteSearch.gbfs_steps, "A*": RouteSearch.astar_steps, "RBFS": RouteSearch.rbfs_steps,
+                 "SMA*": RouteSearch.sma_steps, "CH": RouteSearch.ch_steps, "ARA*": RouteSearch.ara_steps,
+                 "LPA*": RouteSearch.lpa_steps}[args.algorithm]
+        store = TraceStore.record(steps(args.start, args.goal))
+        store.save(args.output)
+        print(f"{args.output}: {len(store)} steps, {store.nbytes / 1024:.1f} KB")
+        return
+    store = TraceStore.open(args.trace)
+    step = store[args.step]
+    print(f"{store.algo} to {store.goal}, step {args.step % len(store) + 1}/{len(store)}")
+    print(f"current   {step['current']}")
+    print(f"path      {' -> '.join(map(str, step['path']))}")
+    print(f"expanded  {len(step['expanded'])} nodes")
+    print("frontier  " + ", ".join(f"{e['name']} ({e.get('f', e.get('h'))})" for e in step["frontier"]))
+
+if __name__ == "__main__":
+    main()
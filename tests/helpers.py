@@ -0,0 +1,16 @@
+import random
+
+from SlidingPuzzle import get_board
+
+# Start state `moves` random blank moves away from the goal (always solvable)
+def random_walk(width, moves, rng):
+    board = get_board(width)
+    state, blank = list(board.goal), board.goal.index(0)
+    for _ in range(moves):
+        j = rng.choice(board.moves[blank])
+        state[blank], state[j] = state[j], state[blank]
+        blank = j
+    return tuple(state)
+
+def rng(seed=0):
+    return random.Random(seed)
@@ -0,0 +1,30 @@
+import pytest
+
+import ContractionHierarchy
+from Benchmark import geometric_graph
+from Landmarks import dijkstra
+from RouteSearch import graph as romania, path_cost, romania_ch
+
+from helpers import rng
+
+def check_queries(ch, graph, pairs):
+    for start, goal in pairs:
+        dist = dijkstra(graph, start)
+        cost, path = ch.query(start, goal)
+        assert cost == pytest.approx(dist[goal])
+        assert path[0] == start and path[-1] == goal
+        assert path_cost(path, graph) == pytest.approx(cost)
+
+def test_romania_queries_match_dijkstra():
+    check_queries(romania_ch(), romania, [(a, b) for a in romania for b in romania])
+
+def test_random_map_queries_match_dijkstra(tmp_path):
+    r = rng()
+    graph = geometric_graph(400, r)
+    ch = ContractionHierarchy.build(graph)
+    pairs = [(r.randrange(graph.n), r.randrange(graph.n)) for _ in range(30)]
+    reachable = [(s, t) for s, t in pairs if t in dijkstra(graph, s)]
+    assert reachable
+    check_queries(ch, graph, reachable)
+    loaded = ContractionHierarchy.ContractionHierarchy.load(ch.save(str(tmp_path / "map.ch")))
+    check_queries(loaded, graph, reachable)
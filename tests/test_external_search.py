@@ -0,0 +1,89 @@
+from collections import Counter
+
+import DistanceTable
+import ExternalSearch
+from RoadNetwork import from_arcs
+from SearchStats import drain
+from SlidingPuzzle import get_board
+
+from helpers import random_walk, rng
+
+# The smallest budget: one block of states per sorted run, three-way merges,
+# so the larger layers are spread over several runs
+MEMORY = 1
+
+def memory_layers(graph, start):
+    depth, layers, frontier = {start: 0}, [1], [start]
+    while frontier:
+        nxt = []
+        for u in frontier:
+            for v in graph[u]:
+                if v not in depth:
+                    depth[v] = len(layers)
+                    nxt.append(v)
+        if nxt:
+            layers.append(len(nxt))
+        frontier = nxt
+    return layers, depth
+
+def random_graph(n, degree, seed, undirected=False):
+    r = rng(seed)
+    sources, targets = [], []
+    for u in range(n):
+        for _ in range(degree):
+            v = r.randrange(n)
+            sources.append(u); targets.append(v)
+            if undirected:
+                sources.append(v); targets.append(u)
+    return from_arcs(n, sources, targets, [1] * len(sources))
+
+def test_8_puzzle_layers_match_the_distance_table(tmp_path):
+    counts = Counter(DistanceTable.load())
+    del counts[0xff]  # unsolvable half
+    stats = {}
+    layers = ExternalSearch.puzzle_bfs(width=3, memory=MEMORY, directory=str(tmp_path), stats=stats)
+    assert layers == [counts[d] for d in range(len(counts))]
+    assert stats["expanded"] == sum(layers)
+    assert list(tmp_path.iterdir()) == []  # the files are gone
+
+def test_puzzle_solve_depth_is_optimal(tmp_path):
+    r = rng()
+    for _ in range(5):
+        start = random_walk(3, 40, r)
+        layers = ExternalSearch.puzzle_bfs(start, solve=True, memory=MEMORY, directory=str(tmp_path))
+        assert len(layers) - 1 == DistanceTable.distance(start)
+
+def test_15_puzzle_layers_match_memory_bfs(tmp_path):
+    board = get_board(4)
+    successors = ExternalSearch.puzzle_successors(4)
+    graph = {}
+    frontier = [board.goal_code]
+    for _ in range(9):
+        nxt = []
+        for code in frontier:
+            if code not in graph:
+                graph[code] = successors(code)
+                nxt += graph[code]
+        frontier = nxt
+    for code in frontier:
+        graph.setdefault(code, [])
+    expected, _ = memory_layers(graph, board.goal_code)
+    layers = ExternalSearch.puzzle_bfs(width=4, memory=MEMORY, max_depth=8, directory=str(tmp_path))
+    assert layers == expected[:9]
+
+def test_graph_layers_match_memory_bfs(tmp_path):
+    for undirected in (False, True):
+        graph = random_graph(60000, 2, seed=int(undirected), undirected=undirected)
+        adjacency = {u: list(graph[u]) for u in range(graph.n)}
+        expected, depth = memory_layers(adjacency, 0)
+        steps = ExternalSearch.graph_bfs_steps(graph, 0, undirected, memory=MEMORY, directory=str(tmp_path))
+        assert drain(steps) == expected
+        goal = max(depth, key=depth.get)
+        steps = ExternalSearch.graph_bfs_steps(graph, 0, undirected, goal, memory=MEMORY, directory=str(tmp_path))
+        assert len(drain(steps)) - 1 == depth[goal]
+
+def test_state_files_round_trip(tmp_path):
+    states = sorted(rng().sample(range(1 << 62), 50000))
+    path = str(tmp_path / "states")
+    ExternalSearch.write_states(path, states)
+    assert list(ExternalSearch.read_states(path)) == states
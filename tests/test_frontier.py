@@ -0,0 +1,80 @@
+from Frontier import Frontier
+from RouteSearch import astar_trace, graph, heuristic_for
+
+from helpers import rng
+
+# The frontier Frontier replaced: a list kept one entry per key, stably sorted
+# by priority and popped from the front; a lower priority re-appends the key
+class ListFrontier:
+    def __init__(self):
+        self.items = []
+
+    def push(self, key, priority, item):
+        for i, (k, p, _) in enumerate(self.items):
+            if k == key:
+                if p <= priority:
+                    return False
+                del self.items[i]
+                break
+        self.items.append((key, priority, item))
+        return True
+
+    def remove(self, key):
+        self.items = [e for e in self.items if e[0] != key]
+
+    def pop(self):
+        self.items.sort(key=lambda e: e[1])
+        return self.items.pop(0)[2]
+
+    def snapshot(self):
+        return [item for _, _, item in sorted(self.items, key=lambda e: e[1])]
+
+def test_frontier_matches_the_sorted_list():
+    r = rng()
+    for _ in range(200):
+        heap, reference = Frontier(), ListFrontier()
+        for _ in range(60):
+            op, key = r.random(), r.randrange(12)
+            if op < 0.6:
+                priority = r.randrange(10)
+                item = (key, priority)
+                assert heap.push(key, priority, item) == reference.push(key, priority, item)
+            elif op < 0.7 and key in heap:
+                heap.remove(key)
+                reference.remove(key)
+            elif heap:
+                assert heap.pop() == reference.pop()
+            assert len(heap) == len(reference.items)
+            assert list(heap.snapshot()) == reference.snapshot()
+            assert heap.min_priority() == min((p for _, p, _ in reference.items), default=float("inf"))
+
+# A* as it was written on the list frontier, with full snapshots
+def list_astar(start, goal):
+    h = heuristic_for(goal)
+    frontier = ListFrontier()
+    frontier.push(start, h[start], {"name": start, "g": 0, "h": h[start], "f": h[start]})
+    expanded, g, steps = set(), {start: 0}, []
+    while frontier.items:
+        node = frontier.pop()
+        if node["name"] in expanded:
+            continue
+        expanded.add(node["name"])
+        steps.append((node, frontier.snapshot(), set(expanded)))
+        if node["name"] == goal:
+            break
+        for nbr, cost in graph[node["name"]].items():
+            new_g = g[node["name"]] + cost
+            if nbr not in g or new_g < g[nbr]:
+                g[nbr] = new_g
+                frontier.push(nbr, new_g + h[nbr], {"name": nbr, "g": new_g, "h": h[nbr], "f": new_g + h[nbr]})
+    return steps
+
+def test_astar_trace_matches_the_list_frontier():
+    for start in graph:
+        for goal in graph:
+            trace, reference = astar_trace(start, goal), list_astar(start, goal)
+            assert len(trace) == len(reference)
+            for step, (node, frontier, expanded) in zip(trace, reference):
+                assert step["current"] == node
+                assert list(step["frontier"]) == frontier
+                assert step["expanded"] == expanded
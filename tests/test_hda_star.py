@@ -0,0 +1,21 @@
+import DistanceTable
+from HDAStar import hda_star
+from SlidingPuzzle import astar
+
+from helpers import random_walk, rng
+
+def test_hda_star_is_optimal():
+    r = rng()
+    for start in [random_walk(3, 60, r) for _ in range(3)]:
+        stats = {}
+        path = hda_star(start, workers=2, stats=stats)
+        assert path[0] == start
+        assert len(path) - 1 == DistanceTable.distance(start) == len(astar(start)) - 1
+        assert stats["workers"] == 2
+
+def test_hda_star_15_puzzle_matches_astar():
+    start = random_walk(4, 40, rng(1))
+    assert len(hda_star(start, workers=2)) == len(astar(start))
+
+def test_unsolvable_start():
+    assert hda_star((2, 1, 3, 4, 5, 6, 7, 8, 0), workers=2) is None
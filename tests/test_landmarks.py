@@ -0,0 +1,15 @@
+from Landmarks import dijkstra
+from RouteSearch import graph, hSLD, romania_heuristic
+
+def test_alt_bounds_are_admissible_and_consistent():
+    for goal in graph:
+        h, dist = romania_heuristic(goal), dijkstra(graph, goal)
+        assert h[goal] == 0
+        for u in graph:
+            assert 0 <= h[u] <= dist[u]
+            for v, cost in graph[u].items():
+                assert h[u] <= cost + h[v]
+
+def test_straight_line_distance_to_bucharest_is_admissible():
+    dist = dijkstra(graph, "Bucharest")
+    assert all(hSLD[u] <= dist[u] for u in graph)
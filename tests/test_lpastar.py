@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from Benchmark import grid_graph
+from Landmarks import dijkstra
+from LPAStar import LiveGraph, LPAStar
+from RouteSearch import graph, lpa_planner, path_cost
+from TraceStore import TraceStore
+
+from helpers import rng
+
+ROADS = [(a, b) for a in graph for b in graph[a] if a < b]
+
+def test_repairs_match_dijkstra_on_romania():
+    r = rng()
+    for _ in range(150):
+        start, goal = r.sample(list(graph), 2)
+        planner = lpa_planner(start, goal)
+        planner.replan()
+        for _ in range(6):
+            if r.random() < 0.15:
+                planner.reset()
+            else:
+                a, b = r.choice(ROADS)
+                planner.set_cost(a, b, r.choice([graph[a][b], graph[a][b] * 2, math.inf]))
+            path = planner.replan()
+            expected = dijkstra(planner.graph, start).get(goal, math.inf)
+            assert planner.cost == expected
+            if path is None:
+                assert expected == math.inf
+            else:
+                assert path[0] == start and path[-1] == goal
+                assert path_cost(path, planner.graph) == expected
+
+def test_repair_matches_a_fresh_plan():
+    r = rng(1)
+    base = grid_graph(900, r)
+    start, goal = 0, base.n - 1
+    live = LiveGraph(base)
+    planner = LPAStar(live, start, goal, base.heuristic(goal))
+    path = planner.replan()
+    for _ in range(30):
+        if r.random() < 0.5:
+            i = r.randrange(len(path) - 1)
+            u, v = path[i], path[i + 1]
+        else:
+            u = r.randrange(base.n)
+            v = r.choice(list(base[u]))
+        planner.set_cost(u, v, live.cost(u, v) * 3)
+        path = planner.replan()
+        fresh = LPAStar(live, start, goal, planner.h)
+        fresh.replan()
+        assert planner.cost == fresh.cost
+        assert path_cost(path, live) == planner.cost
+
+def test_traced_frontier_is_the_queue():
+    r = rng(2)
+    for _ in range(60):
+        planner = lpa_planner(*r.sample(list(graph), 2))
+        for _ in range(5):
+            if r.random() < 0.3:
+                planner.replan()
+            else:
+                trace = TraceStore()
+                for step in planner.replan_steps():
+                    trace.append(step)
+                    frontier = sorted((e["name"], e["f"]) for e in trace[len(trace) - 1]["frontier"])
+                    assert frontier == sorted((e["name"], e["f"]) for e in planner.queue.snapshot())
+            a, b = r.choice(ROADS)
+            planner.set_cost(a, b, r.choice([graph[a][b], graph[a][b] * 2, math.inf]))
+
+def test_stopped_plan_resumes():
+    planner = lpa_planner("Arad", "Bucharest")
+    steps = planner.replan_steps()
+    next(steps), next(steps)
+    steps.close()
+    assert planner.replan() == ["Arad", "Sibiu", "Rimnicu Vilcea", "Pitesti", "Bucharest"]
+    assert planner.cost == 418
+
+def test_live_graph_costs():
+    live = LiveGraph(graph)
+    assert live.set_cost("Arad", "Sibiu", 200) == [("Arad", "Sibiu", 140, 200), ("Sibiu", "Arad", 140, 200)]
+    assert live.cost("Sibiu", "Arad") == 200 and live["Arad"]["Sibiu"] == 200
+    assert graph["Arad"]["Sibiu"] == 140  # the shared map is untouched
+    with pytest.raises(ValueError):
+        live.set_cost("Arad", "Zerind", 10)  # below the map's cost
+    assert sorted(live.reset()) == [("Arad", "Sibiu", 200, 140), ("Sibiu", "Arad", 200, 140)]
+    assert live.changed() == []
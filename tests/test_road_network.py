@@ -0,0 +1,48 @@
+import csv
+
+import RoadNetwork
+from Benchmark import grid_graph
+from RoadNetwork import CSRGraph
+from RouteSearch import graph as romania, positions
+
+from helpers import rng
+
+def adjacency(network):
+    return {u: dict(network[u].items()) for u in range(network.n)}
+
+def write_romania(path):
+    with open(path, "w", newline="") as fh:
+        out = csv.writer(fh)
+        out.writerow(["source", "target", "weight", "source_x", "source_y", "target_x", "target_y"])
+        for a in romania:
+            for b, cost in romania[a].items():
+                if a < b:
+                    out.writerow([a, b, cost, *positions[a], *positions[b]])
+
+def test_csv_matches_the_romania_dict(tmp_path):
+    path = str(tmp_path / "romania.csv")
+    write_romania(path)
+    network = RoadNetwork.read_csv(path)
+    assert network.n == len(romania)
+    for a in romania:
+        u = network.node(a)
+        assert {network.label(v): cost for v, cost in network[u].items()} == romania[a]
+        assert tuple(network.positions[u]) == positions[a]
+
+def test_csr_file_round_trip(tmp_path):
+    network = grid_graph(400, rng())
+    path = network.save(str(tmp_path / "grid.csr"))
+    loaded = CSRGraph.open(path)
+    assert loaded.n == network.n and loaded.num_arcs == network.num_arcs
+    assert adjacency(loaded) == adjacency(network)
+    assert list(loaded.coords) == list(network.coords)
+
+def test_text_input_is_cached(tmp_path):
+    path = str(tmp_path / "romania.csv")
+    write_romania(path)
+    first = RoadNetwork.load(path)
+    cached = RoadNetwork.load(path)
+    assert cached.path == RoadNetwork.cache_path(path)
+    assert getattr(cached, "_mmap", None) is not None  # mapped from the .csr, not parsed again
+    assert adjacency(cached) == adjacency(first)
+    assert cached.names == first.names
@@ -0,0 +1,60 @@
+import DistanceTable
+from SlidingPuzzle import astar, get_board, ida_star, is_solvable, solve
+
+from helpers import random_walk, rng
+
+def starts(width, count, moves, seed=0):
+    r = rng(seed)
+    return [random_walk(width, moves, r) for _ in range(count)]
+
+def is_path(path, width):
+    moves = get_board(width).moves
+    for a, b in zip(path, path[1:]):
+        i, j = a.index(0), b.index(0)
+        if j not in moves[i] or a[j] != b[i] or any(x != y for k, (x, y) in enumerate(zip(a, b)) if k not in (i, j)):
+            return False
+    return path[-1] == get_board(width).goal
+
+def test_astar_and_ida_star_are_optimal_on_the_8_puzzle():
+    for start in starts(3, 40, 60):
+        optimal = DistanceTable.distance(start)
+        for search in (astar, ida_star):
+            path = search(start)
+            assert path[0] == start and is_path(path, 3)
+            assert len(path) - 1 == optimal
+
+def test_table_walk_is_optimal():
+    for start in starts(3, 40, 60, seed=1):
+        path = solve(start, "table")
+        assert is_path(path, 3) and len(path) - 1 == DistanceTable.distance(start)
+
+def test_astar_and_ida_star_agree_on_the_15_puzzle():
+    for start in starts(4, 8, 30):
+        a, b = astar(start), ida_star(start)
+        assert is_path(a, 4) and is_path(b, 4)
+        assert len(a) == len(b)
+
+def test_weighted_astar_stays_within_its_bound():
+    for start in starts(3, 30, 60, seed=2):
+        optimal = DistanceTable.distance(start)
+        stats = {}
+        path = astar(start, stats=stats, w=2)
+        assert is_path(path, 3)
+        assert optimal <= len(path) - 1 <= 2 * optimal
+        assert 1 <= stats["bound"] <= 2
+        assert len(path) - 1 <= stats["bound"] * optimal + 1e-9
+
+def test_solvability_parity():
+    for width in (3, 4, 5):
+        for start in starts(width, 20, 80):
+            assert is_solvable(start, width)
+            # swapping two tiles (not the blank) flips the permutation parity
+            s = list(start)
+            i, j = [k for k, t in enumerate(s) if t][:2]
+            s[i], s[j] = s[j], s[i]
+            assert not is_solvable(tuple(s), width)
+
+def test_unsolvable_start_has_no_path():
+    assert astar((2, 1, 3, 4, 5, 6, 7, 8, 0)) is None
+    assert ida_star((2, 1, 3, 4, 5, 6, 7, 8, 0)) is None
+    assert DistanceTable.distance((2, 1, 3, 4, 5, 6, 7, 8, 0)) is None
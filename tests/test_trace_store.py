@@ -0,0 +1,72 @@
+from RouteSearch import (ara_steps, astar_steps, ch_steps, gbfs_steps, graph, lpa_planner, rbfs_steps,
+                         sma_steps)
+from TraceStore import KNOWN, TraceStore
+
+PAIRS = [(a, b) for i, a in enumerate(graph) for j, b in enumerate(graph) if (i + j) % 3 == 0]
+
+SEARCHES = {"GBFS": gbfs_steps, "A*": astar_steps, "WA*": lambda s, g: astar_steps(s, g, w=2),
+            "ARA*": ara_steps, "RBFS": rbfs_steps, "SMA*": sma_steps, "CH": ch_steps}
+
+def entries(frontier):
+    return sorted((e["name"], e.get("g"), e.get("h"), e.get("f")) for e in frontier)
+
+# The full steps the deltas stand for, rebuilt the plain way
+def full_steps(steps):
+    queued, expanded, paths, full = {}, set(), {}, []
+    for step in steps:
+        name = step["current"]["name"]
+        if "frontier" in step:
+            frontier = step["frontier"]
+        else:
+            queued.update((e["name"], e) for e in step["pushed"])
+            for gone in [name, *step.get("removed", ())]:
+                queued.pop(gone, None)
+            frontier = queued.values()
+        expanded |= set(step["expanded"])
+        if "parent" in step:
+            parent = step["parent"]
+            path = paths[name] = (paths[parent] if parent is not None else []) + [name]
+        else:
+            path = step["path"]
+        extras = {k: v for k, v in step.items() if k not in KNOWN}
+        full.append((step["current"], entries(frontier), set(expanded), list(path), extras, step.get("stats")))
+    return full
+
+def check(steps, checkpoint_every=None):
+    steps = list(steps)
+    store = TraceStore.record(steps) if checkpoint_every is None else TraceStore.record(steps, checkpoint_every)
+    expected = full_steps(steps)
+    assert len(store) == len(expected)
+    for i, (current, frontier, expanded, path, extras, stats) in enumerate(expected):
+        step = store[i]
+        assert step["current"] == current
+        assert entries(step["frontier"]) == frontier
+        assert step["expanded"] == expanded
+        assert step["path"] == path
+        assert step.get("stats") == stats
+        assert all(step[k] == v for k, v in extras.items())
+    # iterating rebuilds the same steps as indexing
+    assert list(store) == [store[i] for i in range(len(store))]
+    return store
+
+def test_every_search_round_trips():
+    for algo, steps in SEARCHES.items():
+        for start, goal in PAIRS:
+            for every in (None, 1, 3):
+                store = check(steps(start, goal), every)
+                assert store.algo == algo and store.goal == goal
+
+def test_lpa_repairs_round_trip():
+    for start, goal in PAIRS:
+        planner = lpa_planner(start, goal)
+        check(planner.replan_steps())
+        for a, b in (("Rimnicu Vilcea", "Pitesti"), ("Sibiu", "Fagaras"), ("Arad", "Timisoara")):
+            planner.set_cost(a, b, graph[a][b] * 3)
+            check(planner.replan_steps())
+
+def test_saved_trace_reopens_unchanged(tmp_path):
+    for algo, steps in SEARCHES.items():
+        store = TraceStore.record(steps("Arad", "Bucharest"))
+        loaded = TraceStore.open(store.save(str(tmp_path / (algo.replace("*", "star") + ".trace"))))
+        assert loaded.algo == store.algo and len(loaded) == len(store)
+        assert list(loaded) == list(store)